@@ -0,0 +1,86 @@
+# benchmarks/bench_batch_extraction.py
+"""
+Draining a backlog with one LLM call per email versus batched calls.
+
+A stub model answers both prompt styles correctly and charges simulated
+time per call: a fixed overhead (request, queueing, model warm-up) plus a
+cost per prompt token and per answer token. Every email is sent to the
+model so the comparison isolates batching.
+
+Usage: python -m benchmarks.bench_batch_extraction [--messages N] [--call-overhead S]
+"""
+import argparse
+import json
+import logging
+import random
+import re
+
+from gmail_reader.extractor.llm_extractor import LLMExtractor, estimate_tokens
+from gmail_reader.extractor.prompts import PromptManager
+
+from .bench_template_learning import NAMES, TEMPLATES, make_code
+
+PROMPT_TOKEN_SECONDS = 0.0005
+ANSWER_TOKEN_SECONDS = 0.02
+
+
+class TimedStubLLM:
+    """Answers single and batch prompts with the true codes and accumulates simulated latency."""
+
+    def __init__(self, truth, call_overhead):
+        self.truth = truth
+        self.call_overhead = call_overhead
+        self.calls = 0
+        self.seconds = 0.0
+
+    def invoke(self, prompt):
+        items = re.findall(r"### Email (\d+)\n(.*?)\n(?=### Email|\Z)", prompt, re.DOTALL)
+        if items:
+            answer = json.dumps({number: self._code(text) for number, text in items})
+        else:
+            answer = self._code(prompt) or "NONE"
+        self.calls += 1
+        self.seconds += (self.call_overhead + estimate_tokens(prompt) * PROMPT_TOKEN_SECONDS
+                         + estimate_tokens(answer) * ANSWER_TOKEN_SECONDS)
+        return type("Response", (), {"content": answer})()
+
+    def _code(self, text):
+        for code in self.truth:
+            if code in text:
+                return code
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--call-overhead", type=float, default=0.3, help="fixed seconds per model call")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    senders = list(TEMPLATES)
+    corpus = []
+    for _ in range(args.messages):
+        sender = rng.choice(senders)
+        code = make_code(rng, sender)
+        corpus.append((TEMPLATES[sender].format(name=rng.choice(NAMES), code=code, noise=rng.randint(1000, 99999)), code))
+    contents = [content for content, _ in corpus]
+    expected = [code for _, code in corpus]
+
+    print(f"{'mode':<18} {'LLM calls':>9} {'accuracy':>9} {'simulated s':>12} {'ms/email':>9}")
+    for mode in ("one per email", "batched"):
+        extractor = LLMExtractor({}, PromptManager())
+        extractor.llm = llm = TimedStubLLM(set(expected), args.call_overhead)
+        if mode == "batched":
+            codes = extractor.extract_codes_batch(contents)
+        else:
+            codes = [extractor.extract_single_code(content) for content in contents]
+        accuracy = sum(code == truth for code, truth in zip(codes, expected)) / len(corpus)
+        print(f"{mode:<18} {llm.calls:>9} {accuracy:>9.1%} {llm.seconds:>12.1f} "
+              f"{llm.seconds / len(corpus) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_connect.py
+"""
+Cost of GmailClient.connect() per client, building the service with
+``build()`` versus from the shared, already parsed discovery document.
+
+``build()`` re-reads and re-parses the discovery document for every
+client; ``connect()`` now parses it once per process. Authentication is
+stubbed so only service construction is measured. The one-off import of
+``googleapiclient.discovery`` is reported separately.
+
+Usage: python -m benchmarks.bench_connect [--clients N]
+"""
+import argparse
+import logging
+import time
+from unittest.mock import Mock
+
+from google.oauth2.credentials import Credentials
+
+from gmail_reader.client import GmailClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    start = time.perf_counter()
+    from googleapiclient.discovery import build
+    import_ms = (time.perf_counter() - start) * 1000
+
+    credentials = [Credentials(token=f"token-{n}") for n in range(args.clients)]
+
+    start = time.perf_counter()
+    for creds in credentials:
+        build("gmail", "v1", credentials=creds)
+    build_ms = (time.perf_counter() - start) / args.clients * 1000
+
+    start = time.perf_counter()
+    first_ms = None
+    for creds in credentials:
+        authenticator = Mock()
+        authenticator.authenticate.return_value = creds
+        GmailClient(authenticator=authenticator).connect()
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start) * 1000
+    connect_ms = (time.perf_counter() - start) / args.clients * 1000
+
+    print(f"import googleapiclient.discovery: {import_ms:.1f} ms (once per process)")
+    print(f"build('gmail', 'v1'):             {build_ms:.3f} ms/client")
+    print(f"connect(), first client:          {first_ms:.3f} ms (parses the document)")
+    print(f"{f'connect(), mean of {args.clients}:':<34}{connect_ms:.3f} ms/client")
+    print(f"speed-up per client:              {build_ms / connect_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
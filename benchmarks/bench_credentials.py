@@ -0,0 +1,116 @@
+# benchmarks/bench_credentials.py
+"""
+Credential lookups from many threads sharing one token that keeps expiring.
+
+Compares the old pattern, where every request re-reads the token file and
+refreshes synchronously once the token has expired, with a
+CredentialManager that refreshes ahead of expiry in the background. Token
+lifetimes and the refresh round trip are scaled down (2 s tokens, 100 ms
+refresh) so several expiries fit in one run.
+
+Usage: python -m benchmarks.bench_credentials [--threads N] [--seconds S]
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from google.oauth2.credentials import Credentials
+
+from gmail_reader.credentials import CredentialManager, TokenStore, seconds_left
+
+# Token files store expiry to the second, so lifetimes much below that get truncated away
+LIFETIME = 2.0
+REFRESH_SECONDS = 0.1
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def fake_refresh(counter):
+    lock = threading.Lock()
+
+    def refresh(creds, request):
+        time.sleep(REFRESH_SECONDS)
+        with lock:
+            counter[0] += 1
+        creds.token = f"token-{counter[0]}"
+        creds.expiry = utcnow() + timedelta(seconds=LIFETIME)
+    return refresh
+
+
+def old_lookup(store):
+    """What GmailAuthenticator.authenticate() used to do on every request."""
+    creds = store.load("work")
+    if seconds_left(creds) <= 0:
+        creds.refresh(None)
+        store.save("work", creds)
+    return creds
+
+
+def run(lookup, threads, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            lookup()
+            local.append(time.perf_counter() - start)
+            time.sleep(0.005)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return sorted(latencies)
+
+
+def report(name, latencies, refreshes):
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:<22} {len(latencies):>8} {statistics.median(latencies) * 1e6:>9.0f} "
+          f"{p99 * 1e3:>8.1f} {latencies[-1] * 1e3:>8.1f} {refreshes:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'strategy':<22} {'lookups':>8} {'p50 (us)':>9} {'p99 (ms)':>8} {'max (ms)':>8} {'refreshes':>10}")
+    for name in ("re-read + on expiry", "CredentialManager"):
+        with tempfile.TemporaryDirectory() as directory:
+            store = TokenStore(Path(directory))
+            store.save("work", Credentials(
+                token="token-0", refresh_token="refresh", token_uri="https://oauth2.googleapis.com/token",
+                client_id="client", client_secret="secret", expiry=utcnow() + timedelta(seconds=LIFETIME)
+            ))
+            counter = [0]
+            with patch.object(Credentials, "refresh", autospec=True, side_effect=fake_refresh(counter)):
+                if name == "CredentialManager":
+                    manager = CredentialManager(store, refresh_margin=LIFETIME / 2)
+                    manager.start(interval=LIFETIME / 10)
+                    try:
+                        latencies = run(lambda: manager.get("work"), args.threads, args.seconds)
+                    finally:
+                        manager.stop()
+                else:
+                    latencies = run(lambda: old_lookup(store), args.threads, args.seconds)
+            report(name, latencies, counter[0])
+
+
+if __name__ == "__main__":
+    main()
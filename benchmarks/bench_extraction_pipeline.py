@@ -0,0 +1,73 @@
+# benchmarks/bench_extraction_pipeline.py
+"""
+Extraction throughput against a model server with parallel slots.
+
+A stub model serves at most ``--slots`` requests at a time (like Ollama
+with OLLAMA_NUM_PARALLEL) and takes ``--latency`` seconds per request.
+Every email goes to the model; the benchmark measures emails per second
+for serial extraction and for ExtractionPipeline at several in-flight
+limits.
+
+Usage: python -m benchmarks.bench_extraction_pipeline [--messages N] [--slots N] [--latency S]
+"""
+import argparse
+import logging
+import threading
+import time
+
+from gmail_reader.extractor import VerificationCodeExtractor
+from gmail_reader.extractor.pipeline import ExtractionPipeline
+
+
+class SlottedStubLLM:
+    """Answers with the code in the prompt, serving at most ``slots`` requests concurrently."""
+
+    def __init__(self, slots, latency):
+        self.slots = threading.Semaphore(slots)
+        self.latency = latency
+
+    def invoke(self, prompt):
+        with self.slots:
+            time.sleep(self.latency)
+        code = prompt.rsplit("code ", 1)[-1].split()[0]
+        return type("Response", (), {"content": code})()
+
+
+def make_extractor(llm):
+    # Threshold above 1 sends every email to the model
+    extractor = VerificationCodeExtractor(llm_config={}, confidence_threshold=1.1)
+    extractor.llm_extractor.llm = llm
+    return extractor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=64)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    messages = [{"id": str(n), "body": f"Your code {100000 + n}"} for n in range(args.messages)]
+    llm = SlottedStubLLM(args.slots, args.latency)
+
+    print(f"model: {args.slots} parallel slots, {args.latency * 1000:.0f} ms per request")
+    print(f"{'mode':<22} {'emails/s':>9} {'speed-up':>9}")
+    extractor = make_extractor(llm)
+    start = time.perf_counter()
+    for message in messages:
+        extractor.extract_code_with_confidence(message["body"])
+    serial = args.messages / (time.perf_counter() - start)
+    print(f"{'serial':<22} {serial:>9.1f} {1.0:>8.1f}x")
+
+    for in_flight in (1, 2, 4, 8):
+        extractor = make_extractor(llm)
+        start = time.perf_counter()
+        with ExtractionPipeline(extractor, max_in_flight=in_flight) as pipeline:
+            results = list(pipeline.map(messages))
+        rate = len(results) / (time.perf_counter() - start)
+        print(f"{f'pipeline, {in_flight} in flight':<22} {rate:>9.1f} {rate / serial:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_extraction_scoring.py
+"""
+Per-message latency and LLM calls with candidate scoring in front of the LLM.
+
+Runs a synthetic corpus of typical OTP mail (plain and HTML templates plus
+a share of ambiguous messages) through VerificationCodeExtractor twice:
+with the LLM consulted for every message, and with the default confidence
+threshold. A stub model returns the true code; its latency is added per
+call instead of slept, so the run is fast and deterministic.
+
+Usage: python -m benchmarks.bench_extraction_scoring [--messages N] [--llm-latency S]
+"""
+import argparse
+import logging
+import random
+import time
+
+from gmail_reader.extractor import VerificationCodeExtractor
+from gmail_reader.extractor.scoring import CandidateScorer
+
+from .bench_template_learning import NAMES, StubLLM, TEMPLATES, make_code
+
+# Mail the scorer should leave to the model: several codes, or no label at all
+AMBIGUOUS = [
+    "Use code {code} now; the old code {other} no longer works. Ref {noise}",
+    "Hi {name}, {code}\n\nSent from my phone {noise}",
+]
+
+
+def make_corpus(rng, messages, ambiguous_share):
+    senders = list(TEMPLATES)
+    corpus = []
+    for _ in range(messages):
+        sender = rng.choice(senders)
+        code = make_code(rng, sender)
+        template = rng.choice(AMBIGUOUS) if rng.random() < ambiguous_share else TEMPLATES[sender]
+        content = template.format(
+            name=rng.choice(NAMES), code=code, other=make_code(rng, sender), noise=rng.randint(1000, 99999)
+        )
+        corpus.append((content, code))
+    return corpus
+
+
+def run(corpus, threshold, llm_latency):
+    extractor = VerificationCodeExtractor(llm_config={}, confidence_threshold=threshold)
+    extractor.llm_extractor.llm = llm = StubLLM({content: code for content, code in corpus})
+    sources = {}
+    correct = 0
+    start = time.perf_counter()
+    for content, code in corpus:
+        result = extractor.extract_code_with_confidence(content)
+        correct += result.code == code
+        sources[result.source] = sources.get(result.source, 0) + 1
+    local = time.perf_counter() - start
+    per_message_ms = (local + llm.calls * llm_latency) / len(corpus) * 1000
+    return llm.calls, correct / len(corpus), per_message_ms, sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--ambiguous", type=float, default=0.05, help="share of ambiguous messages")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per model call")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    corpus = make_corpus(random.Random(args.seed), args.messages, args.ambiguous)
+    print(f"{'setup':<22} {'LLM calls':>9} {'accuracy':>9} {'ms/message':>11}  sources")
+    for name, threshold in (("LLM for every message", 1.1), ("scored (default 0.7)", None)):
+        calls, accuracy, per_message_ms, sources = run(corpus, threshold, args.llm_latency)
+        print(f"{name:<22} {calls:>9} {accuracy:>9.1%} {per_message_ms:>11.1f}  {sources}")
+
+    scorer = CandidateScorer()
+    start = time.perf_counter()
+    for content, _ in corpus:
+        scorer.best(content)
+    print(f"scoring alone: {(time.perf_counter() - start) / len(corpus) * 1e6:.0f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_import_time.py
+"""
+Import time of gmail_reader entry points, measured with ``python -X importtime``.
+
+Each statement runs in a fresh interpreter; the reported time is the
+cumulative import time of the modules it loads beyond those a bare
+interpreter imports at start-up, taking the best of several runs. With ``--max-ms`` the script
+exits non-zero when any statement exceeds its budget, so it can be used as
+a regression guard in CI. The heavy dependencies each statement pulls in
+are listed so a regression is easy to trace.
+
+Usage: python -m benchmarks.bench_import_time [--repeat N] [--max-ms MS]
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import gmail_reader",
+    "from gmail_reader.extractor.patterns import RegexPatterns",
+    "from gmail_reader.extractor import VerificationCodeExtractor",
+    "from gmail_reader import GmailAuthenticator",
+    "from gmail_reader import GmailClient",
+]
+HEAVY = ["langchain", "googleapiclient.discovery", "google_auth_oauthlib", "httpx"]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_importtime(statement):
+    """Yield (cumulative microseconds, depth, module) for each import a statement performs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            yield int(match.group(2)), len(match.group(3)), match.group(4)
+
+
+def measure(statement, startup_modules):
+    """Return (milliseconds, heavy modules loaded) for one statement in a fresh interpreter."""
+    total_us = 0
+    modules = set()
+    for cumulative_us, depth, module in run_importtime(statement):
+        modules.add(module)
+        # Top-level imports only (nested ones are in their parent's cumulative time),
+        # leaving out what the interpreter imports at start-up anyway
+        if depth == 1 and module not in startup_modules:
+            total_us += cumulative_us
+    return total_us / 1000, [name for name in HEAVY if name in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if any statement is slower")
+    args = parser.parse_args()
+
+    startup_modules = {module for _, _, module in run_importtime("pass")}
+    failed = False
+    print(f"{'statement':<62} {'ms':>7}  heavy modules")
+    for statement in STATEMENTS:
+        runs = [measure(statement, startup_modules) for _ in range(args.repeat)]
+        ms, heavy = min(runs)
+        print(f"{statement:<62} {ms:>7.1f}  {', '.join(heavy) or '-'}")
+        failed |= args.max_ms is not None and ms > args.max_ms
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_index.py
+"""
+Dashboard-style searches answered by the Gmail API versus a local MessageIndex.
+
+A FakeGmailBackend holds 10,000 messages spread over 30 days from a few
+dozen senders. Each dashboard query runs against the API (one list call
+plus one batch get, each with a simulated round trip) and against a
+MessageIndex filled by fetching the mailbox once. Results are checked
+against each other, and the time to build the index is reported.
+
+Usage: python -m benchmarks.bench_index [--messages N] [--rtt MS]
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from gmail_reader.client import GmailClient
+from gmail_reader.index import MessageIndex
+from gmail_reader.retry import RequestExecutor
+from gmail_reader.testing import FakeGmailBackend
+
+# Limited to operators FakeGmailBackend evaluates, so both sides can be checked against each other
+QUERIES = [
+    "from:github.com after:{week_ago}",
+    "subject:code OR subject:pin",
+    "is:unread after:{day_ago}",
+    "digest",
+    "from:bank.example subject:alert is:unread",
+]
+SENDERS = ["noreply@github.com", "alerts@bank.example", "news@shop.example", "team@slack.example"] + \
+    [f"person{n}@example.com" for n in range(40)]
+SUBJECTS = ["Your verification code", "Sign-in PIN", "Security alert", "Weekly digest", "Meeting notes",
+            "Invoice", "Re: project update", "Password reset"]
+
+
+class SlowMailbox(FakeGmailBackend):
+    """Fake backend with a fixed round-trip time per HTTP request."""
+
+    rtt = 0.05
+
+    def request(self, *args, **kwargs):
+        time.sleep(self.rtt)
+        return super().request(*args, **kwargs)
+
+
+def fill(backend, messages, now, seed):
+    rng = random.Random(seed)
+    for n in range(messages):
+        subject = rng.choice(SUBJECTS)
+        backend.add_message(
+            subject=f"{subject} #{n}", sender=rng.choice(SENDERS),
+            body=f"{subject}: your verification code is {rng.randint(100000, 999999)}",
+            internal_date=int((now - rng.uniform(0, 30 * 86400)) * 1000),
+            label_ids=["INBOX", "UNREAD"] if rng.random() < 0.3 else ["INBOX"],
+        )
+
+
+def timed(function, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--rtt", type=float, default=50.0)
+    parser.add_argument("--max-results", type=int, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    now = time.time()
+    backend = SlowMailbox()
+    fill(backend, args.messages, now, seed=7)
+    index = MessageIndex(path=None)
+    # No quota throttling, so the fetch is not held to 250 units/s
+    client = GmailClient(index=index, executor=RequestExecutor(quota_rate=None))
+    client.service = backend.build_service()
+
+    SlowMailbox.rtt = 0
+    build_calls = backend.http_requests
+    start = time.perf_counter()
+    for _ in client.iter_messages(page_size=500, full=True):
+        pass
+    build = time.perf_counter() - start
+    build_calls = backend.http_requests - build_calls
+    SlowMailbox.rtt = args.rtt / 1000
+
+    print(f"{args.messages} messages, {args.rtt:g} ms per API round trip, up to {args.max_results} results; "
+          f"index filled in {build:.1f} s by fetching the mailbox once ({build_calls} calls, no round-trip delay)")
+    print(f"{'query':<44} {'API (ms)':>9} {'calls':>6} {'index (ms)':>11} {'results':>8}")
+    for query in QUERIES:
+        query = query.format(week_ago=int(now - 7 * 86400), day_ago=int(now - 86400))
+        backend.http_requests = 0
+        remote_ms, remote = timed(lambda: client.search_messages(query, args.max_results, local=False), 3)
+        calls = backend.http_requests // 3
+        local_ms, local = timed(lambda: client.search_messages(query, args.max_results, local=True), 20)
+        assert [m["id"] for m in local] == [m["id"] for m in remote], query
+        print(f"{query:<44} {remote_ms:>9.0f} {calls:>6} {local_ms:>11.2f} {len(local):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_message.py
+"""
+Parsing 10,000 synthetic full-format message resources into the dictionaries
+built by the previous ``_parse_message`` versus lazily decoded Message objects.
+
+Each resource has 20 headers and a 4 KB base64 text body, roughly like a
+verification email. Three access patterns are timed: parsing only,
+parsing then reading subject and sender (what summaries and listings
+need), and parsing then reading the body as well. The memory column is
+what the parsed representations allocate on top of the resources,
+measured with tracemalloc. A Message keeps its resource alive, so
+retained memory is reported separately for callers that drop the
+resources.
+
+Usage: python -m benchmarks.bench_message [--messages N]
+"""
+import argparse
+import base64
+import gc
+import logging
+import time
+import tracemalloc
+
+from gmail_reader.message import Message
+from gmail_reader.mime import payload_text
+
+BODY = ("Your verification code is 123456. It expires in 10 minutes. " * 70)[:4096]
+
+
+def make_resource(n):
+    headers = [{"name": f"X-Header-{i}", "value": f"value {i} of message {n}"} for i in range(16)]
+    headers += [
+        {"name": "Subject", "value": f"Your code {n}"},
+        {"name": "From", "value": "noreply@service.com"},
+        {"name": "To", "value": "me@example.com"},
+        {"name": "Date", "value": "Mon, 1 Jan 2024 12:00:00 +0000"},
+    ]
+    return {
+        "id": f"{n:016x}",
+        "threadId": f"{n:016x}",
+        "labelIds": ["INBOX", "UNREAD"],
+        "snippet": BODY[:100],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": headers,
+            "body": {"size": len(BODY), "data": base64.urlsafe_b64encode(f"{n} {BODY}".encode()).decode()},
+        },
+    }
+
+
+def old_parse_message(message):
+    """GmailClient._parse_message before Message."""
+    payload = message.get("payload", {})
+    headers = payload.get("headers", [])
+    header_dict = {header["name"]: header["value"] for header in headers}
+    return {
+        "id": message.get("id", ""),
+        "thread_id": message.get("threadId", ""),
+        "subject": header_dict.get("Subject", ""),
+        "sender": header_dict.get("From", ""),
+        "recipient": header_dict.get("To", ""),
+        "date": header_dict.get("Date", ""),
+        "snippet": message.get("snippet", ""),
+        "body": payload_text(payload),
+        "label_ids": message.get("labelIds", [])
+    }
+
+
+def run(parse, resources, access):
+    start = time.perf_counter()
+    parsed = [parse(resource) for resource in resources]
+    for message in parsed:
+        for key in access:
+            message[key]
+    return (time.perf_counter() - start) * 1000, parsed
+
+
+def allocated(parse, resources, access):
+    gc.collect()
+    tracemalloc.start()
+    _, parsed = run(parse, resources, access)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, parsed
+
+
+def retained(parse, count, access):
+    """Bytes still held per message after the resources themselves are dropped."""
+    gc.collect()
+    tracemalloc.start()
+    parsed = [parse(make_resource(n)) for n in range(count)]
+    for message in parsed:
+        for key in access:
+            message[key]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    resources = [make_resource(n) for n in range(args.messages)]
+    patterns = [
+        ("parse only", ()),
+        ("subject + sender", ("subject", "sender")),
+        ("subject + sender + body", ("subject", "sender", "body")),
+    ]
+    print(f"{args.messages} resources, 20 headers and a 4 KB body each")
+    print(f"{'access':<26} {'strategy':<18} {'ms':>8} {'alloc KB/msg':>13} {'retained KB/msg':>16}")
+    for name, access in patterns:
+        for label, parse in (("dict (old)", old_parse_message), ("Message", Message)):
+            elapsed = min(run(parse, resources, access)[0] for _ in range(3))
+            size, _ = allocated(parse, resources, access)
+            kept = retained(parse, min(args.messages, 2000), access)
+            print(f"{name:<26} {label:<18} {elapsed:>8.1f} {size / args.messages / 1024:>13.2f} "
+                  f"{kept / 1024:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
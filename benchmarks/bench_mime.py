@@ -0,0 +1,133 @@
+# benchmarks/bench_mime.py
+"""
+Body extraction cost for full-format payloads and raw messages.
+
+Full format: the previous top-level-only ``_get_message_body`` against
+``mime.payload_text`` on a plain message and on a multipart/mixed message
+whose text sits inside a nested multipart/alternative. The old code
+finds no body at all in the nested case.
+
+Raw format: parsing the whole message with ``email.message_from_bytes``
+and then reading its text part, against ``mime.read_raw``. Each runs on a
+message whose 2 KB text part is followed (or preceded) by a large
+attachment. Peak memory is measured with tracemalloc and excludes the
+raw string itself.
+
+Usage: python -m benchmarks.bench_mime [--attachment-mb N]
+"""
+import argparse
+import base64
+import email
+import logging
+import time
+import tracemalloc
+from email.message import EmailMessage
+from email.policy import default as default_policy
+
+from gmail_reader.mime import payload_text, read_raw
+
+TEXT = ("Your verification code is 123456. " * 60)[:2048]
+
+
+def encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def old_get_message_body(payload):
+    """GmailClient._get_message_body before the MIME walker."""
+    body = ""
+    if "parts" in payload:
+        for part in payload["parts"]:
+            if part["mimeType"] == "text/plain":
+                data = part["body"].get("data", "")
+                if data:
+                    body = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
+                    break
+            elif part["mimeType"] == "text/html" and not body:
+                data = part["body"].get("data", "")
+                if data:
+                    body = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
+    else:
+        if payload["body"].get("data"):
+            body = base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8", errors="ignore")
+    return body
+
+
+def full_payloads():
+    plain = {"mimeType": "text/plain", "body": {"data": encode(TEXT.encode())}}
+    html = {"mimeType": "text/html", "body": {"data": encode(f"<p>{TEXT}</p>".encode())}}
+    nested = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "multipart/alternative", "parts": [plain, html]},
+            {"mimeType": "application/pdf", "filename": "a.pdf", "body": {"attachmentId": "x", "size": 10 ** 6}},
+        ],
+    }
+    return [("text/plain", plain), ("nested mixed/alternative", nested)]
+
+
+def raw_message(attachment_bytes, attachment_first):
+    message = EmailMessage()
+    message["Subject"] = "Your code"
+    message["From"] = "noreply@service.com"
+    attachment = bytes(range(256)) * (attachment_bytes // 256)
+    if attachment_first:
+        message.add_attachment(attachment, maintype="application", subtype="octet-stream", filename="a.bin")
+        body = EmailMessage()
+        body.set_content(TEXT)
+        message.attach(body)
+    else:
+        message.set_content(TEXT)
+        message.add_attachment(attachment, maintype="application", subtype="octet-stream", filename="a.bin")
+    return encode(message.as_bytes())
+
+
+def stdlib_text(raw):
+    message = email.message_from_bytes(base64.urlsafe_b64decode(raw), policy=default_policy)
+    return message.get_body(preferencelist=("plain", "html")).get_content()
+
+
+def measure(function, raw, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(raw)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    tracemalloc.start()
+    function(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--attachment-mb", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'full-format payload':<28} {'strategy':<22} {'µs':>8} {'body chars':>11}")
+    for name, payload in full_payloads():
+        for label, function in (("old _get_message_body", old_get_message_body), ("payload_text", payload_text)):
+            runs = 20000
+            start = time.perf_counter()
+            for _ in range(runs):
+                body = function(payload)
+            elapsed = (time.perf_counter() - start) / runs * 10 ** 6
+            print(f"{name:<28} {label:<22} {elapsed:>8.1f} {len(body):>11}")
+
+    print()
+    size = int(args.attachment_mb * 2 ** 20)
+    print(f"raw message, {args.attachment_mb:g} MB attachment")
+    print(f"{'layout':<22} {'strategy':<26} {'ms':>8} {'peak MB':>8}")
+    for layout, attachment_first in (("text, then attachment", False), ("attachment, then text", True)):
+        raw = raw_message(size, attachment_first)
+        expected = stdlib_text(raw)
+        assert read_raw(raw)["body"] == expected
+        for label, function in (("email.message_from_bytes", stdlib_text), ("read_raw", read_raw)):
+            elapsed, peak = measure(function, raw, args.repeat)
+            print(f"{layout:<22} {label:<26} {elapsed:>8.1f} {peak:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_preprocess.py
+"""
+Prompt size before and after ContentPreprocessor on bulky OTP mail.
+
+The corpus mixes marketing-style HTML mail (large style blocks, layout
+tables, tracking pixels, legal footers), plain-text replies that quote an
+earlier message with an older code, and short plain mail. For each email
+the benchmark builds the single-code prompt from the raw body and from the
+trimmed body and reports estimated prompt tokens, whether the current code
+is still in the prompt, and whether a stale code from a quoted message is.
+
+Usage: python -m benchmarks.bench_preprocess [--messages N]
+"""
+import argparse
+import logging
+import random
+import statistics
+
+from gmail_reader.extractor.llm_extractor import estimate_tokens
+from gmail_reader.extractor.preprocess import ContentPreprocessor
+from gmail_reader.extractor.prompts import PromptManager
+
+STYLE = "<style>" + "".join(
+    f".c{n} {{ font-family: Helvetica, Arial, sans-serif; color: #33{n % 10}; padding: {n}px; margin: 0 auto; }}\n"
+    for n in range(80)
+) + "</style>"
+FOOTER = (
+    "<table><tr><td style='font-size:11px;color:#999'>You are receiving this email because you signed up at "
+    "Example.<br>Unsubscribe | Manage preferences | Privacy Policy | Terms of Service<br>"
+    "© 2024 Example Inc., 1 Market St, San Francisco, CA 94105. All rights reserved.</td></tr></table>"
+)
+
+
+def html_mail(rng, code):
+    rows = "".join(
+        f"<tr><td class='c{n}' style='padding:8px'>{rng.choice(['News', 'Offers', 'Tips'])} item {n}</td></tr>"
+        for n in range(rng.randint(10, 40))
+    )
+    return (
+        f"<html><head><title>Sign in</title>{STYLE}</head><body><table width='600'>{rows}"
+        f"<tr><td><p>Hi there,</p><p>Your verification code is</p>"
+        f"<div style='font-size:28px;letter-spacing:4px'><b>{code}</b></div>"
+        f"<p>It expires in 10 minutes.</p></td></tr>{rows}</table>"
+        f"<img src='https://track.example.com/open?id={rng.randint(1, 10**9)}' width='1' height='1'>"
+        f"{FOOTER}</body></html>"
+    )
+
+
+def reply_mail(rng, code):
+    old = f"{rng.randint(100000, 999999)}"
+    quoted = "\n".join(f"> {line}" for line in ["Thanks, here is your code " + old] + ["> earlier text"] * 20)
+    return (
+        f"Hi,\n\nSorry, that one expired. Your new code is {code}.\n\n-- \nSupport Team\nExample Inc.\n"
+        f"On Mon, Jan 1, 2024 at 10:00 AM Support <support@example.com> wrote:\n{quoted}\n"
+        "Previous message: Thanks, here is your code " + old
+    ), old
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    prompts = PromptManager()
+    preprocessor = ContentPreprocessor()
+    stats = {"raw": {"tokens": [], "kept": 0, "stale": 0}, "trimmed": {"tokens": [], "kept": 0, "stale": 0}}
+    for _ in range(args.messages):
+        code = str(rng.randint(100000, 999999))
+        kind = rng.random()
+        stale = None
+        if kind < 0.5:
+            body = html_mail(rng, code)
+        elif kind < 0.8:
+            body, stale = reply_mail(rng, code)
+        else:
+            body = f"Your one-time passcode is {code}. Do not share it with anyone."
+        for name, content in (("raw", body), ("trimmed", preprocessor.process(body))):
+            prompt = prompts.get_single_code_prompt(content)
+            stats[name]["tokens"].append(estimate_tokens(prompt))
+            stats[name]["kept"] += code in prompt
+            stats[name]["stale"] += bool(stale) and stale in prompt
+
+    print(f"{'prompt':<9} {'mean tokens':>12} {'p95 tokens':>11} {'code kept':>10} {'stale code':>11}")
+    for name, values in stats.items():
+        tokens = sorted(values["tokens"])
+        print(f"{name:<9} {statistics.mean(tokens):>12.0f} {tokens[int(len(tokens) * 0.95)]:>11} "
+              f"{values['kept'] / args.messages:>10.1%} {values['stale'] / args.messages:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
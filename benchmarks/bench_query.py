@@ -0,0 +1,119 @@
+# benchmarks/bench_query.py
+"""
+A dashboard of related searches run one by one versus planned together.
+
+A FakeGmailBackend holds 10,000 messages spread over 30 days. The
+dashboard queries run first as separate searches (one list call plus one
+batch get each) and then through GmailClient.search_many, which lists
+every query by ID in one batch and fetches the listed messages in a
+second one.
+Each HTTP request has a simulated round trip. Results are checked
+against each other.
+
+Usage: python -m benchmarks.bench_query [--messages N] [--rtt MS] [--max-results N]
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from gmail_reader.client import GmailClient
+from gmail_reader.query import any_of, term
+from gmail_reader.retry import RequestExecutor
+from gmail_reader.testing import FakeGmailBackend
+
+SENDERS = ["noreply@github.com", "alerts@bank.example", "news@shop.example", "team@slack.example"] + \
+    [f"person{n}@example.com" for n in range(40)]
+SUBJECTS = ["Your verification code", "Sign-in PIN", "Security alert", "Weekly digest", "Meeting notes",
+            "Invoice", "Re: project update", "Password reset"]
+
+
+def dashboards():
+    """Dashboards of related queries, limited to operators FakeGmailBackend evaluates."""
+    codes = any_of(*(term("subject", keyword) for keyword in ("code", "pin")))
+    return {
+        "inbox overview": {
+            "unread": "is:unread",
+            "important": "is:important",
+            "last week": "newer_than:7d",
+            "with attachments": "has:attachment",
+        },
+        "security": {
+            "codes": codes,
+            "recent codes": f"({codes}) newer_than:1d",
+            "bank": "from:bank.example",
+            "unread bank": "from:bank.example is:unread",
+            "github": "from:github.com",
+        },
+    }
+
+
+class SlowMailbox(FakeGmailBackend):
+    """Fake backend with a fixed round-trip time per HTTP request."""
+
+    rtt = 0.05
+
+    def request(self, *args, **kwargs):
+        time.sleep(self.rtt)
+        return super().request(*args, **kwargs)
+
+
+def fill(backend, messages, now, seed):
+    rng = random.Random(seed)
+    for n in range(messages):
+        subject = rng.choice(SUBJECTS)
+        labels = ["INBOX"]
+        if rng.random() < 0.3:
+            labels.append("UNREAD")
+        if rng.random() < 0.2:
+            labels.append("IMPORTANT")
+        backend.add_message(
+            subject=f"{subject} #{n}", sender=rng.choice(SENDERS),
+            body=f"{subject}: your verification code is {rng.randint(100000, 999999)}",
+            internal_date=int((now - rng.uniform(0, 30 * 86400)) * 1000), label_ids=labels,
+        )
+
+
+def measure(backend, function, runs):
+    samples, calls = [], 0
+    for _ in range(runs):
+        backend.http_requests = 0
+        start = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - start) * 1000)
+        calls = backend.http_requests
+    return statistics.median(samples), calls, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--rtt", type=float, default=50.0)
+    parser.add_argument("--max-results", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    backend = SlowMailbox()
+    fill(backend, args.messages, time.time(), seed=11)
+    SlowMailbox.rtt = args.rtt / 1000
+    # No quota throttling, so only round trips are measured
+    client = GmailClient(executor=RequestExecutor(quota_rate=None))
+    client.service = backend.build_service()
+
+    print(f"{args.messages} messages, {args.rtt:g} ms per API round trip, up to {args.max_results} results per query")
+    print(f"{'dashboard':<16} {'queries':>8} {'separate (ms)':>14} {'calls':>6} {'planned (ms)':>13} {'calls':>6}")
+    for name, queries in dashboards().items():
+        separate_ms, separate_calls, separate = measure(backend, lambda: {
+            key: client.search_messages(query, args.max_results) for key, query in queries.items()
+        }, args.runs)
+        planned_ms, planned_calls, planned = measure(
+            backend, lambda: client.search_many(queries, args.max_results), args.runs)
+        assert planned == separate, name
+        print(f"{name:<16} {len(queries):>8} {separate_ms:>14.0f} {separate_calls:>6} {planned_ms:>13.0f}"
+              f" {planned_calls:>6}")
+
+
+if __name__ == "__main__":
+    main()
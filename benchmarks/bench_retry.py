@@ -0,0 +1,124 @@
+# benchmarks/bench_retry.py
+"""
+GmailClient under injected rate limiting, with and without RequestExecutor retries.
+
+A FakeGmailBackend answers a share of calls with 429. Each scenario lists
+the mailbox and fetches every message one by one, then reports how many
+messages came back, how many calls were sent, and how long the client
+spent backing off. Without retries (the old behaviour) a rejected call
+simply loses its message. Time is simulated: each round trip advances a
+fake clock by 5 ms and backoff sleeps advance it without waiting.
+
+A second table sends 300 ``messages.list`` calls back to back and
+reports the busiest one-second window of quota spending, with and
+without the executor's 250 units/s throttle.
+
+Usage: python -m benchmarks.bench_retry [--messages N]
+"""
+import argparse
+import bisect
+import logging
+
+from gmail_reader.client import GmailClient
+from gmail_reader.retry import RequestExecutor, RetryPolicy
+from gmail_reader.testing import FakeGmailBackend
+
+RTT = 0.005  # simulated seconds per HTTP round trip
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SimulatedMailbox(FakeGmailBackend):
+    """Fake backend whose round trips advance a simulated clock, recording when units are spent."""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.arrivals = []
+
+    def request(self, *args, **kwargs):
+        self.clock.now += RTT
+        self.arrivals.append(self.clock.now)
+        return super().request(*args, **kwargs)
+
+
+def make_client(backend, clock, max_retries, quota_rate=None):
+    executor = RequestExecutor(RetryPolicy(max_retries=max_retries, base_delay=0.5, seed=1),
+                               quota_rate=quota_rate, clock=clock, sleep=clock.sleep)
+    client = GmailClient(executor=executor)
+    client.service = backend.build_service()
+    return client
+
+
+def fetch_all(messages, error_rate, max_retries):
+    clock = SimulatedClock()
+    backend = SimulatedMailbox(clock)
+    for n in range(messages):
+        backend.add_message(subject=f"Code {n}", body=f"Your verification code is {100000 + n}")
+    backend.error_rate = error_rate
+    client = make_client(backend, clock, max_retries)
+
+    fetched = 0
+    try:
+        ids = client.list_message_ids(max_results=messages)
+    except Exception:
+        ids = []
+    for message_id in ids:
+        try:
+            fetched += bool(client.get_message(message_id))
+        except Exception:
+            # Without retries a rejected call is lost, as when errors returned {}
+            pass
+    return {
+        "fetched": fetched,
+        "calls": backend.http_requests,
+        "backoff": client.executor.stats.backoff_seconds,
+        "elapsed": clock.now,
+    }
+
+
+def burst(calls, quota_rate):
+    clock = SimulatedClock()
+    backend = SimulatedMailbox(clock)
+    backend.add_message(subject="Hello")
+    client = make_client(backend, clock, max_retries=0, quota_rate=quota_rate)
+    for _ in range(calls):
+        client.list_message_ids()
+    # Every call is one messages.list costing 5 units; find the busiest one-second window
+    arrivals = sorted(backend.arrivals)
+    peak = max(bisect.bisect_left(arrivals, t + 1) - n for n, t in enumerate(arrivals))
+    return peak * 5, clock.now
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.messages} messages fetched one by one, {RTT * 1000:g} ms simulated round trip")
+    print(f"{'429 rate':>8} {'strategy':<16} {'fetched':>9} {'calls':>6} {'backoff (s)':>12} {'elapsed (s)':>12}")
+    for error_rate in (0.0, 0.05, 0.2):
+        for name, max_retries in (("no retries", 0), ("RequestExecutor", 5)):
+            result = fetch_all(args.messages, error_rate, max_retries)
+            print(f"{error_rate:>8.0%} {name:<16} {result['fetched']:>5}/{args.messages:<3} "
+                  f"{result['calls']:>6} {result['backoff']:>12.1f} {result['elapsed']:>12.1f}")
+
+    print()
+    print(f"{'300 messages.list calls':<26} {'peak units/s':>12} {'elapsed (s)':>12}")
+    for name, quota_rate in (("unthrottled", None), ("throttled to 250 u/s", 250)):
+        peak, elapsed = burst(300, quota_rate)
+        print(f"{name:<26} {peak:>12} {elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
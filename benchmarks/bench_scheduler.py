@@ -0,0 +1,128 @@
+# benchmarks/bench_scheduler.py
+"""
+Simulated multi-account polling: 1,000 mailboxes served by one MailboxScheduler.
+
+Every mailbox is a FakeGmailBackend with a fixed simulated round-trip time;
+new mail arrives at random mailboxes throughout the run. Each scenario
+reports how many polls ran against how many were due, how late they
+started, how bursty the resulting request rate was (peak requests in a
+100 ms window against the mean), the quota units spent per second, and
+how many delivered messages were picked up. Peak RSS growth divided by
+the number of mailboxes gives the memory cost of one account.
+
+Usage: python -m benchmarks.bench_scheduler [--accounts N] [--seconds S]
+"""
+import argparse
+import logging
+import random
+import resource
+import threading
+import time
+from collections import Counter
+
+from gmail_reader.client import GmailClient
+from gmail_reader.scheduler import MailboxScheduler
+from gmail_reader.testing import FakeGmailBackend
+
+RTT = 0.005  # simulated seconds per HTTP round trip
+
+
+class SimulatedMailbox(FakeGmailBackend):
+    """Fake backend with a round-trip delay that records when requests arrive."""
+
+    def __init__(self, arrivals):
+        super().__init__()
+        self.arrivals = arrivals
+        self.lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        self.arrivals.append(time.monotonic())
+        time.sleep(RTT)
+        with self.lock:
+            return super().request(*args, **kwargs)
+
+    def deliver(self, n):
+        with self.lock:
+            self.add_message(subject=f"Code {n}", sender="noreply@service.com",
+                             body=f"Your verification code is {100000 + n}")
+
+
+def run(accounts, seconds, interval, workers, jitter, project_rate, seed):
+    arrivals = []
+    mailboxes = [SimulatedMailbox(arrivals) for _ in range(accounts)]
+    received = Counter()
+
+    def on_messages(account, messages, results):
+        received[account] += len(messages)
+
+    scheduler = MailboxScheduler(workers=workers, jitter=jitter, project_quota_rate=project_rate,
+                                 on_messages=on_messages, seed=seed)
+    for n, mailbox in enumerate(mailboxes):
+        client = GmailClient()
+        client.service = mailbox.build_service()
+        scheduler.add_account(f"user{n}", client, interval=interval, resync_limit=100)
+
+    rng = random.Random(seed)
+    delivered = 0
+    start = time.monotonic()
+    scheduler.start()
+    # Deliveries stop two intervals before the end so every message has a chance to be polled
+    while time.monotonic() - start < seconds:
+        if time.monotonic() - start < seconds - 2 * interval:
+            rng.choice(mailboxes).deliver(delivered)
+            delivered += 1
+        time.sleep(0.01)
+    scheduler.stop()
+    elapsed = time.monotonic() - start
+
+    windows = Counter(int((t - start) * 10) for t in arrivals)
+    # Skip the first interval, where every mailbox runs its initial resync
+    steady = [windows.get(w, 0) for w in range(int(interval * 10), int(elapsed * 10))]
+    return {
+        "polls": scheduler.stats.polls,
+        "due": accounts * seconds / interval,
+        "p50": scheduler.stats.lateness_percentile(50),
+        "p99": scheduler.stats.lateness_percentile(99),
+        "peak": max(steady),
+        "mean": sum(steady) / len(steady),
+        "units": scheduler.stats.units / elapsed,
+        "received": sum(received.values()),
+        "delivered": delivered,
+        "throttled": scheduler.stats.throttled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    scenarios = [
+        ("no jitter", 0.0, 20000.0),
+        ("jitter 10%", 0.1, 20000.0),
+        ("jitter 10%, 600 units/s", 0.1, 600.0),
+    ]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{args.accounts} mailboxes, {args.interval:g} s interval, {args.workers} workers, "
+          f"{RTT * 1000:g} ms round trip, {args.seconds:g} s per scenario")
+    print(f"{'scenario':<26} {'polls/due':>10} {'late p50':>9} {'late p99':>9} "
+          f"{'req/100ms peak/mean':>20} {'units/s':>8} {'throttled':>9} {'mail seen':>10}")
+    for name, jitter, project_rate in scenarios:
+        result = run(args.accounts, args.seconds, args.interval, args.workers, jitter, project_rate, args.seed)
+        print(f"{name:<26} {result['polls'] / result['due']:>10.0%} {result['p50'] * 1000:>7.0f}ms "
+              f"{result['p99'] * 1000:>7.0f}ms {result['peak']:>11} / {result['mean']:<6.1f} "
+              f"{result['units']:>8.0f} {result['throttled']:>9} "
+              f"{result['received']:>5}/{result['delivered']:<4}")
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    print(f"peak RSS growth: {(rss_after - rss_before) / 1024:.0f} MB "
+          f"({(rss_after - rss_before) / args.accounts:.0f} KB per mailbox, fake backend included)")
+
+
+if __name__ == "__main__":
+    main()
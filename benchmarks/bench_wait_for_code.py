@@ -0,0 +1,94 @@
+# benchmarks/bench_wait_for_code.py
+"""
+Time-to-code benchmark for CodeWaiter against a simulated mailbox.
+
+Time-to-code is measured from the moment the OTP email is delivered to the
+moment wait_for_code() returns it. Everything runs on a virtual clock: each
+HTTP round trip costs a fixed simulated latency and delivery delays follow
+a log-normal distribution, so the run is fast and reproducible.
+
+Usage: python -m benchmarks.bench_wait_for_code [--trials N]
+"""
+import argparse
+import logging
+import random
+import statistics
+
+from gmail_reader.client import GmailClient
+from gmail_reader.extractor.patterns import RegexPatterns
+from gmail_reader.testing import FakeGmailBackend
+from gmail_reader.waiter import CodeWaiter, PollStrategy
+
+RTT = 0.08  # simulated seconds per HTTP round trip
+
+
+class SimulatedMailbox(FakeGmailBackend):
+    """Fake backend on a virtual clock with one scheduled OTP delivery."""
+
+    def __init__(self, deliver_at: float):
+        super().__init__()
+        self.now = 0.0
+        self.deliver_at = deliver_at
+        self.delivered = False
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        if not self.delivered and self.now >= self.deliver_at:
+            self.delivered = True
+            self.add_message(subject="Your sign-in code", sender="noreply@service.com",
+                             body="Your verification code is: 123456",
+                             internal_date=int((1_700_000_000 + self.deliver_at) * 1000))
+
+    def clock(self) -> float:
+        return 1_700_000_000 + self.now
+
+    def request(self, *args, **kwargs):
+        self.advance(RTT)
+        return super().request(*args, **kwargs)
+
+
+def run(strategy: PollStrategy, delays, extractor):
+    latencies, calls = [], []
+    for delay in delays:
+        mailbox = SimulatedMailbox(deliver_at=delay)
+        client = GmailClient()
+        client.service = mailbox.build_service()
+        waiter = CodeWaiter(client, extractor=extractor, clock=mailbox.clock, sleep=mailbox.advance)
+        code = waiter.wait_for_code(query="from:service.com", timeout=300, poll_strategy=strategy)
+        assert code == "123456"
+        latencies.append(mailbox.now - delay)
+        calls.append(mailbox.http_requests)
+    return latencies, calls
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    # Median delivery around 4s with a long tail
+    delays = [rng.lognormvariate(1.4, 0.6) for _ in range(args.trials)]
+    extractor = RegexPatterns()
+
+    strategies = {
+        "fixed 5s": PollStrategy(initial=5.0, backoff=1.0, max_interval=5.0),
+        "fixed 1s": PollStrategy(initial=1.0, backoff=1.0, max_interval=1.0),
+        "adaptive (default)": PollStrategy(),
+    }
+    print(f"{'strategy':<20} {'p50 (s)':>8} {'p99 (s)':>8} {'HTTP calls/wait':>16}")
+    for name, strategy in strategies.items():
+        latencies, calls = run(strategy, delays, extractor)
+        print(f"{name:<20} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f} "
+              f"{statistics.mean(calls):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
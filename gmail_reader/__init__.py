@@ -1,8 +1,40 @@
 # gmail_reader/__init__.py
 
-from .client import GmailClient
-from .auth import GmailAuthenticator
-from .extractor import VerificationCodeExtractor
+"""
+Gmail reader package.
+
+Public classes are imported on first access, so ``import gmail_reader``
+stays cheap for scripts that only need part of the package (for example
+regex extraction) and never pay for the Google API client or langchain.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .client import GmailClient
+    from .async_client import AsyncGmailClient
+    from .auth import GmailAuthenticator
+    from .extractor import VerificationCodeExtractor
 
 __version__ = "0.1.0"
-__all__ = ["GmailClient", "GmailAuthenticator", "VerificationCodeExtractor"]
\ No newline at end of file
+__all__ = ["GmailClient", "AsyncGmailClient", "GmailAuthenticator", "VerificationCodeExtractor"]
+
+_LAZY_ATTRIBUTES = {
+    "GmailClient": ".client",
+    "AsyncGmailClient": ".async_client",
+    "GmailAuthenticator": ".auth",
+    "VerificationCodeExtractor": ".extractor",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,227 @@
+# gmail_reader/async_client.py
+
+"""Asynchronous Gmail API client built on httpx."""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+from google.auth.transport.requests import Request
+
+from .auth import GmailAuthenticator
+from .client import SUMMARY_HEADERS, GmailClient
+from .config import MAX_CONCURRENCY, MAX_RESULTS
+from .retry import RequestExecutor, RetryPolicy, is_retryable_status, parse_retry_after, quota_units
+
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = "https://gmail.googleapis.com/gmail/v1/users/me/"
+
+
+class AsyncGmailClient:
+    """
+    Asyncio-native counterpart of GmailClient.
+
+    All requests share one pooled HTTP connection set and are bounded by a
+    semaphore, so many clients can run in a single event loop without a
+    thread per account. Like GmailClient, every request is charged to a
+    RequestExecutor: its quota units come from the executor's budget,
+    waiting with ``asyncio.sleep`` rather than blocking the loop, its
+    retries follow the executor's policy, and all of it is counted in
+    ``executor.stats``.
+    """
+
+    def __init__(
+        self,
+        authenticator: Optional[GmailAuthenticator] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        base_url: str = API_BASE_URL,
+        timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        executor: Optional[RequestExecutor] = None
+    ):
+        """
+        Initialize the AsyncGmailClient.
+
+        Args:
+            authenticator: Authenticator providing OAuth credentials
+            max_concurrency: Maximum number of requests in flight at once
+            base_url: Gmail API base URL for the authenticated user
+            timeout: Per-request timeout in seconds
+            retry_policy: Backoff for rate limits, server errors and connection failures,
+                used when no ``executor`` is given
+            executor: Quota budget, retry policy and stats; share one with a GmailClient
+                for the same mailbox so both count against one per-user limit
+        """
+        self.authenticator = authenticator or GmailAuthenticator()
+        self.max_concurrency = max_concurrency
+        self.base_url = base_url
+        self.timeout = timeout
+        self.executor = executor or RequestExecutor(policy=retry_policy)
+        self.retry_policy = self.executor.policy
+        self.creds = None
+        self.http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> "AsyncGmailClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """Authenticate and open the pooled HTTP client."""
+        self.creds = await asyncio.to_thread(self.authenticator.authenticate)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency
+        )
+        self.http = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+        logger.info("Connected to Gmail API (async)")
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    async def list_messages(self, query: str = "", max_results: int = MAX_RESULTS) -> List[Dict]:
+        """
+        List messages matching the query.
+
+        A summary that cannot be fetched, e.g. because the message was deleted
+        after the listing, is logged and left out, as in GmailClient's batches.
+        """
+        try:
+            results = await self._get("messages", {"q": query, "maxResults": max_results})
+        except httpx.HTTPError as error:
+            logger.error(f"An error occurred: {error}")
+            return []
+
+        message_ids = [msg["id"] for msg in results.get("messages", [])]
+        fetched = await asyncio.gather(
+            *(self._get_message_summary(msg_id) for msg_id in message_ids), return_exceptions=True
+        )
+        summaries = []
+        for message_id, summary in zip(message_ids, fetched):
+            if isinstance(summary, httpx.HTTPError):
+                logger.error(f"An error occurred fetching message {message_id}: {summary}")
+            elif isinstance(summary, BaseException):
+                # Transient failures that outlasted every retry, as for the sync client's batches
+                raise summary
+            else:
+                summaries.append(summary)
+        return summaries
+
+    async def search_messages(self, query: str, max_results: int = MAX_RESULTS) -> List[Dict]:
+        """Search messages with Gmail query syntax."""
+        return await self.list_messages(query=query, max_results=max_results)
+
+    async def get_message(self, message_id: str) -> Dict:
+        """Get full message content by ID."""
+        try:
+            message = await self._get(f"messages/{message_id}")
+            return GmailClient._parse_message(message)
+
+        except httpx.HTTPError as error:
+            logger.error(f"An error occurred: {error}")
+            return {}
+
+    async def get_message_raw(self, message_id: str) -> Dict:
+        """Get raw message data."""
+        try:
+            return await self._get(f"messages/{message_id}", {"format": "raw"})
+
+        except httpx.HTTPError as error:
+            logger.error(f"An error occurred: {error}")
+            return {}
+
+    async def get_labels(self) -> List[Dict]:
+        """Get all Gmail labels."""
+        try:
+            results = await self._get("labels")
+            return results.get("labels", [])
+
+        except httpx.HTTPError as error:
+            logger.error(f"An error occurred: {error}")
+            return []
+
+    async def _get_message_summary(self, message_id: str) -> Dict:
+        """Get message summary from metadata headers only."""
+        message = await self._get(
+            f"messages/{message_id}",
+            {"format": "metadata", "metadataHeaders": SUMMARY_HEADERS}
+        )
+        return GmailClient._summarize(message_id, message)
+
+    async def _get(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Issue an authorized GET request within the concurrency bound.
+
+        The request's quota units are taken from the executor's budget first.
+        Transient failures are retried according to the executor's policy;
+        throttling and backoff happen outside the concurrency bound.
+        """
+        if self.http is None:
+            await self.connect()
+
+        method = _method_name(path)
+        units = quota_units(method)
+        attempt = 0
+        while True:
+            await self._throttle(units)
+            self.executor._charge(method, units)
+            retryable, status, retry_after = False, None, None
+            try:
+                async with self._semaphore:
+                    headers = await self._auth_headers()
+                    response = await self.http.get(path, params=params, headers=headers)
+                if response.is_success:
+                    return response.json()
+                status = response.status_code
+                retryable = is_retryable_status(status, response.content)
+                if retryable:
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                error: Exception = httpx.HTTPStatusError(
+                    f"{status} for {path}", request=response.request, response=response)
+            except httpx.TransportError as transport_error:
+                error, retryable = transport_error, True
+
+            delay = self.executor._after_failure(error, attempt, retryable, status, retry_after)
+            if delay is None:
+                raise error
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _throttle(self, units: int) -> None:
+        """Wait, without blocking the event loop, until the executor lets a request through."""
+        waited = 0.0
+        while True:
+            delay = self.executor.throttle_delay(units)
+            if not delay:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        self.executor._record_throttle(waited)
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Build authorization headers, refreshing expired credentials once."""
+        if not self.creds.valid and self.creds.refresh_token:
+            async with self._refresh_lock:
+                if not self.creds.valid:
+                    logger.info("Refreshing expired credentials")
+                    await asyncio.to_thread(self.creds.refresh, Request())
+
+        headers: Dict[str, str] = {}
+        self.creds.apply(headers)
+        return headers
+
+
+def _method_name(path: str) -> str:
+    """Gmail method for a GET path relative to the user, e.g. "messages/123" -> "messages.get"."""
+    resource, _, rest = path.partition("/")
+    return f"{resource}.{'get' if rest else 'list'}"
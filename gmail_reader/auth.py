@@ -1,16 +1,25 @@
 # gmail_reader/auth.py
 
 import logging
+import threading
 from pathlib import Path
 from typing import Optional, cast
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from .config import CRED_FILE, SCOPES, TOKEN_FILE
+from .credentials import file_lock, write_token
 
 logger = logging.getLogger(__name__)
 
 
+def __getattr__(name):
+    # The OAuth flow is only needed for the first login, so its import is deferred
+    if name == "InstalledAppFlow":
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        return InstalledAppFlow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class GmailAuthenticator:
     def __init__(self, 
                  credentials_file: Path = Path(CRED_FILE),
@@ -18,10 +27,25 @@ class GmailAuthenticator:
         self.credentials_file = Path(credentials_file)
         self.token_file = Path(token_file)
         self.creds: Optional[Credentials] = None
+        self._lock = threading.Lock()
         
     def authenticate(self) -> Credentials:
-        """Authenticate and return Gmail credentials."""
-        # Check for existing token
+        """
+        Authenticate and return Gmail credentials.
+        
+        Valid credentials are kept in memory, so the token file is only read
+        again once they have expired. Loading, refreshing and saving hold a
+        lock on the token file, so threads and processes sharing it refresh
+        only once. Use ``CredentialManager`` to refresh ahead of expiry.
+        """
+        with self._lock:
+            if self.creds and self.creds.valid:
+                return self.creds
+            with file_lock(self.token_file):
+                return self._authenticate()
+    
+    def _authenticate(self) -> Credentials:
+        # Check for existing token; another process may have refreshed it
         if self.token_file.exists():
             try:
                 self.creds = Credentials.from_authorized_user_file(str(self.token_file), SCOPES)
@@ -44,6 +68,7 @@ class GmailAuthenticator:
                     )
                 
                 logger.info("Starting OAuth flow")
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     str(self.credentials_file), 
                     SCOPES
@@ -60,6 +85,5 @@ class GmailAuthenticator:
     def _save_credentials(self) -> None:
         """Save credentials to token file."""
         if self.creds:
-            self.token_file.parent.mkdir(parents=True, exist_ok=True)
-            self.token_file.write_text(self.creds.to_json())
+            write_token(self.token_file, self.creds)
             logger.info(f"Saved credentials to {self.token_file}")
\ No newline at end of file
@@ -0,0 +1,180 @@
+# gmail_reader/cache.py
+
+"""Persistent cache of parsed Gmail messages."""
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .config import CACHE_FILE, CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+class MessageCache:
+    """
+    Two-tier LRU cache of parsed messages keyed by message ID.
+
+    Gmail message content never changes after delivery, so a message ID
+    fully identifies its content and entries never need revalidation. Label
+    IDs are the exception: they reflect the state at fetch time.
+
+    A small in-memory tier sits in front of a SQLite file bounded to
+    ``max_entries`` rows; the least recently used rows are evicted first.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = CACHE_FILE,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        memory_entries: int = 256
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file, or None for a memory-only cache
+            max_entries: Maximum number of messages kept on disk
+            memory_entries: Maximum number of messages kept in the memory tier
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, accessed INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_accessed ON messages (accessed)")
+        row = self._db.execute("SELECT MAX(accessed) FROM messages").fetchone()
+        self._clock = row[0] or 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            if message_id in self._memory:
+                return True
+            return self._db.execute("SELECT 1 FROM messages WHERE id = ?", (message_id,)).fetchone() is not None
+
+    def get(self, message_id: str) -> Optional[Dict]:
+        """Return the cached message, or None."""
+        return self.get_many([message_id]).get(message_id)
+
+    def get_many(self, message_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Return cached messages for the given IDs, keyed by ID; misses are omitted."""
+        message_ids = list(message_ids)
+        found: Dict[str, Dict] = {}
+        with self._lock:
+            missing: List[str] = []
+            for message_id in message_ids:
+                message = self._memory.get(message_id)
+                if message is not None:
+                    self._memory.move_to_end(message_id)
+                    found[message_id] = dict(message)
+                else:
+                    missing.append(message_id)
+
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT id, data FROM messages WHERE id IN ({placeholders})", missing
+                ).fetchall()
+                for message_id, data in rows:
+                    message = json.loads(data)
+                    self._remember(message_id, message)
+                    found[message_id] = dict(message)
+
+            if found:
+                self._clock += 1
+                placeholders = ",".join("?" * len(found))
+                self._db.execute(
+                    f"UPDATE messages SET accessed = ? WHERE id IN ({placeholders})",
+                    [self._clock, *found]
+                )
+                self._db.commit()
+
+            self.hits += len(found)
+            self.misses += len(message_ids) - len(found)
+        return found
+
+    def put(self, message_id: str, message: Dict) -> None:
+        """Store a parsed message."""
+        self.put_many({message_id: message})
+
+    def put_many(self, messages: Dict[str, Dict]) -> None:
+        """Store several parsed messages keyed by ID."""
+        if not messages:
+            return
+        # Plain dicts, so lazily decoded Message objects are decoded once here and do not pin their resources
+        messages = {message_id: dict(message) for message_id, message in messages.items()}
+        with self._lock:
+            self._clock += 1
+            self._db.executemany(
+                "INSERT OR REPLACE INTO messages (id, data, accessed) VALUES (?, ?, ?)",
+                [(message_id, json.dumps(message), self._clock) for message_id, message in messages.items()]
+            )
+            for message_id, message in messages.items():
+                self._remember(message_id, message)
+            self._evict()
+            self._db.commit()
+
+    def iter_messages(self, chunk_size: int = 500) -> Iterator[Dict]:
+        """Yield every message on disk, without touching recency, e.g. to build a MessageIndex."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, data FROM messages WHERE id > ? ORDER BY id LIMIT ?", (last, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, data in rows:
+                yield json.loads(data)
+            last = rows[-1][0]
+
+    def clear(self) -> None:
+        """Remove every cached message."""
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM messages")
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, message_id: str, message: Dict) -> None:
+        """Insert into the memory tier, evicting its least recently used entry."""
+        self._memory[message_id] = message
+        self._memory.move_to_end(message_id)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Drop the least recently used rows beyond ``max_entries``."""
+        count = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            evicted = [row[0] for row in self._db.execute(
+                "SELECT id FROM messages ORDER BY accessed LIMIT ?", (excess,)
+            )]
+            self._db.executemany("DELETE FROM messages WHERE id = ?", [(message_id,) for message_id in evicted])
+            for message_id in evicted:
+                self._memory.pop(message_id, None)
+            logger.debug(f"Evicted {len(evicted)} messages from cache")
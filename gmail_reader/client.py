@@ -1,89 +1,450 @@
 # gmail_reader/client.py
 
+import json
 import logging
-from typing import List, Dict, Optional
-from googleapiclient.discovery import build
+import threading
+from pathlib import Path
+from typing import Iterator, List, Dict, Optional, Tuple
 from googleapiclient.errors import HttpError
 from .auth import GmailAuthenticator
-from .config import MAX_RESULTS
+from .cache import MessageCache
+from .config import BATCH_SIZE, DISCOVERY_FILE, MAX_RESULTS, PAGE_SIZE
+from .index import MessageIndex
+from .message import Message
+from .mime import decode_data, payload_text, read_raw, to_text
+from .query import UnsupportedQueryError, plan_queries
+from .retry import RequestExecutor
 
 logger = logging.getLogger(__name__)
 
+# Headers requested for summaries; the body is never downloaded for these
+SUMMARY_HEADERS = ["Subject", "From", "Date"]
+SUMMARY_FIELDS = ["id", "subject", "sender", "date", "snippet"]
+
+
+_discovery_documents: Dict[Tuple[str, str], Dict] = {}
+_discovery_lock = threading.Lock()
+
+
+def load_discovery_document(api: str = "gmail", version: str = "v1", path: Optional[Path] = DISCOVERY_FILE) -> Dict:
+    """
+    Return the parsed discovery document for an API, reading it once per process.
+    
+    The document comes from ``path`` if given, otherwise from the copy bundled
+    with google-api-python-client, so no network access is needed.
+    """
+    key = (api, version)
+    with _discovery_lock:
+        document = _discovery_documents.get(key)
+        if document is None:
+            if path is not None:
+                text = Path(path).read_text()
+            else:
+                from googleapiclient import discovery_cache
+                text = discovery_cache.get_static_doc(api, version)
+                if text is None:
+                    raise FileNotFoundError(f"No bundled discovery document for {api} {version}")
+            document = _discovery_documents[key] = json.loads(text)
+            logger.debug(f"Loaded discovery document for {api} {version}")
+        return document
+
+
+def build_from_document(document: Dict, **kwargs):
+    """Build an API service from a discovery document; googleapiclient.discovery is imported on first use."""
+    from googleapiclient.discovery import build_from_document as discovery_build_from_document
+    return discovery_build_from_document(document, **kwargs)
+
+
+class HistoryExpiredError(Exception):
+    """Raised when a history checkpoint is too old for users.history.list."""
+
 
 class GmailClient:
-    def __init__(self, authenticator: Optional[GmailAuthenticator] = None):
+    def __init__(
+        self,
+        authenticator: Optional[GmailAuthenticator] = None,
+        cache: Optional[MessageCache] = None,
+        executor: Optional[RequestExecutor] = None,
+        index: Optional[MessageIndex] = None
+    ):
         self.authenticator = authenticator or GmailAuthenticator()
+        self.cache = cache
+        # Full messages fetched through this client are indexed for local searches
+        self.index = index
+        # Retries transient errors and throttles to this mailbox's quota
+        self.executor = executor or RequestExecutor()
         self.service = None
         
     def connect(self):
         """Connect to Gmail API."""
         creds = self.authenticator.authenticate()
-        self.service = build("gmail", "v1", credentials=creds)
+        # Every client shares one parsed discovery document; only the credentials differ
+        self.service = build_from_document(load_discovery_document(), credentials=creds)
         logger.info("Connected to Gmail API")
         
     def list_messages(self, query: str = "", max_results: int = MAX_RESULTS) -> List[Dict]:
         """List messages matching the query."""
+        return list(self.iter_messages(query=query, page_size=max_results, limit=max_results))
+    
+    def iter_messages(
+        self,
+        query: str = "",
+        page_size: int = PAGE_SIZE,
+        limit: Optional[int] = None,
+        full: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Iterate over messages matching the query, following result pages lazily.
+        
+        Each page of IDs is fetched in batch as it is reached, so memory stays
+        bounded by the page size and results are available before the scan ends.
+        
+        Args:
+            query: Gmail search query
+            page_size: Number of messages requested per page (at most 500)
+            limit: Maximum number of messages to yield, or None for all
+            full: Yield full parsed messages instead of summaries
+        """
+        if not self.service:
+            self.connect()
+        
+        page_size = min(page_size, 500)
+        page_token = None
+        remaining = limit
+        
+        while remaining is None or remaining > 0:
+            params = {
+                "userId": "me",
+                "q": query,
+                "maxResults": page_size if remaining is None else min(page_size, remaining)
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            
+            try:
+                results = self.executor.execute(self.service.users().messages().list(**params))
+                message_ids = [msg["id"] for msg in results.get("messages", [])]
+                if full:
+                    page = self._get_full_messages(message_ids)
+                else:
+                    page = self._get_message_summaries(message_ids)
+                
+            except HttpError as error:
+                logger.error(f"An error occurred: {error}")
+                return
+            
+            yield from page
+            
+            if remaining is not None:
+                remaining -= len(message_ids)
+            page_token = results.get("nextPageToken")
+            if not page_token or not message_ids:
+                break
+    
+    def list_message_ids(self, query: str = "", max_results: int = MAX_RESULTS) -> List[str]:
+        """List IDs of messages matching the query without fetching them."""
         if not self.service:
             self.connect()
             
         try:
-            results = self.service.users().messages().list(
+            results = self.executor.execute(self.service.users().messages().list(
                 userId="me",
                 q=query,
                 maxResults=max_results
-            ).execute()
-            
-            messages = results.get("messages", [])
-            return [self._get_message_summary(msg["id"]) for msg in messages]
+            ))
+            return [msg["id"] for msg in results.get("messages", [])]
             
         except HttpError as error:
             logger.error(f"An error occurred: {error}")
             return []
     
-    def search_messages(self, query: str, max_results: int = MAX_RESULTS) -> List[Dict]:
-        """Search messages with Gmail query syntax."""
+    def search_messages(self, query: str, max_results: int = MAX_RESULTS, local: Optional[bool] = None) -> List[Dict]:
+        """
+        Search messages with Gmail query syntax.
+        
+        With an index, supported queries are answered from it, from messages
+        fetched earlier; other queries go to the Gmail API. Either way the
+        result is summaries, as from ``list_messages``. Use
+        ``MessageIndex.search`` for full messages from the index.
+        
+        Args:
+            query: Gmail search query
+            max_results: Maximum number of messages to return
+            local: True to search only the index, False to always ask Gmail,
+                None to use the index when it can answer the query
+                
+        Raises:
+            UnsupportedQueryError: If ``local`` is True and the index cannot evaluate the query
+        """
+        if self.index is not None and local is not False:
+            try:
+                return [
+                    {field: message.get(field, "") for field in SUMMARY_FIELDS}
+                    for message in self.index.search(query, max_results)
+                ]
+            except UnsupportedQueryError as e:
+                if local:
+                    raise
+                logger.debug(f"Searching Gmail for {query!r}: {e}")
+        elif local:
+            raise UnsupportedQueryError("No local index configured")
         return self.list_messages(query=query, max_results=max_results)
     
+    def search_many(self, queries: Dict[str, str], max_results: int = MAX_RESULTS) -> Dict[str, List[Dict]]:
+        """
+        Run several searches in two round trips instead of two per search.
+        
+        Gmail decides which messages match each query, as with separate
+        ``search_messages`` calls, and queries that mean the same thing (see
+        ``plan_queries``) are searched once. Queries the index supports are
+        answered from it. The others are listed by ID in one batch request,
+        and the messages they list are fetched together in a second batch,
+        so a message matched by several queries is downloaded once.
+        
+        Args:
+            queries: Gmail search queries by name
+            max_results: Maximum number of messages per query
+            
+        Returns:
+            Summaries for each query, as from ``search_messages``, by name
+        """
+        groups = plan_queries(queries).values()
+        found: Dict[str, List[Dict]] = {}
+        remote: List[str] = []
+        for names in groups:
+            query = queries[names[0]]
+            if self.index is not None and self.index.supports(query):
+                found[names[0]] = self.search_messages(query, max_results)
+            else:
+                remote.append(names[0])
+        
+        listed = self._batch_list(remote, queries, max_results)
+        message_ids = list(dict.fromkeys(message_id for ids in listed.values() for message_id in ids))
+        summaries = {summary["id"]: summary for summary in self.get_message_summaries(message_ids)}
+        for name, ids in listed.items():
+            found[name] = [summaries[message_id] for message_id in ids if message_id in summaries]
+        
+        leaders = {name: names[0] for names in groups for name in names}
+        return {name: list(found[leaders[name]]) for name in queries}
+    
+    def wait_for_code(
+        self,
+        query: str = "",
+        since=None,
+        timeout: float = 120.0,
+        poll_strategy=None,
+        extractor=None
+    ) -> Optional[str]:
+        """Wait for a matching email and return its verification code (see CodeWaiter)."""
+        from .waiter import CodeWaiter
+        return CodeWaiter(self, extractor=extractor).wait_for_code(
+            query=query, since=since, timeout=timeout, poll_strategy=poll_strategy
+        )
+    
     def get_message(self, message_id: str) -> Dict:
         """Get full message content by ID."""
+        if self.cache is not None:
+            cached = self.cache.get(message_id)
+            if cached is not None:
+                return cached
+        
         if not self.service:
             self.connect()
             
         try:
-            message = self.service.users().messages().get(
+            message = self.executor.execute(self.service.users().messages().get(
                 userId="me",
                 id=message_id
-            ).execute()
+            ))
             
-            return self._parse_message(message)
+            parsed = self._parse_message(message)
+            if self.cache is not None:
+                self.cache.put(message_id, parsed)
+            if self.index is not None:
+                self.index.add(parsed)
+            return parsed
             
         except HttpError as error:
             logger.error(f"An error occurred: {error}")
             return {}
     
+    def get_messages(self, message_ids: List[str]) -> List[Dict]:
+        """Get full content for several messages using batched requests."""
+        if not self.service:
+            self.connect()
+            
+        try:
+            return self._get_full_messages(message_ids)
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
+            return []
+    
+    def get_message_summaries(self, message_ids: List[str]) -> List[Dict]:
+        """Get summaries for several messages using batched metadata requests."""
+        if not self.service:
+            self.connect()
+            
+        try:
+            return self._get_message_summaries(message_ids)
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
+            return []
+    
+    def get_history_id(self) -> str:
+        """Get the mailbox's current history ID."""
+        if not self.service:
+            self.connect()
+            
+        profile = self.executor.execute(self.service.users().getProfile(userId="me"))
+        return profile["historyId"]
+    
+    def list_history(self, start_history_id: str, label_id: Optional[str] = None) -> Tuple[List[str], str]:
+        """
+        List IDs of messages added since a history checkpoint.
+        
+        Args:
+            start_history_id: History ID of the last sync
+            label_id: Only return messages added with this label
+            
+        Returns:
+            Tuple of (added message IDs in delivery order, latest history ID);
+            no IDs and ``start_history_id`` if a page cannot be read
+            
+        Raises:
+            HistoryExpiredError: If the checkpoint is too old and a full resync is needed
+        """
+        if not self.service:
+            self.connect()
+        
+        message_ids: List[str] = []
+        history_id = start_history_id
+        page_token = None
+        
+        try:
+            while True:
+                params = {
+                    "userId": "me",
+                    "startHistoryId": start_history_id,
+                    "historyTypes": ["messageAdded"]
+                }
+                if label_id:
+                    params["labelId"] = label_id
+                if page_token:
+                    params["pageToken"] = page_token
+                
+                results = self.executor.execute(self.service.users().history().list(**params))
+                for record in results.get("history", []):
+                    for added in record.get("messagesAdded", []):
+                        message_ids.append(added["message"]["id"])
+                history_id = results.get("historyId", history_id)
+                
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+            
+        except HttpError as error:
+            if error.resp.status == 404:
+                raise HistoryExpiredError(f"History ID {start_history_id} has expired") from error
+            logger.error(f"An error occurred: {error}")
+            # Report nothing and keep the old checkpoint, so every page is read again on the next sync
+            return [], start_history_id
+        
+        return list(dict.fromkeys(message_ids)), history_id
+    
+    def watch(self, topic_name: str, label_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Start push notifications for mailbox changes to a Cloud Pub/Sub topic.
+        
+        Gmail expires a watch after seven days, so call this again at least weekly.
+        
+        Args:
+            topic_name: Fully qualified topic, e.g. "projects/my-project/topics/gmail"
+            label_ids: Only notify about changes to messages with these labels
+            
+        Returns:
+            Dict with the current "historyId" and the watch "expiration" in epoch milliseconds
+        """
+        if not self.service:
+            self.connect()
+        
+        body: Dict = {"topicName": topic_name}
+        if label_ids:
+            body["labelIds"] = label_ids
+            body["labelFilterBehavior"] = "include"
+        
+        try:
+            return self.executor.execute(self.service.users().watch(userId="me", body=body))
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
+            return {}
+    
+    def stop_watch(self) -> None:
+        """Stop push notifications for this mailbox."""
+        if not self.service:
+            self.connect()
+            
+        try:
+            self.executor.execute(self.service.users().stop(userId="me"))
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
+    
     def get_message_raw(self, message_id: str) -> Dict:
         """Get raw message data."""
         if not self.service:
             self.connect()
             
         try:
-            return self.service.users().messages().get(
+            return self.executor.execute(self.service.users().messages().get(
                 userId="me",
                 id=message_id,
                 format="raw"
-            ).execute()
+            ))
             
         except HttpError as error:
             logger.error(f"An error occurred: {error}")
             return {}
     
+    def read_raw_message(self, message_id: str, max_body_bytes: Optional[int] = None) -> Dict:
+        """
+        Get a message in ``raw`` format and parse it incrementally.
+        
+        Only the text body is decoded and kept, so memory stays bounded by
+        the text part even when the message carries large attachments.
+        
+        Args:
+            message_id: ID of the message
+            max_body_bytes: Keep at most this many bytes of the body
+            
+        Returns:
+            Parsed message with the same fields as ``get_message``, or {} on error
+        """
+        message = self.get_message_raw(message_id)
+        if not message:
+            return {}
+        parsed = read_raw(message.get("raw", ""), max_body_bytes)
+        return {
+            "id": message.get("id", message_id),
+            "thread_id": message.get("threadId", ""),
+            "subject": parsed["subject"],
+            "sender": parsed["sender"],
+            "recipient": parsed["recipient"],
+            "date": parsed["date"],
+            "snippet": message.get("snippet", ""),
+            "body": parsed["body"],
+            "label_ids": message.get("labelIds", [])
+        }
+    
     def get_labels(self) -> List[Dict]:
         """Get all Gmail labels."""
         if not self.service:
             self.connect()
             
         try:
-            results = self.service.users().labels().list(userId="me").execute()
+            results = self.executor.execute(self.service.users().labels().list(userId="me"))
             return results.get("labels", [])
             
         except HttpError as error:
@@ -92,61 +453,110 @@ class GmailClient:
     
     def _get_message_summary(self, message_id: str) -> Dict:
         """Get message summary with basic info."""
-        message = self.get_message(message_id)
-        return {
-            "id": message_id,
-            "subject": message.get("subject", ""),
-            "sender": message.get("sender", ""),
-            "date": message.get("date", ""),
-            "snippet": message.get("snippet", "")
-        }
+        try:
+            message = self.executor.execute(self.service.users().messages().get(
+                userId="me",
+                id=message_id,
+                format="metadata",
+                metadataHeaders=SUMMARY_HEADERS
+            ))
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
+            message = {}
+        
+        return self._summarize(message_id, message)
+    
+    def _get_full_messages(self, message_ids: List[str]) -> List[Dict]:
+        """Get parsed full messages, batching requests for those not in the cache."""
+        parsed = self.cache.get_many(message_ids) if self.cache is not None else {}
+        missing = [msg_id for msg_id in message_ids if msg_id not in parsed]
+        if missing:
+            fetched = {msg_id: self._parse_message(message) for msg_id, message in self._batch_get(missing).items()}
+            if self.cache is not None:
+                self.cache.put_many(fetched)
+            if self.index is not None:
+                self.index.add_many(fetched.values())
+            parsed.update(fetched)
+        return [parsed[msg_id] for msg_id in message_ids if msg_id in parsed]
     
-    def _parse_message(self, message: Dict) -> Dict:
-        """Parse message to extract relevant information."""
-        payload = message.get("payload", {})
-        headers = payload.get("headers", [])
+    def _get_message_summaries(self, message_ids: List[str]) -> List[Dict]:
+        """Get summaries for several messages using batched metadata requests."""
+        summaries: Dict[str, Dict] = {}
+        if self.cache is not None:
+            for message_id, message in self.cache.get_many(message_ids).items():
+                summaries[message_id] = {field: message.get(field, "") for field in SUMMARY_FIELDS}
         
-        # Extract header information
-        header_dict = {header["name"]: header["value"] for header in headers}
+        missing = [message_id for message_id in message_ids if message_id not in summaries]
+        if missing:
+            responses = self._batch_get(missing, format="metadata", metadataHeaders=SUMMARY_HEADERS)
+            for message_id, message in responses.items():
+                summaries[message_id] = self._summarize(message_id, message)
         
-        parsed = {
-            "id": message.get("id", ""),
-            "thread_id": message.get("threadId", ""),
-            "subject": header_dict.get("Subject", ""),
-            "sender": header_dict.get("From", ""),
-            "recipient": header_dict.get("To", ""),
-            "date": header_dict.get("Date", ""),
-            "snippet": message.get("snippet", ""),
-            "body": self._get_message_body(payload),
-            "label_ids": message.get("labelIds", [])
-        }
+        return [summaries[message_id] for message_id in message_ids if message_id in summaries]
+    
+    @staticmethod
+    def _summarize(message_id: str, message: Dict) -> Dict:
+        """Build a summary from a metadata-format message without decoding the body."""
+        summary = Message(message).summary()
+        summary["id"] = message_id
+        return summary
+    
+    def _batch_get(self, message_ids: List[str], **params) -> Dict[str, Dict]:
+        """Fetch messages with batch HTTP requests, keyed by message ID; items that fail transiently are retried."""
+        responses: Dict[str, Dict] = {}
+        # Building a resource object costs milliseconds in googleapiclient; build it once per call
+        messages = self.service.users().messages()
+        
+        def make_request(message_id):
+            return messages.get(userId="me", id=message_id, **params)
         
-        return parsed
-    
-    def _get_message_body(self, payload: Dict) -> str:
-        """Extract message body from payload."""
-        body = ""
-        
-        if "parts" in payload:
-            for part in payload["parts"]:
-                if part["mimeType"] == "text/plain":
-                    data = part["body"].get("data", "")
-                    if data:
-                        body = self._decode_base64(data)
-                        break
-                elif part["mimeType"] == "text/html" and not body:
-                    data = part["body"].get("data", "")
-                    if data:
-                        body = self._decode_base64(data)
-        else:
-            # Single part message
-            if payload["body"].get("data"):
-                body = self._decode_base64(payload["body"]["data"])
-        
-        return body
+        unique_ids = list(dict.fromkeys(message_ids))
+        for start in range(0, len(unique_ids), BATCH_SIZE):
+            fetched, errors = self.executor.execute_batch(
+                self.service.new_batch_http_request, make_request, unique_ids[start:start + BATCH_SIZE]
+            )
+            for message_id, error in errors.items():
+                logger.error(f"An error occurred fetching message {message_id}: {error}")
+            responses.update(fetched)
+        
+        return responses
+    
+    def _batch_list(self, names: List[str], queries: Dict[str, str], max_results: int) -> Dict[str, List[str]]:
+        """List message IDs for several named queries with batch requests; a query that fails lists nothing."""
+        if not names:
+            return {}
+        if not self.service:
+            self.connect()
+        messages = self.service.users().messages()
+        
+        # Batch request IDs end up in headers, so use positions rather than arbitrary names
+        def make_request(request_id):
+            return messages.list(userId="me", q=queries[names[int(request_id)]], maxResults=max_results)
+        
+        listed: Dict[str, List[str]] = {name: [] for name in names}
+        request_ids = [str(n) for n in range(len(names))]
+        for start in range(0, len(request_ids), BATCH_SIZE):
+            responses, errors = self.executor.execute_batch(
+                self.service.new_batch_http_request, make_request, request_ids[start:start + BATCH_SIZE]
+            )
+            for request_id, error in errors.items():
+                logger.error(f"An error occurred listing {queries[names[int(request_id)]]!r}: {error}")
+            for request_id, response in responses.items():
+                listed[names[int(request_id)]] = [msg["id"] for msg in response.get("messages", [])]
+        return listed
+    
+    @classmethod
+    def _parse_message(cls, message: Dict) -> Message:
+        """Wrap a message resource; the body and headers are decoded when first read."""
+        return Message(message)
+    
+    @classmethod
+    def _get_message_body(cls, payload: Dict, max_bytes: Optional[int] = None) -> str:
+        """Extract message body from payload, searching nested multiparts and decoding only the text part."""
+        return payload_text(payload, max_bytes)
     
     @staticmethod
     def _decode_base64(data: str) -> str:
         """Decode base64 string."""
-        import base64
-        return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
\ No newline at end of file
+        return to_text(decode_data(data))
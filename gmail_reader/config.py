@@ -19,7 +19,33 @@ SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
 # App settings
 TOKEN_FILE = Path(config.get("app", "token_file", fallback="cert/token.json"))
+# One <account>.json token file per account for CredentialManager
+TOKEN_DIR = Path(config.get("app", "token_dir", fallback="cert/tokens"))
+# Seconds before expiry at which an access token is refreshed
+REFRESH_MARGIN = config.getint("app", "refresh_margin", fallback=300)
+HISTORY_FILE = Path(config.get("app", "history_file", fallback="cert/history.json"))
+CACHE_FILE = Path(config.get("app", "cache_file", fallback="cache/messages.db"))
+CACHE_MAX_ENTRIES = config.getint("app", "cache_max_entries", fallback=10000)
+# SQLite full-text index used by GmailClient for local searches
+INDEX_FILE = Path(config.get("app", "index_file", fallback="cache/index.db"))
 MAX_RESULTS = config.getint("app", "max_results", fallback=3)
+# Gmail returns at most 500 message IDs per list page
+PAGE_SIZE = min(config.getint("app", "page_size", fallback=100), 500)
+# Gmail accepts at most 100 calls in one batch request
+BATCH_SIZE = min(config.getint("app", "batch_size", fallback=100), 100)
+# Optional local copy of the Gmail discovery document; the one bundled with googleapiclient is used otherwise
+DISCOVERY_FILE = Path(config.get("app", "discovery_file")) if config.has_option("app", "discovery_file") else None
+# Requests in flight at once per AsyncGmailClient
+MAX_CONCURRENCY = config.getint("app", "max_concurrency", fallback=10)
+
+# Scheduler settings
+# Seconds between polls of one mailbox
+POLL_INTERVAL = config.getfloat("scheduler", "poll_interval", fallback=30.0)
+# Polls and extractions running at once across all mailboxes
+SCHEDULER_WORKERS = config.getint("scheduler", "workers", fallback=8)
+# Gmail allows 250 quota units per user per second and 1,200,000 per project per minute
+USER_QUOTA_RATE = config.getfloat("scheduler", "user_quota_rate", fallback=250.0)
+PROJECT_QUOTA_RATE = config.getfloat("scheduler", "project_quota_rate", fallback=20000.0)
 
 # Logging configuration
 LOG_LEVEL = config.get("logging", "level", fallback="INFO")
@@ -0,0 +1,296 @@
+# gmail_reader/credentials.py
+
+"""OAuth credentials for one or many accounts, shared across threads and refreshed ahead of expiry."""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from .config import REFRESH_MARGIN, SCOPES, TOKEN_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still serialized, processes are not
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_NAME = re.compile(r"^[\w@+-][\w.@+-]*$")
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``<path>.lock``, shared by every process using ``path``."""
+    lock_path = path.with_name(path.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def write_token(path: Path, creds: Credentials) -> None:
+    """Write credentials atomically, so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w") as handle:
+            handle.write(creds.to_json())
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def seconds_left(creds: Credentials) -> float:
+    """Seconds until the access token expires; infinite without an expiry, negative once expired."""
+    if not creds.token:
+        return float("-inf")
+    if creds.expiry is None:
+        return float("inf")
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds()
+
+
+class TokenStore:
+    """Directory of authorized-user token files, one ``<account>.json`` per account."""
+
+    def __init__(self, directory: Path = TOKEN_DIR, scopes: List[str] = SCOPES):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding the token files
+            scopes: OAuth scopes the tokens were granted
+        """
+        self.directory = Path(directory)
+        self.scopes = scopes
+
+    def path(self, account: str) -> Path:
+        """Token file of an account; use it as ``GmailAuthenticator(token_file=...)`` for the first login."""
+        if not ACCOUNT_NAME.match(account):
+            raise ValueError(f"Invalid account name: {account!r}")
+        return self.directory / f"{account}.json"
+
+    def accounts(self) -> List[str]:
+        """Accounts with a stored token."""
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.json"))
+
+    def load(self, account: str) -> Optional[Credentials]:
+        """Return the stored credentials of an account, or None."""
+        path = self.path(account)
+        if not path.exists():
+            return None
+        return Credentials.from_authorized_user_info(json.loads(path.read_text()), self.scopes)
+
+    def save(self, account: str, creds: Credentials) -> None:
+        """Store the credentials of an account."""
+        write_token(self.path(account), creds)
+
+    def lock(self, account: str):
+        """Inter-process lock serializing refreshes of one account."""
+        return file_lock(self.path(account))
+
+
+class CredentialManager:
+    """
+    Hands out credentials for many accounts and keeps them fresh.
+
+    Each account's ``Credentials`` object is loaded once and shared by every
+    caller, so a refresh updates the token every client already holds.
+    Tokens are refreshed ``refresh_margin`` seconds before they expire: by
+    the background thread started with ``start()``, or otherwise by the
+    first caller to notice. Only one thread per account refreshes, under a
+    lock; the others keep using the still-valid token, or wait for the
+    refresh if it has already expired. Refreshes also take a file lock and
+    re-read the token file first, so when several processes share a store
+    only the first of them calls Google.
+
+    Usage::
+
+        with CredentialManager(TokenStore()) as manager:
+            client = GmailClient(authenticator=manager.authenticator("work"))
+    """
+
+    def __init__(
+        self,
+        store: Optional[TokenStore] = None,
+        refresh_margin: float = REFRESH_MARGIN,
+        request_factory: Callable[[], Request] = Request
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            store: Token store; defaults to ``TokenStore()`` on ``[app] token_dir``
+            refresh_margin: Seconds before expiry at which tokens are refreshed
+            request_factory: Builds the transport request used for refreshing
+        """
+        self.store = store if store is not None else TokenStore()
+        self.refresh_margin = refresh_margin
+        self.request_factory = request_factory
+        self.refreshes = 0
+        self._credentials: Dict[str, Credentials] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "CredentialManager":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def accounts(self) -> List[str]:
+        """Accounts in the store."""
+        return self.store.accounts()
+
+    def get(self, account: str = "default") -> Credentials:
+        """
+        Return valid credentials for an account.
+
+        Raises:
+            FileNotFoundError: If the store has no token for the account
+            ValueError: If the token has expired and cannot be refreshed
+        """
+        creds = self._credentials.get(account)
+        if creds is not None:
+            left = seconds_left(creds)
+            if left > self.refresh_margin:
+                return creds
+            if left > 0:
+                if self._thread is not None:
+                    # Still valid, and the background thread will refresh it
+                    return creds
+                # Due but still valid: refresh unless another thread already is
+                lock = self._account_lock(account)
+                if lock.acquire(blocking=False):
+                    try:
+                        return self._refresh(account)
+                    except Exception as e:
+                        logger.error(f"Early refresh failed for {account}: {e}")
+                        return creds
+                    finally:
+                        lock.release()
+                return creds
+
+        with self._account_lock(account):
+            return self._refresh(account)
+
+    def authenticator(self, account: str = "default") -> "AccountAuthenticator":
+        """Authenticator for ``GmailClient`` backed by this manager."""
+        return AccountAuthenticator(self, account)
+
+    def refresh_due(self) -> int:
+        """Refresh every loaded account within the refresh margin; returns the number refreshed."""
+        refreshed = 0
+        for account, creds in list(self._credentials.items()):
+            if seconds_left(creds) > self.refresh_margin:
+                continue
+            before = self.refreshes
+            try:
+                with self._account_lock(account):
+                    self._refresh(account)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {account}: {e}")
+                continue
+            refreshed += self.refreshes > before
+        return refreshed
+
+    def start(self, interval: float = 30.0) -> None:
+        """Start refreshing due tokens in a background thread every ``interval`` seconds."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="credential-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self.refresh_due()
+            self._stop.wait(interval)
+
+    def _account_lock(self, account: str) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(account)
+            if lock is None:
+                lock = self._locks[account] = threading.Lock()
+            return lock
+
+    def _refresh(self, account: str) -> Credentials:
+        """Return fresh credentials for an account; the caller holds its lock."""
+        creds = self._credentials.get(account)
+        if creds is not None and seconds_left(creds) > self.refresh_margin:
+            # Another thread refreshed while we waited for the lock
+            return creds
+
+        with self.store.lock(account):
+            stored = self.store.load(account)
+            if stored is None and creds is None:
+                raise FileNotFoundError(f"No token for account {account!r} in {self.store.directory}")
+
+            if stored is not None and seconds_left(stored) > self.refresh_margin:
+                if creds is not None:
+                    logger.debug(f"Using token refreshed by another process for {account}")
+                return self._adopt(account, stored)
+
+            target = creds if creds is not None else stored
+            if not target.refresh_token:
+                raise ValueError(f"Token for account {account!r} has expired and has no refresh token")
+            logger.info(f"Refreshing credentials for {account}")
+            target.refresh(self.request_factory())
+            self.store.save(account, target)
+
+        with self._lock:
+            self.refreshes += 1
+            self._credentials[account] = target
+        return target
+
+    def _adopt(self, account: str, stored: Credentials) -> Credentials:
+        """Take over a token read from the store, updating the object callers already hold."""
+        with self._lock:
+            creds = self._credentials.get(account)
+            if creds is None:
+                creds = self._credentials[account] = stored
+            else:
+                creds.token = stored.token
+                creds.expiry = stored.expiry
+            return creds
+
+
+class AccountAuthenticator:
+    """``GmailAuthenticator`` stand-in that takes one account's credentials from a CredentialManager."""
+
+    def __init__(self, manager: CredentialManager, account: str):
+        self.manager = manager
+        self.account = account
+
+    def authenticate(self) -> Credentials:
+        """Return the account's current credentials."""
+        return self.manager.get(self.account)
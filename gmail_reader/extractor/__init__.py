@@ -1,6 +1,33 @@
 # gmail_reader/extractor/__init__.py
 
-"""Verification code extractor sub-package."""
-from .base import VerificationCodeExtractor
+"""Verification code extractor sub-package; exports are imported on first access."""
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = ["VerificationCodeExtractor"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .base import VerificationCodeExtractor
+    from .cache import ResultCache
+    from .pipeline import ExtractionPipeline
+    from .scoring import ExtractionResult
+
+__all__ = ["VerificationCodeExtractor", "ResultCache", "ExtractionResult", "ExtractionPipeline"]
+
+_LAZY_ATTRIBUTES = {
+    "VerificationCodeExtractor": ".base",
+    "ResultCache": ".cache",
+    "ExtractionPipeline": ".pipeline",
+    "ExtractionResult": ".scoring",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
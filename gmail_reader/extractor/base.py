@@ -3,16 +3,23 @@
 
 """Main verification code extractor implementation."""
 import logging
-from typing import Optional, Dict, List
-from langchain.chat_models.base import BaseChatModel
+from typing import Optional, Dict, List, Tuple
 
+from .cache import ResultCache
 from .config import ExtractorConfig
 from .patterns import RegexPatterns
+from .preprocess import ContentPreprocessor
 from .prompts import PromptManager
+from .scoring import CandidateScorer, ExtractionResult
+from .templates import TemplateLearner
 from .llm_extractor import LLMExtractor
 
 logger = logging.getLogger(__name__)
 
+# Fixed confidences for stages that do not score their own answers
+TEMPLATE_CONFIDENCE = 0.95
+LLM_CONFIDENCE = 0.9
+
 
 class VerificationCodeExtractor:
     """Extracts verification codes from email content using LLM."""
@@ -21,7 +28,11 @@ class VerificationCodeExtractor:
         self,
         llm_config: Optional[Dict] = None,
         prompt_template: Optional[str] = None,
-        fallback_patterns: Optional[List[str]] = None
+        fallback_patterns: Optional[List[str]] = None,
+        result_cache: Optional[ResultCache] = None,
+        template_learner: Optional[TemplateLearner] = None,
+        confidence_threshold: Optional[float] = None,
+        preprocessor: Optional[ContentPreprocessor] = None
     ):
         """
         Initialize the VerificationCodeExtractor.
@@ -30,6 +41,10 @@ class VerificationCodeExtractor:
             llm_config: Configuration for the LLM model
             prompt_template: Custom prompt template (must include {content} placeholder)
             fallback_patterns: Regex patterns to use as fallback
+            result_cache: Cache for LLM results, shared across extractors if desired
+            template_learner: Learns per-sender rules so known templates skip the LLM
+            confidence_threshold: Scorer confidence at or above which the LLM is skipped
+            preprocessor: Trims bodies before they are put into a prompt
         """
         logger.info("Initializing VerificationCodeExtractor")
         
@@ -39,41 +54,165 @@ class VerificationCodeExtractor:
         # Load LLM configuration
         if llm_config is None:
             llm_config = self.config.load_llm_config()
+        if confidence_threshold is None:
+            confidence_threshold = self.config.load_confidence_threshold()
+        self.confidence_threshold = confidence_threshold
         
         # Initialize components
         self.prompt_manager = PromptManager(custom_template=prompt_template)
         self.regex_patterns = RegexPatterns(custom_patterns=fallback_patterns)
-        self.llm_extractor = LLMExtractor(llm_config, self.prompt_manager)
+        self.llm_extractor = LLMExtractor(llm_config, self.prompt_manager, cache=result_cache)
+        self.template_learner = template_learner
+        self.scorer = CandidateScorer()
+        self.preprocessor = preprocessor or ContentPreprocessor()
         
-    def extract_code(self, content: str, use_fallback: bool = True) -> Optional[str]:
+    def extract_code(
+        self,
+        content: str,
+        use_fallback: bool = True,
+        sender: Optional[str] = None
+    ) -> Optional[str]:
         """
         Extract a single verification code from email content.
         
         Args:
             content: Email content to extract code from
             use_fallback: Whether to use regex patterns if LLM fails
+            sender: From header of the email; enables learned per-sender rules
             
         Returns:
             Extracted verification code or None
         """
+        return self.extract_code_with_confidence(content, use_fallback, sender).code
+    
+    def extract_code_with_confidence(
+        self,
+        content: str,
+        use_fallback: bool = True,
+        sender: Optional[str] = None
+    ) -> ExtractionResult:
+        """
+        Extract a single verification code and report how it was found.
+        
+        Stages run from cheapest to most expensive: a learned sender rule,
+        candidate scoring, the LLM (only when the scorer's confidence is
+        below ``confidence_threshold``) and finally the regex fallback.
+        
+        Args:
+            content: Email content to extract code from
+            use_fallback: Whether to use regex patterns if LLM fails
+            sender: From header of the email; enables learned per-sender rules
+            
+        Returns:
+            ExtractionResult of (code, confidence, source); source is one of
+            "template", "scorer", "llm", "regex" or "none"
+        """
         logger.debug("Extracting verification code from content")
         
+        local, scored = self._extract_locally(content, sender)
+        if local is not None:
+            return local
+        
+        llm_code = None
+        if self.llm_extractor.is_available():
+            llm_code = self.llm_extractor.extract_single_code(self._prompt_content(content))
+        return self._finish(content, sender, llm_code, scored, use_fallback)
+    
+    def extract_codes_batch(
+        self,
+        contents: List[str],
+        use_fallback: bool = True,
+        senders: Optional[List[Optional[str]]] = None
+    ) -> List[ExtractionResult]:
+        """
+        Extract one code from each of many emails, batching the LLM calls.
+        
+        Emails resolved by a learned rule or a confident score never reach
+        the model; the rest are sent together through
+        ``LLMExtractor.extract_codes_batch``.
+        
+        Args:
+            contents: Email contents
+            use_fallback: Whether to use regex patterns if LLM fails
+            senders: From header of each email, aligned with ``contents``
+            
+        Returns:
+            One ExtractionResult per input, in input order
+        """
+        senders = senders or [None] * len(contents)
+        results: List[Optional[ExtractionResult]] = []
+        scores: List[Optional[ExtractionResult]] = []
+        for content, sender in zip(contents, senders):
+            local, scored = self._extract_locally(content, sender)
+            results.append(local)
+            scores.append(scored)
+        
+        pending = [index for index, result in enumerate(results) if result is None]
+        llm_codes: List[Optional[str]] = [None] * len(pending)
+        if pending and self.llm_extractor.is_available():
+            logger.debug(f"Sending {len(pending)} of {len(contents)} emails to the LLM")
+            llm_codes = self.llm_extractor.extract_codes_batch(
+                [self._prompt_content(contents[index]) for index in pending]
+            )
+        
+        for index, llm_code in zip(pending, llm_codes):
+            results[index] = self._finish(contents[index], senders[index], llm_code, scores[index], use_fallback)
+        return results
+    
+    def _extract_locally(
+        self,
+        content: str,
+        sender: Optional[str]
+    ) -> Tuple[Optional[ExtractionResult], Optional[ExtractionResult]]:
+        """
+        Run the stages that need no model call.
+        
+        Returns:
+            The final result if one was found, else None, and the scorer's result
+        """
         if not content or not content.strip():
             logger.warning("Empty content provided")
-            return None
+            return ExtractionResult(None, 0.0, "none"), None
         
-        # Try LLM extraction first
-        if self.llm_extractor.is_available():
-            code = self.llm_extractor.extract_single_code(content)
+        # A learned rule for this sender avoids the LLM entirely
+        if sender and self.template_learner is not None:
+            code = self.template_learner.extract(sender, content)
             if code:
-                return code
+                logger.debug("Extracted code with learned sender rule")
+                return ExtractionResult(code, TEMPLATE_CONFIDENCE, "template"), None
+        
+        scored = self.scorer.best(content)
+        if scored.code and scored.confidence >= self.confidence_threshold:
+            logger.debug(f"Scorer confident enough ({scored.confidence:.2f}), skipping LLM")
+            return scored, scored
+        return None, scored
+    
+    def _prompt_content(self, content: str) -> str:
+        """The part of the body sent to the model; the full body if trimming leaves nothing."""
+        return self.preprocessor.process(content) or content
+    
+    def _finish(
+        self,
+        content: str,
+        sender: Optional[str],
+        llm_code: Optional[str],
+        scored: ExtractionResult,
+        use_fallback: bool
+    ) -> ExtractionResult:
+        """Turn the LLM's answer into a result, learning from it or falling back to regex."""
+        if llm_code:
+            if sender and self.template_learner is not None:
+                self.template_learner.learn(sender, content, llm_code)
+            return ExtractionResult(llm_code, LLM_CONFIDENCE, "llm")
         
-        # Use fallback regex patterns
         if use_fallback:
             logger.debug("Using fallback regex patterns")
-            return self.regex_patterns.extract_code(content)
+            code = self.regex_patterns.extract_code(content)
+            if code:
+                confidence = scored.confidence if code == scored.code else 0.0
+                return ExtractionResult(code, confidence, "regex")
         
-        return None
+        return ExtractionResult(None, 0.0, "none")
     
     def extract_multiple_codes(self, content: str) -> List[str]:
         """Extract multiple verification codes from email content."""
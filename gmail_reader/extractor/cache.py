@@ -0,0 +1,190 @@
+# gmail_reader/extractor/cache.py
+
+"""Caching of LLM extraction results."""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Config keys that do not change what the model returns
+_UNKEYED_CONFIG = {"api_key"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(content: str) -> str:
+    """Collapse whitespace so trivially different copies of a body share a key."""
+    return _WHITESPACE.sub(" ", content).strip()
+
+
+class CacheBackend(ABC):
+    """Storage interface for ResultCache; entries are ``(value, expires_at)``."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU storage."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskBackend(CacheBackend):
+    """SQLite storage shared across processes and restarts."""
+
+    def __init__(self, path: Path, max_entries: int = 10000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time())
+            )
+            self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """
+    Cache of LLM extraction results.
+
+    Keys hash the prompt template, the model configuration and the
+    whitespace-normalized content, so a result is reused only when the
+    model would see the same prompt. "No code" answers are cached too;
+    failed calls are not.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 24 * 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Storage backend; defaults to an in-memory LRU
+            ttl: Seconds a result stays valid
+        """
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(template: str, llm_config: Dict, content: str) -> str:
+        """Build the cache key for a prompt template, model config and content."""
+        config = {k: v for k, v in llm_config.items() if k not in _UNKEYED_CONFIG}
+        material = json.dumps(
+            [template, config, normalize_content(content)], sort_keys=True, default=str
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(hit, value)``; value may legitimately be None on a hit."""
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.time():
+                self.hits += 1
+                return True, value
+            self.backend.delete(key)
+        self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a result."""
+        self.backend.set(key, value, time.time() + self.ttl)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.backend)}
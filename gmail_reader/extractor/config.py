@@ -7,6 +7,8 @@ from ..config import config
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CONFIDENCE_THRESHOLD = 0.7
+
 
 class ExtractorConfig:
     """Handles configuration for the verification code extractor."""
@@ -36,4 +38,8 @@ class ExtractorConfig:
                 "base_url": "http://host.docker.internal:11434"
             }
         
-        return llm_config
\ No newline at end of file
+        return llm_config
+    
+    def load_confidence_threshold(self) -> float:
+        """Load the scorer confidence above which the LLM is skipped."""
+        return config.getfloat("extractor", "confidence_threshold", fallback=DEFAULT_CONFIDENCE_THRESHOLD)
@@ -1,75 +1,423 @@
 # gmail_reader/extractor/llm_extractor.py
 
 """LLM-based extraction logic."""
+import json
 import logging
-from typing import Optional, List, Dict
-from langchain.chat_models.base import init_chat_model, BaseChatModel
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional, List, Dict, Tuple
 
+from .cache import ResultCache, normalize_content
 from .prompts import PromptManager
 
+if TYPE_CHECKING:
+    from langchain.chat_models.base import BaseChatModel
+    from ..ratelimit import TokenBucket
+
 logger = logging.getLogger(__name__)
 
+# Batch sizing: prompt tokens per call, emails per call and characters kept per email
+BATCH_TOKEN_BUDGET = 3000
+BATCH_MAX_ITEMS = 20
+BATCH_ITEM_CHARS = 1500
+
+# Seconds an availability probe (or a failed model initialization) is trusted
+PROBE_TTL = 30.0
+PROBE_TIMEOUT = 2.0
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+# Rate limiter set for the current thread, e.g. by ExtractionPipeline workers
+_thread_state = threading.local()
+
+
+@contextmanager
+def thread_rate_limiter(limiter: Optional["TokenBucket"]) -> Iterator[None]:
+    """Throttle model calls made by the current thread with ``limiter``, in place of an extractor's own."""
+    previous = getattr(_thread_state, "rate_limiter", None)
+    _thread_state.rate_limiter = limiter
+    try:
+        yield
+    finally:
+        _thread_state.rate_limiter = previous
+
+
+def init_chat_model(**kwargs) -> "BaseChatModel":
+    """Create a chat model; langchain is imported on first use, as it takes seconds to load."""
+    from langchain.chat_models.base import init_chat_model as langchain_init_chat_model
+    return langchain_init_chat_model(**kwargs)
+
+
+def probe_endpoint(url: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """Return True if an HTTP server answers at ``url``; any HTTP status counts as reachable."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout):
+            return True
+    except urllib.error.HTTPError:
+        return True
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning(f"LLM endpoint {url} is unreachable: {e}")
+        return False
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of chat models, one per distinct ``llm_config``.
+
+    Extractors, pipelines and worker threads with the same configuration
+    share a single client. Each configuration is built at most once even
+    when many threads ask for it at the same time. Endpoint probes are
+    cached here too, so all extractors on one server share the result.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, "BaseChatModel"] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._probes: Dict[str, Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(llm_config: Dict) -> str:
+        return json.dumps(llm_config, sort_keys=True, default=str)
+
+    def get(self, llm_config: Dict) -> "BaseChatModel":
+        """Return the shared model for a configuration, creating it on first use."""
+        key = self.key(llm_config)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = init_chat_model(**llm_config)
+                with self._lock:
+                    self._models[key] = model
+                logger.info("LLM model initialized successfully")
+        return model
+
+    def probe(self, url: str, ttl: float = PROBE_TTL) -> bool:
+        """Whether ``url`` is reachable, re-probing once the cached answer is ``ttl`` seconds old."""
+        with self._lock:
+            cached = self._probes.get(url)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        reachable = probe_endpoint(url)
+        with self._lock:
+            self._probes[url] = (reachable, time.monotonic())
+        return reachable
+
+    def invalidate_probe(self, url: str) -> None:
+        """Forget a probe result so the next availability check asks the endpoint again."""
+        with self._lock:
+            self._probes.pop(url, None)
+
+    def clear(self) -> None:
+        """Drop every cached model and probe."""
+        with self._lock:
+            self._models.clear()
+            self._locks.clear()
+            self._probes.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) used for batch sizing."""
+    return len(text) // 4 + 1
+
+
+class BatchParseError(ValueError):
+    """A batch response could not be mapped back onto its items."""
+
 
 class LLMExtractor:
     """Handles LLM-based verification code extraction."""
     
-    def __init__(self, llm_config: Dict, prompt_manager: PromptManager):
-        """Initialize the LLM extractor."""
-        self.prompt_manager = prompt_manager
-        self.llm: Optional[BaseChatModel] = None
+    def __init__(
+        self,
+        llm_config: Dict,
+        prompt_manager: PromptManager,
+        cache: Optional[ResultCache] = None,
+        probe_ttl: float = PROBE_TTL
+    ):
+        """
+        Initialize the LLM extractor.
         
-        # Initialize LLM
-        try:
-            self.llm = init_chat_model(**llm_config)
-            logger.info("LLM model initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize LLM: {e}")
+        The model is not created here: it is taken from the shared
+        ``model_registry`` on first use, so regex-only runs never build a
+        client and extractors with the same configuration share one.
+        
+        Args:
+            llm_config: Keyword arguments for ``init_chat_model``
+            prompt_manager: Prompt templates
+            cache: Cache for LLM results
+            probe_ttl: Seconds an endpoint probe or a failed initialization is trusted
+        """
+        self.llm_config = llm_config
+        self.prompt_manager = prompt_manager
+        self.cache = cache
+        self.probe_ttl = probe_ttl
+        # Optional TokenBucket shared by everything calling the same provider
+        self.rate_limiter = None
+        self._llm: Optional["BaseChatModel"] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def llm(self) -> Optional["BaseChatModel"]:
+        """The chat model, created on first access; None if it cannot be initialized."""
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None and not self._failed_recently():
+                    try:
+                        self._llm = model_registry.get(self.llm_config)
+                        self._failed_at = None
+                    except Exception as e:
+                        logger.error(f"Failed to initialize LLM: {e}")
+                        self._failed_at = time.monotonic()
+        return self._llm
+    
+    @llm.setter
+    def llm(self, model: Optional["BaseChatModel"]) -> None:
+        self._llm = model
     
     def is_available(self) -> bool:
-        """Check if LLM is available."""
-        return self.llm is not None
+        """
+        Check if the LLM can be used.
+        
+        The model must initialize and, when the configuration names a
+        ``base_url``, the endpoint must answer; the probe is cached for
+        ``probe_ttl`` seconds.
+        """
+        if self.llm is None:
+            return False
+        base_url = self.llm_config.get("base_url")
+        return model_registry.probe(base_url, self.probe_ttl) if base_url else True
+    
+    def _failed_recently(self) -> bool:
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.probe_ttl
+    
+    def _invoke(self, prompt: str):
+        """Call the model, waiting for the thread's or the extractor's rate limiter first if one is set."""
+        rate_limiter = getattr(_thread_state, "rate_limiter", None) or self.rate_limiter
+        if rate_limiter is not None:
+            waited = rate_limiter.acquire()
+            if waited:
+                logger.debug(f"Rate limited for {waited:.2f}s")
+        try:
+            return self.llm.invoke(prompt)
+        except Exception:
+            # The endpoint may have gone away; re-probe on the next availability check
+            if self.llm_config.get("base_url"):
+                model_registry.invalidate_probe(self.llm_config["base_url"])
+            raise
     
     def extract_single_code(self, content: str) -> Optional[str]:
         """Extract a single verification code using LLM."""
         if not self.llm:
             return None
         
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.prompt_manager.verification_template, self.llm_config, content)
+            hit, cached = self.cache.get(key)
+            if hit:
+                logger.debug("LLM result cache hit")
+                return cached
+        
+        code = None
         try:
             prompt = self.prompt_manager.get_single_code_prompt(content)
-            response = self.llm.invoke(prompt)
+            response = self._invoke(prompt)
             
             # Extract response content
             result = str(response.content) if hasattr(response, 'content') else str(response)
             result = result.strip()
             
-            # Clean and validate the result
-            if result and result != "NONE":
-                result = result.strip('"\'')
-                if len(result) <= 20 and (result.isalnum() or '-' in result or '_' in result):
-                    logger.info(f"Successfully extracted code with LLM: {result}")
-                    return result
+            code = self._clean_code(result)
+            if code:
+                logger.info(f"Successfully extracted code with LLM: {code}")
             
         except Exception as e:
             logger.error(f"LLM extraction failed: {e}")
+            return None
         
-        return None
+        if key is not None:
+            self.cache.set(key, code)
+        return code
     
     def extract_multiple_codes(self, content: str) -> List[str]:
         """Extract multiple verification codes using LLM."""
         if not self.llm:
             return []
         
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.prompt_manager.DEFAULT_PROMPTS["multi_code"], self.llm_config, content)
+            hit, cached = self.cache.get(key)
+            if hit:
+                logger.debug("LLM result cache hit")
+                return cached
+        
+        codes: List[str] = []
         try:
             prompt = self.prompt_manager.get_multi_code_prompt(content)
-            response = self.llm.invoke(prompt)
+            response = self._invoke(prompt)
             result = str(response.content) if hasattr(response, 'content') else str(response)
             
             if result and result != "NONE":
                 codes = [code.strip() for code in result.split(',') if code.strip()]
                 logger.info(f"Extracted {len(codes)} codes with LLM")
-                return codes
                 
         except Exception as e:
             logger.error(f"LLM multi-extraction failed: {e}")
+            return []
+        
+        if key is not None:
+            self.cache.set(key, codes)
+        return codes
+    
+    def extract_codes_batch(
+        self,
+        contents: List[str],
+        token_budget: int = BATCH_TOKEN_BUDGET,
+        max_items: int = BATCH_MAX_ITEMS,
+        item_chars: int = BATCH_ITEM_CHARS
+    ) -> List[Optional[str]]:
+        """
+        Extract one code from each of several emails with as few LLM calls as possible.
+        
+        Bodies are trimmed and packed into numbered prompts of at most
+        ``token_budget`` estimated tokens and ``max_items`` emails. A batch
+        whose JSON answer cannot be parsed or mapped back onto its emails
+        is split in half and retried; a single email falls back to
+        ``extract_single_code``.
+        
+        Args:
+            contents: Email contents
+            token_budget: Maximum estimated prompt tokens per call
+            max_items: Maximum emails per call
+            item_chars: Characters of each email included in the prompt
+            
+        Returns:
+            One code (or None) per input, in input order
+        """
+        results: List[Optional[str]] = [None] * len(contents)
+        if not self.llm:
+            return results
         
-        return []
\ No newline at end of file
+        template = self.prompt_manager.DEFAULT_PROMPTS["batch_code"]
+        items = [normalize_content(content or "")[:item_chars] for content in contents]
+        keys: Dict[int, str] = {}
+        pending: List[int] = []
+        for index, item in enumerate(items):
+            if not item:
+                continue
+            if self.cache is not None:
+                keys[index] = self.cache.make_key(template, self.llm_config, item)
+                hit, cached = self.cache.get(keys[index])
+                if hit:
+                    results[index] = cached
+                    continue
+            pending.append(index)
+        
+        for batch in self._pack_batches(pending, items, token_budget, max_items):
+            for index, code in self._run_batch(batch, items).items():
+                results[index] = code
+                if index in keys:
+                    self.cache.set(keys[index], code)
+        
+        logger.info(f"Batch extracted {sum(code is not None for code in results)} of {len(contents)} codes")
+        return results
+    
+    def _pack_batches(
+        self,
+        indexes: List[int],
+        items: List[str],
+        token_budget: int,
+        max_items: int
+    ) -> List[List[int]]:
+        """Group item indexes greedily so each prompt stays within the budget."""
+        overhead = estimate_tokens(self.prompt_manager.get_batch_prompt([]))
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        tokens = overhead
+        for index in indexes:
+            # Item header and the item's entry in the JSON answer
+            cost = estimate_tokens(items[index]) + 12
+            if batch and (tokens + cost > token_budget or len(batch) >= max_items):
+                batches.append(batch)
+                batch, tokens = [], overhead
+            batch.append(index)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def _run_batch(self, batch: List[int], items: List[str]) -> Dict[int, Optional[str]]:
+        """
+        Extract codes for one batch, splitting it on failure.
+        
+        Items whose extraction failed outright are left out of the result
+        so they are not cached as "no code".
+        """
+        if len(batch) == 1:
+            index = batch[0]
+            try:
+                prompt = self.prompt_manager.get_single_code_prompt(items[index])
+                response = self._invoke(prompt)
+            except Exception as e:
+                logger.error(f"LLM extraction failed: {e}")
+                return {}
+            result = str(response.content) if hasattr(response, 'content') else str(response)
+            return {index: self._clean_code(result.strip())}
+        
+        try:
+            response = self._invoke(self.prompt_manager.get_batch_prompt([items[i] for i in batch]))
+            result = str(response.content) if hasattr(response, 'content') else str(response)
+            return self._parse_batch_response(result, batch, items)
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} failed ({e}), splitting")
+        
+        middle = len(batch) // 2
+        results = self._run_batch(batch[:middle], items)
+        results.update(self._run_batch(batch[middle:], items))
+        return results
+    
+    def _parse_batch_response(self, result: str, batch: List[int], items: List[str]) -> Dict[int, Optional[str]]:
+        """Map a JSON batch answer onto item indexes, rejecting answers that do not line up."""
+        match = _JSON_OBJECT.search(result)
+        if not match:
+            raise BatchParseError("no JSON object in response")
+        answer = json.loads(match.group(0))
+        if not isinstance(answer, dict):
+            raise BatchParseError("response is not a JSON object")
+        
+        codes: Dict[int, Optional[str]] = {}
+        for number, index in enumerate(batch, 1):
+            if str(number) not in answer:
+                raise BatchParseError(f"no answer for email {number}")
+            value = answer[str(number)]
+            code = self._clean_code(str(value).strip()) if value is not None else None
+            # A code absent from its own email means the answers were shifted between items
+            if code and code not in items[index]:
+                raise BatchParseError(f"code for email {number} does not occur in it")
+            codes[index] = code
+        return codes
+    
+    @staticmethod
+    def _clean_code(result: str) -> Optional[str]:
+        """Validate a raw model answer, returning the code or None."""
+        if not result or result == "NONE":
+            return None
+        result = result.strip('"\'')
+        if len(result) <= 20 and (result.isalnum() or '-' in result or '_' in result):
+            return result
+        return None
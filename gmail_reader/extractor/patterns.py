@@ -2,7 +2,7 @@
 """Regex patterns for verification code extraction."""
 import re
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional, Pattern
 
 logger = logging.getLogger(__name__)
 
@@ -18,22 +18,38 @@ class RegexPatterns:
         r'\b(\d{4,8})\b',  # 4-8 digits
     ]
     
-    def __init__(self, custom_patterns: Optional[List[str]] = None):
-        """Initialize with default or custom patterns."""
+    # Common words that patterns may capture but are never codes
+    EXCLUDE_WORDS = frozenset({'is', 'here', 'the', 'your', 'code', 'pin', 'otp', 'to', 'of', 'in', 'for'})
+    
+    def __init__(self, custom_patterns: Optional[List[str]] = None, combined: bool = False):
+        """
+        Initialize with default or custom patterns.
+        
+        Args:
+            custom_patterns: Patterns in priority order; the first group (or whole match) is the code
+            combined: Scan the text once with a single alternation of all patterns instead of
+                once per pattern. Matches of different patterns cannot overlap in this mode.
+        """
         self.patterns = custom_patterns or self.DEFAULT_PATTERNS
+        self.compiled: List[Pattern] = [re.compile(pattern, re.IGNORECASE) for pattern in self.patterns]
+        self.combined = combined
+        self._combined_regex: Optional[Pattern] = None
+        self._code_groups: Dict[int, tuple] = {}
+        if combined:
+            self._build_combined()
     
     def extract_code(self, content: str) -> Optional[str]:
         """Extract a single code using regex patterns."""
-        # Common words to exclude
-        exclude_words = {'is', 'here', 'the', 'your', 'code', 'pin', 'otp', 'to', 'of', 'in', 'for'}
+        if self._combined_regex is not None:
+            return self._extract_code_combined(content)
         
-        for pattern in self.patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in self.compiled:
+            match = pattern.search(content)
             if match:
-                code = match.group(1) if match.groups() else match.group(0)
+                code = match.group(1) if match.re.groups else match.group(0)
                 # Skip common words and check length
-                if code.lower() not in exclude_words and len(code) >= 4:
-                    logger.debug(f"Regex pattern '{pattern}' found code: {code}")
+                if self._is_code(code):
+                    logger.debug(f"Regex pattern '{pattern.pattern}' found code: {code}")
                     return code
         
         logger.debug("No verification code found with regex patterns")
@@ -42,21 +58,79 @@ class RegexPatterns:
     def extract_multiple_codes(self, content: str) -> List[str]:
         """Extract multiple codes using regex patterns."""
         codes = []
-        exclude_words = {'is', 'here', 'the', 'your', 'code', 'pin', 'otp', 'to', 'of', 'in', 'for'}
         
-        for pattern in self.patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                code = match if isinstance(match, str) else match[0]
-                if code.lower() not in exclude_words and len(code) >= 4:
+        for pattern in self.compiled:
+            for match in pattern.finditer(content):
+                code = match.group(1) if pattern.groups else match.group(0)
+                if self._is_code(code):
                     codes.append(code)
         
         # Remove duplicates while preserving order
-        seen = set()
-        unique_codes = []
-        for code in codes:
-            if code not in seen:
-                seen.add(code)
-                unique_codes.append(code)
-        
-        return unique_codes
\ No newline at end of file
+        return list(dict.fromkeys(codes))
+    
+    def _first_code(self, pattern: Pattern, content: str) -> Optional[str]:
+        """The first match of a single pattern, if it is a plausible code."""
+        match = pattern.search(content)
+        if not match:
+            return None
+        code = match.group(1) if pattern.groups else match.group(0)
+        return code if self._is_code(code) else None
+    
+    def _is_code(self, code: Optional[str]) -> bool:
+        return bool(code) and len(code) >= 4 and code.lower() not in self.EXCLUDE_WORDS
+    
+    def _build_combined(self) -> None:
+        """Compile all patterns into one alternation, remembering each one's groups."""
+        # Numbered backreferences would point at the wrong group once patterns are joined
+        if any(re.search(r'\\[1-9]', pattern) for pattern in self.patterns):
+            logger.debug("Patterns use backreferences, combined scan disabled")
+            return
+        
+        alternatives = []
+        group = 1
+        for priority, compiled in enumerate(self.compiled):
+            alternatives.append(f"({compiled.pattern})")
+            # Outer wrapper group, and the group holding the code within it
+            self._code_groups[group] = (priority, group + 1 if compiled.groups else group)
+            group += compiled.groups + 1
+        try:
+            self._combined_regex = re.compile("|".join(alternatives), re.IGNORECASE)
+        except re.error as e:
+            logger.debug(f"Cannot combine patterns, combined scan disabled: {e}")
+            self._code_groups = {}
+    
+    def _extract_code_combined(self, content: str) -> Optional[str]:
+        """
+        Scan once and return the highest-priority candidate.
+        
+        As with per-pattern search, only the first match of each pattern is
+        considered. Once a candidate is found, higher-priority patterns not
+        yet seen are searched for individually and the scan stops.
+        """
+        first_seen: Dict[int, Optional[str]] = {}
+        best: Optional[int] = None
+        
+        for match in self._combined_regex.finditer(content):
+            priority, code_group = self._code_groups[match.lastindex]
+            if priority in first_seen:
+                continue
+            code = match.group(code_group)
+            first_seen[priority] = code if self._is_code(code) else None
+            if first_seen[priority] is not None and (best is None or priority < best):
+                best = priority
+            if best is not None:
+                # Settle the few higher-priority patterns directly rather than
+                # stepping through every low-priority match that follows
+                for higher in range(best):
+                    if higher not in first_seen:
+                        code = self._first_code(self.compiled[higher], content)
+                        if code is not None:
+                            first_seen[higher], best = code, higher
+                            break
+                break
+        
+        if best is None:
+            logger.debug("No verification code found with regex patterns")
+            return None
+        logger.debug(f"Regex pattern '{self.patterns[best]}' found code: {first_seen[best]}")
+        return first_seen[best]
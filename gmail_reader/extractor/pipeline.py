@@ -0,0 +1,235 @@
+# gmail_reader/extractor/pipeline.py
+
+"""Concurrent extraction with bounded input, in-flight limits and rate limiting."""
+import logging
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..ratelimit import TokenBucket
+from .llm_extractor import thread_rate_limiter
+from .scoring import ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+# How often blocked queue operations check whether the pipeline was closed, in seconds
+_POLL_INTERVAL = 0.05
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """
+    Return the process-wide bucket for an LLM provider, creating it on first use.
+
+    Every pipeline and extractor talking to the same provider shares one
+    bucket, so their combined request rate stays under the provider's limit.
+    When callers ask for different rates, the lowest applies to all of them.
+
+    Args:
+        provider: Provider key, e.g. the model provider and its endpoint
+        rate: Requests per second
+        capacity: Maximum burst; defaults to ``max(1, rate)``
+    """
+    with _rate_limiters_lock:
+        bucket = _rate_limiters.get(provider)
+        if bucket is None:
+            bucket = _rate_limiters[provider] = TokenBucket(rate, capacity)
+        elif rate < bucket.rate:
+            logger.info(f"Lowering the rate limit for {provider} from {bucket.rate:g}/s to {rate:g}/s")
+            bucket.set_rate(rate, capacity)
+        return bucket
+
+
+class ExtractionPipeline:
+    """
+    Runs code extraction for many emails on a pool of worker threads.
+
+    At most ``max_in_flight`` extractions run at once, matching the number
+    of requests the model server handles in parallel (e.g. Ollama's
+    ``OLLAMA_NUM_PARALLEL``). Input waits in a queue of ``queue_size``
+    emails; when it is full, ``submit`` blocks, which stalls whatever is
+    producing emails (typically ``GmailClient.iter_messages``) instead of
+    buffering the mailbox in memory. Results are yielded as they complete,
+    not in submission order. They wait in a queue of the same size, so when
+    calling ``submit`` directly, read ``results`` as you go (``map`` does).
+
+    Usage::
+
+        with ExtractionPipeline(extractor, max_in_flight=4) as pipeline:
+            for message_id, result in pipeline.map(messages):
+                ...
+    """
+
+    def __init__(
+        self,
+        extractor,
+        max_in_flight: int = 4,
+        queue_size: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None
+    ):
+        """
+        Initialize the pipeline and start its workers.
+
+        Args:
+            extractor: VerificationCodeExtractor (anything with ``extract_code_with_confidence``)
+            max_in_flight: Number of worker threads, and so of concurrent extractions
+            queue_size: Emails buffered ahead of the workers; defaults to ``2 * max_in_flight``
+            rate_limit: LLM requests per second allowed for the extractor's provider and endpoint,
+                applied to model calls made by this pipeline's workers
+            burst: Requests allowed back to back before ``rate_limit`` applies
+        """
+        self.extractor = extractor
+        self.max_in_flight = max_in_flight
+        self._input: "queue.Queue" = queue.Queue(maxsize=queue_size or 2 * max_in_flight)
+        self._output: "queue.Queue" = queue.Queue(maxsize=queue_size or 2 * max_in_flight)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+
+        # Applied by the workers only, so the extractor, which may be shared, is left as it was
+        self._rate_limiter: Optional[TokenBucket] = None
+        if rate_limit is not None:
+            llm_config = extractor.llm_extractor.llm_config
+            provider = llm_config.get("model_provider", "default")
+            endpoint = llm_config.get("base_url") or llm_config.get("model")
+            key = f"{provider}:{endpoint}" if endpoint else provider
+            self._rate_limiter = get_rate_limiter(key, rate_limit, burst)
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"extraction-{n}", daemon=True)
+            for n in range(max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self) -> "ExtractionPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, key: Any, content: str, sender: Optional[str] = None) -> None:
+        """Queue one email, blocking while the input queue is full."""
+        if self._closed:
+            raise RuntimeError("Pipeline is closed")
+        with self._pending_lock:
+            self._pending += 1
+        while True:
+            try:
+                self._input.put((key, content, sender), timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if self._closed:
+                    with self._pending_lock:
+                        self._pending -= 1
+                    raise RuntimeError("Pipeline is closed")
+
+    def results(self) -> Iterator[Tuple[Any, ExtractionResult]]:
+        """Yield ``(key, result)`` for submitted emails in completion order until none are pending."""
+        while True:
+            with self._pending_lock:
+                if self._pending == 0:
+                    return
+            key, result = self._output.get()
+            with self._pending_lock:
+                self._pending -= 1
+            yield key, result
+
+    def map(self, messages: Iterable[Dict]) -> Iterator[Tuple[Any, ExtractionResult]]:
+        """
+        Extract codes from parsed messages, yielding ``(message id, result)`` as they finish.
+
+        Messages are pulled from ``messages`` on a feeder thread only as fast
+        as the workers free up queue slots. If iterating ``messages`` raises,
+        e.g. RetriesExhaustedError from ``iter_messages``, the results of the
+        messages already read are yielded and then the error is raised here.
+        """
+        failure: List[BaseException] = []
+
+        def feed():
+            try:
+                for message in messages:
+                    # The consumer left map() and closed the pipeline; stop reading the source
+                    if self._closed:
+                        return
+                    content = message.get("body") or message.get("snippet", "")
+                    self.submit(message.get("id"), content, message.get("sender"))
+            except BaseException as e:
+                if not self._closed:
+                    failure.append(e)
+            finally:
+                self._put_until_closed(self._output, _DONE)
+
+        threading.Thread(target=feed, name="extraction-feeder", daemon=True).start()
+        fed = False
+        while True:
+            with self._pending_lock:
+                if fed and self._pending == 0:
+                    if failure:
+                        raise failure[0]
+                    return
+            item = self._output.get()
+            if item is _DONE:
+                fed = True
+                continue
+            with self._pending_lock:
+                self._pending -= 1
+            yield item
+
+    def close(self) -> None:
+        """Stop the workers once queued emails are processed; results not read by then are dropped."""
+        if self._closed:
+            return
+        self._closed = True
+        # Unread results would keep workers blocked on the full output queue, and so the input
+        # queue full, if map() was left early; keep draining them until every worker has stopped
+        for _ in self._workers:
+            while True:
+                try:
+                    self._input.put(_DONE, timeout=_POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    self._drain_output()
+        for worker in self._workers:
+            while worker.is_alive():
+                self._drain_output()
+                worker.join(_POLL_INTERVAL)
+
+    def _put_until_closed(self, target: "queue.Queue", item: Any) -> None:
+        """Put an item, giving up if the pipeline is closed while the queue is full."""
+        while True:
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if self._closed:
+                    return
+
+    def _drain_output(self) -> None:
+        try:
+            while True:
+                self._output.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _work(self) -> None:
+        with thread_rate_limiter(self._rate_limiter):
+            self._process()
+
+    def _process(self) -> None:
+        while True:
+            item = self._input.get()
+            if item is _DONE:
+                return
+            key, content, sender = item
+            try:
+                result = self.extractor.extract_code_with_confidence(content, sender=sender)
+            except Exception as e:
+                logger.error(f"Extraction failed for {key}: {e}")
+                result = ExtractionResult(None, 0.0, "none")
+            self._output.put((key, result))
@@ -0,0 +1,121 @@
+# gmail_reader/extractor/preprocess.py
+
+"""Trimming email bodies down to the part worth sending to the LLM."""
+import html
+import logging
+import re
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words that label a code; "123456 is your code" style labels follow the code
+KEYWORDS = re.compile(
+    r"\b(?:verification|verify|confirmation|confirm|security|sign-?in|log-?in|one-time|"
+    r"passcode|password|codes?|otp|pin|2fa|token)\b",
+    re.IGNORECASE
+)
+
+HIDDEN_BLOCKS = re.compile(r"<(style|script|head|title)\b.*?</\1>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+BLOCK_TAGS = re.compile(r"</?(?:p|div|br|tr|td|li|table|h[1-6])\b[^>]*>", re.IGNORECASE)
+TAGS = re.compile(r"<[^>]+>")
+SPACES = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+# Start of the quoted message in a reply; everything from here on is dropped.
+# Forwarded messages are kept, since the code is usually in the forwarded part.
+QUOTE_HEADER = re.compile(r"^(?:On .{0,200}wrote:|-{2,}\s*Original Message\s*-{2,})$", re.IGNORECASE | re.MULTILINE)
+SIGNATURE = re.compile(r"^--\s*$", re.MULTILINE)
+BOILERPLATE = re.compile(
+    r"unsubscribe|privacy policy|terms of (?:service|use)|all rights reserved|©|copyright|"
+    r"view (?:this email )?in (?:your )?browser|this (?:e-?mail|message) was sent to|"
+    r"manage (?:your )?(?:email )?preferences|do not reply to this|you are receiving this",
+    re.IGNORECASE
+)
+
+
+def html_to_text(content: str) -> str:
+    """Render HTML as plain text: drop styles, scripts and comments, break lines at block tags."""
+    if "<" not in content:
+        return content
+    text = TAGS.sub(" ", BLOCK_TAGS.sub("\n", HIDDEN_BLOCKS.sub(" ", content)))
+    return html.unescape(text)
+
+
+class ContentPreprocessor:
+    """
+    Cuts an email body down to what the model needs to find a code.
+
+    HTML is converted to text; quoted replies, signatures and boilerplate
+    lines (unsubscribe links, legal footers) are removed. What remains is
+    reduced to windows of ``window_chars`` around code keywords ("code",
+    "OTP", "passcode", ...) and finally capped to about ``max_tokens``.
+    Mail without any keyword keeps its beginning.
+    """
+
+    def __init__(self, window_chars: int = 200, max_tokens: int = 400):
+        """
+        Initialize the preprocessor.
+
+        Args:
+            window_chars: Characters kept on each side of a keyword
+            max_tokens: Approximate token cap of the result (four characters per token)
+        """
+        self.window_chars = window_chars
+        self.max_tokens = max_tokens
+
+    def process(self, content: str) -> str:
+        """Return the trimmed text of an email body."""
+        if not content:
+            return ""
+        text = self.clean(content)
+        text = self._keyword_windows(text)
+        limit = self.max_tokens * 4
+        if len(text) > limit:
+            text = text[:limit]
+        return text
+
+    def clean(self, content: str) -> str:
+        """Plain text of the body without quoted replies, signature or boilerplate lines."""
+        text = html_to_text(content)
+
+        quote = QUOTE_HEADER.search(text)
+        if quote and quote.start() > 0:
+            text = text[:quote.start()]
+        signature = SIGNATURE.search(text)
+        if signature:
+            text = text[:signature.start()]
+
+        lines = []
+        for line in text.splitlines():
+            line = SPACES.sub(" ", line).strip()
+            if not line or line.startswith(">") or BOILERPLATE.search(line):
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _keyword_windows(self, text: str) -> str:
+        """Keep merged windows around keywords, or the whole text if it has none."""
+        spans: List[Tuple[int, int]] = []
+        for match in KEYWORDS.finditer(text):
+            start = max(0, match.start() - self.window_chars)
+            end = min(len(text), match.end() + self.window_chars)
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        if not spans:
+            return text
+        # Widen each window to whole words
+        spans = [(self._word_start(text, start), self._word_end(text, end)) for start, end in spans]
+        return "\n...\n".join(text[start:end].strip() for start, end in spans)
+
+    @staticmethod
+    def _word_start(text: str, index: int) -> int:
+        while index > 0 and not text[index - 1].isspace():
+            index -= 1
+        return index
+    
+    @staticmethod
+    def _word_end(text: str, index: int) -> int:
+        while index < len(text) and not text[index].isspace():
+            index += 1
+        return index
@@ -1,7 +1,7 @@
 # gmail_reader/extractor/prompts.py
 
 """Prompt templates for LLM-based extraction."""
-from typing import Optional
+from typing import List, Optional
 
 
 class PromptManager:
@@ -23,6 +23,14 @@ If no codes found, return "NONE".
 
 Email content:
 {content}
+""",
+        "batch_code": """
+Extract the verification code from each numbered email below.
+A code might be labeled as: verification code, OTP, PIN, confirmation code, security code, or similar.
+Return ONLY a JSON object mapping every email number to its code, or to null if that email has no code.
+Example: {{"1": "123456", "2": null}}
+
+{items}
 """}
     
     def __init__(self, custom_template: Optional[str] = None):
@@ -35,4 +43,9 @@ Email content:
     
     def get_multi_code_prompt(self, content: str) -> str:
         """Get prompt for multiple code extraction."""
-        return self.DEFAULT_PROMPTS["multi_code"].format(content=content)
\ No newline at end of file
+        return self.DEFAULT_PROMPTS["multi_code"].format(content=content)
+    
+    def get_batch_prompt(self, items: List[str]) -> str:
+        """Get prompt for extracting one code from each of several numbered emails."""
+        numbered = "\n".join(f"### Email {number}\n{item}\n" for number, item in enumerate(items, 1))
+        return self.DEFAULT_PROMPTS["batch_code"].format(items=numbered)
@@ -0,0 +1,127 @@
+# gmail_reader/extractor/scoring.py
+
+"""Cheap candidate scoring used to decide when the LLM is needed."""
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from .preprocess import KEYWORDS, html_to_text
+
+logger = logging.getLogger(__name__)
+
+# Standalone alphanumeric tokens; codes glued to URLs, emails, amounts or dates are skipped
+TOKEN = re.compile(r"(?<![\w#$€£@/=.:-])([A-Za-z0-9]{4,10})(?![\w@/%]|[.,:-]\w)")
+EMPHASIS = re.compile(
+    r"<(b|strong|h[1-6]|span|td|div|p)\b([^>]*)>\s*([A-Za-z0-9]{4,10})\s*</\1>",
+    re.IGNORECASE
+)
+EMPHASIS_STYLE = re.compile(r"font-size|font-weight|letter-spacing", re.IGNORECASE)
+SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+YEAR = re.compile(r"(?:19|20)\d\d")
+
+NEAR_CHARS = 20
+FAR_CHARS = 60
+AFTER_CHARS = 30
+
+
+class Candidate(NamedTuple):
+    """A possible code and how strongly the surrounding text supports it."""
+    code: str
+    score: float
+
+
+class ExtractionResult(NamedTuple):
+    """Outcome of an extraction: the code, a 0-1 confidence and the stage that produced it."""
+    code: Optional[str]
+    confidence: float
+    source: str
+
+
+class CandidateScorer:
+    """
+    Scores every code-shaped token in an email without calling a model.
+
+    Each token gets points for its shape (six digits scores highest), for
+    a code keyword shortly before or after it, and for HTML emphasis, and
+    loses points for looking like a year. The confidence of the best
+    candidate is reduced when another candidate scores nearly as well, so
+    ambiguous mail is left to the LLM.
+    """
+
+    def score(self, content: str) -> List[Candidate]:
+        """Return candidates ordered from most to least likely."""
+        emphasized = self._emphasized_tokens(content)
+        text = html_to_text(content)
+
+        scores: Dict[str, float] = {}
+        previous_end = 0
+        for match in TOKEN.finditer(text):
+            code = match.group(1)
+            score = self._shape_score(code)
+            if score <= 0:
+                continue
+            score += self._keyword_score(text, match.start(), match.end(), previous_end)
+            previous_end = match.end()
+            if code in emphasized:
+                score += 0.2
+            if YEAR.fullmatch(code):
+                score -= 0.3
+            score = max(0.0, min(1.0, score))
+            if score > scores.get(code, 0.0):
+                scores[code] = score
+
+        return sorted((Candidate(code, score) for code, score in scores.items()),
+                      key=lambda candidate: candidate.score, reverse=True)
+
+    def best(self, content: str) -> ExtractionResult:
+        """Return the most likely code with a confidence that accounts for rivals."""
+        candidates = self.score(content)
+        if not candidates:
+            return ExtractionResult(None, 0.0, "scorer")
+
+        best = candidates[0]
+        confidence = best.score
+        if len(candidates) > 1:
+            margin = best.score - candidates[1].score
+            confidence *= min(1.0, 0.5 + margin / 0.5)
+        logger.debug(f"Best candidate {best.code} scored {best.score:.2f} (confidence {confidence:.2f})")
+        return ExtractionResult(best.code, round(confidence, 3), "scorer")
+
+    @staticmethod
+    def _emphasized_tokens(content: str) -> Set[str]:
+        """Tokens that stand alone in bold/heading tags or in elements styled to stand out."""
+        emphasized = set()
+        for tag, attributes, token in EMPHASIS.findall(content):
+            if tag.lower() in ("b", "strong") or tag.lower().startswith("h") or EMPHASIS_STYLE.search(attributes):
+                emphasized.add(token)
+        return emphasized
+
+    @staticmethod
+    def _shape_score(code: str) -> float:
+        """How much a token looks like a code on its own."""
+        has_digit = any(c.isdigit() for c in code)
+        if code.isdigit():
+            return 0.35 if len(code) == 6 else 0.25 if len(code) <= 8 else 0.0
+        if not has_digit or len(code) > 8:
+            return 0.0
+        if not code.isupper():
+            return 0.1
+        return 0.3 if len(code) == 6 else 0.25
+
+    @staticmethod
+    def _keyword_score(text: str, start: int, end: int, previous_end: int) -> float:
+        """
+        Points for a code keyword in the same sentence as the token.
+
+        A keyword right before the token counts fully only if no other
+        candidate sits between them, so a label is credited to the first
+        code after it.
+        """
+        before = list(KEYWORDS.finditer(text, max(0, start - FAR_CHARS), start))
+        if before and not SENTENCE_END.search(text, before[-1].end(), start):
+            keyword_end = before[-1].end()
+            return 0.5 if start - keyword_end <= NEAR_CHARS and previous_end <= keyword_end else 0.3
+        after = KEYWORDS.search(text, end, end + AFTER_CHARS)
+        if after and not SENTENCE_END.search(text, end, after.start()):
+            return 0.4
+        return 0.0
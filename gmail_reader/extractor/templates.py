@@ -0,0 +1,239 @@
+# gmail_reader/extractor/templates.py
+
+"""Per-sender extraction rules learned from successful LLM extractions."""
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+RULES_VERSION = 1
+
+
+def sender_key(sender: str) -> str:
+    """Reduce a From header such as 'Service <NoReply@x.com>' to 'noreply@x.com'."""
+    return (parseaddr(sender)[1] or sender).strip().lower()
+
+
+class SenderRule:
+    """An anchored regex that extracts one sender's code."""
+
+    def __init__(self, pattern: str, samples: int, revision: int = 1, created: Optional[float] = None):
+        self.pattern = pattern
+        self.samples = samples
+        self.revision = revision
+        self.created = created if created is not None else time.time()
+        self.regex: Pattern = re.compile(pattern)
+
+    def extract(self, content: str) -> Optional[str]:
+        """Apply the rule; None means the rule does not fit this content."""
+        match = self.regex.search(content)
+        return match.group(1) if match else None
+
+    def to_dict(self) -> Dict:
+        return {"pattern": self.pattern, "samples": self.samples,
+                "revision": self.revision, "created": self.created}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SenderRule":
+        return cls(data["pattern"], data["samples"], data.get("revision", 1), data.get("created"))
+
+
+class TemplateLearner:
+    """
+    Learns extraction rules for senders whose mail follows a fixed template.
+
+    After ``min_samples`` successful extractions from the same sender, the
+    text immediately before the code is compared across samples; the shared
+    part becomes an anchor and the codes' shape becomes the capture group.
+    A rule is kept only if it reproduces every sample. Rules are persisted
+    as JSON; sample bodies are kept in memory only.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        min_samples: int = 2,
+        max_samples: int = 5,
+        context_chars: int = 40,
+        min_anchor_chars: int = 4
+    ):
+        """
+        Initialize the learner.
+
+        Args:
+            path: JSON file to persist rules in, or None to keep them in memory
+            min_samples: Successful extractions needed before a rule is derived
+            max_samples: Recent samples kept per sender for (re)learning
+            context_chars: Characters before the code considered for the anchor
+            min_anchor_chars: Minimum non-space characters an anchor must contain
+        """
+        self.path = Path(path) if path is not None else None
+        self.min_samples = min_samples
+        self.context_chars = context_chars
+        self.min_anchor_chars = min_anchor_chars
+        self.rules: Dict[str, SenderRule] = {}
+        self._samples: Dict[str, Deque[Tuple[str, str]]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._lock = threading.Lock()
+        self.load()
+
+    def extract(self, sender: str, content: str) -> Optional[str]:
+        """Extract a code with the sender's learned rule, if there is one that fits."""
+        rule = self.rules.get(sender_key(sender))
+        if rule is None:
+            return None
+        code = rule.extract(content)
+        if code is None:
+            logger.debug(f"Learned rule for {sender_key(sender)} did not match")
+        return code
+
+    def learn(self, sender: str, content: str, code: str) -> bool:
+        """
+        Record a successful extraction and (re)derive the sender's rule.
+
+        Returns:
+            True if a new or updated rule was stored
+        """
+        key = sender_key(sender)
+        if not key or not code or code not in content:
+            return False
+
+        with self._lock:
+            samples = self._samples[key]
+            samples.append((content, code))
+            existing = self.rules.get(key)
+            if existing is not None and all(existing.extract(c) == k for c, k in samples):
+                return False
+            if len(samples) < self.min_samples:
+                return False
+
+            pattern = self._derive_pattern(list(samples))
+            if pattern is None:
+                return False
+            revision = existing.revision + 1 if existing else 1
+            self.rules[key] = SenderRule(pattern, len(samples), revision)
+            logger.info(f"Learned extraction rule for {key} (revision {revision})")
+
+        self.save()
+        return True
+
+    def forget(self, sender: str) -> None:
+        """Drop the rule and samples for a sender."""
+        key = sender_key(sender)
+        with self._lock:
+            self.rules.pop(key, None)
+            self._samples.pop(key, None)
+        self.save()
+
+    def load(self) -> None:
+        """Load persisted rules, ignoring files from another rules version."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading template rules: {e}")
+            return
+        if data.get("version") != RULES_VERSION:
+            logger.warning(f"Ignoring template rules with version {data.get('version')}")
+            return
+        self.rules = {key: SenderRule.from_dict(rule) for key, rule in data.get("rules", {}).items()}
+
+    def save(self) -> None:
+        """Persist rules to the JSON file."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {"version": RULES_VERSION,
+                    "rules": {key: rule.to_dict() for key, rule in self.rules.items()}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2))
+
+    def _derive_pattern(self, samples: List[Tuple[str, str]]) -> Optional[str]:
+        """Build an anchored pattern that reproduces every sample, or None."""
+        prefixes, suffixes = [], []
+        for content, code in samples:
+            index = _find_code(content, code)
+            if index < 0:
+                return None
+            prefixes.append(content[max(0, index - self.context_chars):index])
+            suffixes.append(content[index + len(code):index + len(code) + self.context_chars])
+
+        shape = _code_shape([code for _, code in samples])
+        # Leading punctuation is usually the tail of a variable greeting ("Hi Bob,")
+        before = re.sub(r"^[\W_]+", "", _trim_partial_word(_common_suffix(prefixes), prefixes))
+        if len(re.sub(r"\s", "", before)) >= self.min_anchor_chars:
+            pattern = f"{_anchor_pattern(before)}({shape})(?![A-Za-z0-9])"
+        else:
+            # Codes that lead the text ("123456 is your code") are anchored on what follows
+            after = _common_suffix([suffix[::-1] for suffix in suffixes])[::-1]
+            after = re.sub(r"\w+$", "", after) if len(after) < min(len(s) for s in suffixes) else after
+            if len(re.sub(r"\s", "", after)) < self.min_anchor_chars:
+                return None
+            pattern = f"(?<![A-Za-z0-9])({shape}){_anchor_pattern(after)}"
+
+        regex = re.compile(pattern)
+        for content, code in samples:
+            match = regex.search(content)
+            if not match or match.group(1) != code:
+                return None
+        return pattern
+
+
+def _anchor_pattern(anchor: str) -> str:
+    """Escape an anchor, tolerating reflowed whitespace inside it."""
+    return r"\s+".join(re.escape(part) for part in re.split(r"\s+", anchor))
+
+
+def _find_code(content: str, code: str) -> int:
+    """Index of ``code`` in ``content`` where it stands as a whole token, or -1."""
+    for match in re.finditer(re.escape(code), content):
+        start, end = match.span()
+        before = content[start - 1] if start else " "
+        after = content[end] if end < len(content) else " "
+        if not before.isalnum() and not after.isalnum():
+            return start
+    return -1
+
+
+def _common_suffix(values: List[str]) -> str:
+    """Longest string every value ends with."""
+    suffix = values[0]
+    for value in values[1:]:
+        length = 0
+        while length < min(len(suffix), len(value)) and suffix[-1 - length] == value[-1 - length]:
+            length += 1
+        suffix = suffix[len(suffix) - length:]
+    return suffix
+
+
+def _trim_partial_word(anchor: str, prefixes: List[str]) -> str:
+    """Drop a leading word fragment that was cut off by differing text before it."""
+    cut = any(len(p) > len(anchor) and p[-len(anchor) - 1].isalnum() for p in prefixes)
+    if anchor and anchor[0].isalnum() and cut:
+        anchor = re.sub(r"^\w+", "", anchor)
+    return anchor
+
+
+def _code_shape(codes: List[str]) -> str:
+    """Character class and length range covering all sample codes."""
+    chars = set("".join(codes))
+    if all(c.isdigit() for c in chars):
+        char_class = r"\d"
+    else:
+        parts = [r"\d"] if any(c.isdigit() for c in chars) else []
+        if any(c.isupper() for c in chars):
+            parts.append("A-Z")
+        if any(c.islower() for c in chars):
+            parts.append("a-z")
+        parts.extend(re.escape(c) for c in sorted(chars) if not c.isalnum())
+        char_class = f"[{''.join(parts)}]"
+    lengths = sorted(len(code) for code in codes)
+    quantifier = f"{{{lengths[0]}}}" if lengths[0] == lengths[-1] else f"{{{lengths[0]},{lengths[-1]}}}"
+    return char_class + quantifier
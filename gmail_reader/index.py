@@ -0,0 +1,197 @@
+# gmail_reader/index.py
+
+"""Local full-text index of fetched messages, searchable with Gmail query syntax."""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .config import INDEX_FILE
+from .message import delivery_time
+from .query import (
+    And, LABEL_FIELDS, Node, Not, Or, Term, TEXT_FIELDS, UnsupportedQueryError, WORD_RE, check_supported,
+    date_bound, label_condition, parse_query,
+)
+
+logger = logging.getLogger(__name__)
+
+class MessageIndex:
+    """
+    SQLite FTS5 index of parsed messages for answering searches locally.
+
+    Messages are added as they are fetched, by GmailClient when it has an
+    index, or from a MessageCache with ``add_many(cache.iter_messages())``.
+    ``search`` accepts the subset of Gmail query syntax understood by
+    ``gmail_reader.query``: free text, ``from:``, ``to:``, ``subject:``,
+    ``is:``/``in:``/``label:`` for system labels, ``newer_than:``/``older_than:``,
+    ``after:``/``before:``, ``OR``, ``-`` and grouping.
+
+    Matching is word-based like Gmail's: ``from:service.com`` matches
+    ``noreply@service.com``, and ``subject:code`` does not match "codes".
+    Labels reflect the state at the time a message was added, so
+    ``is:unread`` can be stale until the message is added again.
+    """
+
+    def __init__(self, path: Optional[Path] = INDEX_FILE, clock: Callable[[], float] = time.time):
+        """
+        Initialize the index.
+
+        Args:
+            path: SQLite database file, or None for a memory-only index
+            clock: Wall-clock time source for ``newer_than:`` and ``older_than:``
+        """
+        self.path = Path(path) if path is not None else None
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "rowid INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, internal_date INTEGER, "
+            "labels TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_date ON messages (internal_date)")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(sender, recipient, subject, text)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM messages WHERE id = ?", (message_id,)).fetchone() is not None
+
+    def add(self, message: Mapping) -> None:
+        """Index a parsed message, replacing an earlier copy."""
+        self.add_many([message])
+
+    def add_many(self, messages: Iterable[Mapping]) -> int:
+        """Index several parsed messages; returns the number indexed."""
+        count = 0
+        with self._lock:
+            for message in messages:
+                self._upsert(message)
+                count += 1
+            self._db.commit()
+        return count
+
+    def remove(self, message_id: str) -> None:
+        """Drop a message from the index."""
+        with self._lock:
+            row = self._db.execute("SELECT rowid FROM messages WHERE id = ?", (message_id,)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM messages WHERE rowid = ?", row)
+                self._db.execute("DELETE FROM messages_fts WHERE rowid = ?", row)
+                self._db.commit()
+
+    def supports(self, query: str) -> bool:
+        """Whether ``search`` can answer a query."""
+        try:
+            check_supported(parse_query(query))
+        except UnsupportedQueryError:
+            return False
+        return True
+
+    def search(self, query: str, max_results: Optional[int] = None) -> List[Dict]:
+        """
+        Return indexed messages matching a Gmail query, newest first.
+
+        Raises:
+            UnsupportedQueryError: If the query uses syntax the index cannot evaluate
+        """
+        return [json.loads(data) for _, data in self._select(query, max_results, "data")]
+
+    def search_ids(self, query: str, max_results: Optional[int] = None) -> List[str]:
+        """Like ``search``, returning only message IDs."""
+        return [message_id for message_id, _ in self._select(query, max_results, "NULL")]
+
+    def clear(self) -> None:
+        """Remove every indexed message."""
+        with self._lock:
+            self._db.execute("DELETE FROM messages")
+            self._db.execute("DELETE FROM messages_fts")
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    def _select(self, query: str, max_results: Optional[int], column: str) -> List[Tuple]:
+        node = parse_query(query)
+        check_supported(node)
+        where, params = self._compile(node, self.clock())
+        sql = f"SELECT id, {column} FROM messages WHERE {where} ORDER BY internal_date DESC, rowid DESC"
+        if max_results is not None:
+            sql += " LIMIT ?"
+            params.append(max_results)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _upsert(self, message: Mapping) -> None:
+        data = dict(message)
+        row = self._db.execute("SELECT rowid FROM messages WHERE id = ?", (data["id"],)).fetchone()
+        values = (delivery_time(message), _labels(data.get("label_ids", [])), json.dumps(data))
+        if row is None:
+            rowid = self._db.execute(
+                "INSERT INTO messages (id, internal_date, labels, data) VALUES (?, ?, ?, ?)", (data["id"], *values)
+            ).lastrowid
+        else:
+            rowid = row[0]
+            self._db.execute("UPDATE messages SET internal_date = ?, labels = ?, data = ? WHERE rowid = ?",
+                             (*values, rowid))
+            self._db.execute("DELETE FROM messages_fts WHERE rowid = ?", (rowid,))
+        self._db.execute(
+            "INSERT INTO messages_fts (rowid, sender, recipient, subject, text) VALUES (?, ?, ?, ?, ?)",
+            (rowid, data.get("sender", ""), data.get("recipient", ""), data.get("subject", ""),
+             f"{data.get('snippet', '')}\n{data.get('body', '')}")
+        )
+
+    def _compile(self, node: Node, now: float) -> Tuple[str, List]:
+        """Translate a query tree into an SQL condition on ``messages`` and its parameters."""
+        if isinstance(node, Not):
+            where, params = self._compile(node.node, now)
+            return f"NOT ({where})", params
+        if isinstance(node, (And, Or)):
+            if not node.nodes:
+                return ("1" if isinstance(node, And) else "0"), []
+            parts, params = [], []
+            for child in node.nodes:
+                where, child_params = self._compile(child, now)
+                parts.append(f"({where})")
+                params.extend(child_params)
+            return (" AND " if isinstance(node, And) else " OR ").join(parts), params
+        return _compile_term(node, now)
+
+
+def _compile_term(term: Term, now: float) -> Tuple[str, List]:
+    field, value = term.field, term.value
+    if field is None or field in TEXT_FIELDS:
+        if not WORD_RE.search(value):
+            # Gmail ignores punctuation-only terms
+            return "1", []
+        phrase = '"' + value.replace('"', '""') + '"'
+        match = phrase if field is None else f"{TEXT_FIELDS[field]} : {phrase}"
+        return "rowid IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)", [match]
+    if field in LABEL_FIELDS:
+        condition = label_condition(term)
+        if condition is None:
+            return "1", []
+        label, present = condition
+        return f"instr(labels, ?) {'>' if present else '='} 0", [f" {label} "]
+    operator, bound = date_bound(term, now)
+    return f"internal_date {operator} ?", [int(bound * 1000)]
+
+
+def _labels(label_ids: Iterable[str]) -> str:
+    """Labels as a space-delimited string, so one label is found by searching for " LABEL "."""
+    return " " + " ".join(label.upper() for label in label_ids) + " "
@@ -0,0 +1,143 @@
+# gmail_reader/message.py
+
+"""Lazily decoded view of a Gmail API message resource."""
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Optional
+
+from .mime import payload_text
+
+# Keys of the parsed-message dictionaries returned before Message existed, in their order
+MESSAGE_KEYS = ("id", "thread_id", "subject", "sender", "recipient", "date", "snippet", "body", "label_ids")
+SUMMARY_KEYS = ("id", "subject", "sender", "date", "snippet")
+
+_HEADER_KEYS = {"subject": "Subject", "sender": "From", "recipient": "To", "date": "Date"}
+
+
+class Message(Mapping):
+    """
+    A parsed Gmail message that decodes its parts on first access.
+
+    The message keeps a reference to the API resource and nothing else until
+    a field is read: headers are indexed on the first header lookup, the
+    body is base64-decoded on the first ``body`` access, and each result is
+    kept for later reads. Code that only needs the subject or sender never
+    pays for decoding the body.
+
+    Fields are available as attributes (``message.subject``) and through a
+    read-only mapping with the keys of the dictionaries ``GmailClient``
+    returned before, so ``message["body"]``, ``message.get("sender")`` and
+    ``dict(message)`` keep working. Use ``to_dict()`` for a mutable copy.
+    """
+
+    __slots__ = ("_resource", "_headers", "_body", "_label_ids")
+
+    def __init__(self, resource: Dict):
+        """
+        Wrap a message resource.
+
+        Args:
+            resource: Message as returned by ``users.messages.get``, in full or metadata format
+        """
+        self._resource = resource
+        self._headers: Optional[Dict[str, str]] = None
+        self._body: Optional[str] = None
+        self._label_ids: Optional[List[str]] = None
+
+    @property
+    def resource(self) -> Dict:
+        """The wrapped API resource."""
+        return self._resource
+
+    @property
+    def id(self) -> str:
+        return self._resource.get("id", "")
+
+    @property
+    def thread_id(self) -> str:
+        return self._resource.get("threadId", "")
+
+    @property
+    def internal_date(self) -> Optional[int]:
+        """Delivery time in epoch milliseconds, when the resource includes it."""
+        value = self._resource.get("internalDate")
+        return int(value) if value is not None else None
+
+    @property
+    def snippet(self) -> str:
+        return self._resource.get("snippet", "")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Header values by name; when a header repeats, the last value wins."""
+        if self._headers is None:
+            headers = self._resource.get("payload", {}).get("headers", [])
+            self._headers = {header["name"]: header["value"] for header in headers}
+        return self._headers
+
+    @property
+    def subject(self) -> str:
+        return self.headers.get("Subject", "")
+
+    @property
+    def sender(self) -> str:
+        return self.headers.get("From", "")
+
+    @property
+    def recipient(self) -> str:
+        return self.headers.get("To", "")
+
+    @property
+    def date(self) -> str:
+        return self.headers.get("Date", "")
+
+    @property
+    def body(self) -> str:
+        """Text body, decoded from the first text/plain part (or text/html) on first access."""
+        if self._body is None:
+            self._body = payload_text(self._resource.get("payload", {}))
+        return self._body
+
+    @property
+    def label_ids(self) -> List[str]:
+        if self._label_ids is None:
+            self._label_ids = list(self._resource.get("labelIds", []))
+        return self._label_ids
+
+    def __getitem__(self, key: str):
+        if key not in MESSAGE_KEYS:
+            raise KeyError(key)
+        if key in _HEADER_KEYS:
+            return self.headers.get(_HEADER_KEYS[key], "")
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MESSAGE_KEYS)
+
+    def __len__(self) -> int:
+        return len(MESSAGE_KEYS)
+
+    def __contains__(self, key) -> bool:
+        return key in MESSAGE_KEYS
+
+    def __repr__(self) -> str:
+        return f"Message(id={self.id!r}, subject={self.subject!r})"
+
+    def to_dict(self) -> Dict:
+        """Plain-dict copy with every field decoded."""
+        return {key: self[key] for key in MESSAGE_KEYS}
+
+    def summary(self) -> Dict:
+        """Subject, sender, date and snippet, without decoding the body."""
+        return {key: self[key] for key in SUMMARY_KEYS}
+
+
+def delivery_time(message: Mapping) -> Optional[int]:
+    """Delivery time of a parsed message in epoch milliseconds, from the resource if available, else from the Date header."""
+    internal_date = getattr(message, "internal_date", None)
+    if internal_date is not None:
+        return internal_date
+    try:
+        return int(parsedate_to_datetime(message.get("date", "")).timestamp() * 1000)
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,301 @@
+# gmail_reader/mime.py
+
+"""Extracting the text body of a message without decoding the rest of it."""
+import base64
+import binascii
+import logging
+import re
+from email.feedparser import BytesFeedParser
+from email.message import EmailMessage
+from email.policy import default as default_policy
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Preferred body types, best first
+TEXT_TYPES = ("text/plain", "text/html")
+# Characters of a raw message decoded per step; a multiple of 4 so chunks decode independently
+RAW_CHUNK_SIZE = 64 * 1024
+# Longest line kept while skipping a part; longer ones cannot be boundaries worth waiting for
+MAX_SKIPPED_LINE = 8 * 1024
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+
+
+def walk_parts(payload: Dict) -> Iterator[Dict]:
+    """
+    Yield every part of a Gmail API payload in document order, the payload included.
+
+    The walk uses an explicit stack, so deeply nested multiparts cannot
+    exhaust the recursion limit.
+    """
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        yield part
+        stack.extend(reversed(part.get("parts") or []))
+
+
+def is_attachment(part: Dict) -> bool:
+    """Whether a payload part is an attachment rather than part of the message text."""
+    return bool(part.get("filename")) or "attachmentId" in part.get("body", {})
+
+
+def find_text_part(payload: Dict, types: Iterable[str] = TEXT_TYPES) -> Optional[Dict]:
+    """
+    Find the part holding the message text, searching nested multiparts.
+
+    Returns the first inline part of the most preferred type in ``types``
+    that has data, or None. The walk stops at the first part of the most
+    preferred type.
+    """
+    types = list(types)
+    best: Optional[Dict] = None
+    best_rank = len(types)
+    for part in walk_parts(payload):
+        mime_type = part.get("mimeType", "text/plain" if part is payload else "")
+        if mime_type not in types or is_attachment(part) or not part.get("body", {}).get("data"):
+            continue
+        rank = types.index(mime_type)
+        if rank < best_rank:
+            best, best_rank = part, rank
+            if rank == 0:
+                break
+    return best
+
+
+def decode_data(data: str, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Decode base64url body data, or only as much of it as yields ``max_bytes``.
+
+    Gmail omits padding in some responses, so it is restored first.
+    """
+    if max_bytes is not None:
+        data = data[:(max_bytes + 2) // 3 * 4]
+    decoded = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    return decoded if max_bytes is None else decoded[:max_bytes]
+
+
+def part_charset(part: Dict, default: str = "utf-8") -> str:
+    """Charset declared in a payload part's Content-Type header."""
+    for header in part.get("headers", []):
+        if header.get("name", "").lower() == "content-type":
+            match = _CHARSET_RE.search(header.get("value", ""))
+            if match:
+                return match.group(1)
+    return default
+
+
+def to_text(data: bytes, charset: Optional[str] = "utf-8") -> str:
+    """Decode body bytes, dropping anything invalid, including a character cut off by a byte limit."""
+    try:
+        return data.decode(charset or "utf-8", errors="ignore")
+    except LookupError:
+        return data.decode("utf-8", errors="ignore")
+
+
+def payload_text(payload: Dict, max_bytes: Optional[int] = None) -> str:
+    """
+    Text body of a ``format="full"`` message payload.
+
+    Only the selected part is decoded: the first text/plain part, or the
+    first text/html part when there is none.
+
+    Args:
+        payload: The message's ``payload``
+        max_bytes: Decode at most this many bytes of the body
+    """
+    part = find_text_part(payload)
+    if part is None:
+        return ""
+    return to_text(decode_data(part["body"]["data"], max_bytes), part_charset(part))
+
+
+class RawMessageReader:
+    """
+    Incremental parser for the text of an RFC 822 message.
+
+    Bytes are fed in as they arrive. The reader splits them into lines and
+    follows the multipart boundaries. Each part's headers go through the
+    stdlib ``BytesFeedParser``. The body of a text/plain or text/html part
+    is kept, while every other body, such as attachments, is skipped line
+    by line. Memory is therefore bounded by the text parts, not by the
+    message.
+
+    ``done`` becomes True once the first text/plain part is complete, or
+    once ``max_bytes`` of it are kept, so callers can stop feeding.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Initialize the reader.
+
+        Args:
+            max_bytes: Keep at most this many decoded bytes of the body
+        """
+        self.max_bytes = max_bytes
+        self.headers: Optional[EmailMessage] = None
+        self.done = False
+        self._pending = b""
+        self._continued = False
+        self._boundaries: List[bytes] = []
+        self._state = "headers"
+        self._header_parser = BytesFeedParser(policy=default_policy)
+        # The part being read, and the one whose body is being kept
+        self._part: Optional[EmailMessage] = None
+        self._capture: Optional[List[bytes]] = None
+        self._captured = 0
+        self._budget: Optional[int] = None
+        self._html: Optional[str] = None
+        self._plain: Optional[str] = None
+
+    def feed(self, data: bytes) -> None:
+        """Feed the next bytes of the message."""
+        if self.done:
+            return
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line.rstrip(b"\r"))
+            if self.done:
+                return
+        if len(self._pending) > MAX_SKIPPED_LINE and self._capture is None and self._state != "headers":
+            # A long line in a skipped body; it can never be a boundary
+            self._pending = b""
+            self._continued = True
+
+    def close(self) -> str:
+        """Finish reading and return the body text, preferring text/plain to text/html."""
+        if not self.done:
+            if self._pending:
+                self._line(self._pending.rstrip(b"\r"))
+                self._pending = b""
+            if self._state == "headers":
+                self._end_headers()
+            self._end_part()
+        if self.headers is None:
+            self.headers = EmailMessage(policy=default_policy)
+        return self._plain if self._plain is not None else self._html or ""
+
+    def _line(self, line: bytes) -> None:
+        continued, self._continued = self._continued, False
+        if not continued and self._boundaries and line.startswith(b"--"):
+            delimiter = b"--" + self._boundaries[-1]
+            stripped = line.rstrip()
+            if stripped == delimiter:
+                self._end_part()
+                self._state = "headers"
+                return
+            if stripped == delimiter + b"--":
+                self._end_part()
+                self._boundaries.pop()
+                self._state = "epilogue"
+                return
+        if self._state == "headers":
+            if line:
+                self._header_parser.feed(line + b"\n")
+            else:
+                self._end_headers()
+        elif self._state == "body" and self._capture is not None:
+            self._capture.append(line)
+            self._captured += len(line) + 1
+            if self._budget is not None and self._captured >= self._budget:
+                self._end_part()
+                self._state = "skip"
+
+    def _end_headers(self) -> None:
+        self._header_parser.feed(b"\n")
+        part = self._header_parser.close()
+        self._header_parser = BytesFeedParser(policy=default_policy)
+        if self.headers is None:
+            self.headers = part
+        if part.get_content_maintype() == "multipart":
+            boundary = part.get_boundary()
+            if boundary:
+                self._boundaries.append(boundary.encode("ascii", errors="ignore"))
+            self._state = "preamble"
+            return
+        self._part = part
+        self._state = "body"
+        content_type = part.get_content_type()
+        wanted = (content_type == "text/plain" and self._plain is None) or \
+            (content_type == "text/html" and self._plain is None and self._html is None)
+        if wanted and part.get_content_disposition() != "attachment":
+            self._capture = []
+            self._captured = 0
+            self._budget = self._encoded_budget(part)
+
+    def _encoded_budget(self, part: EmailMessage) -> Optional[int]:
+        """Encoded bytes worth keeping to decode ``max_bytes`` of body."""
+        if self.max_bytes is None:
+            return None
+        encoding = str(part.get("Content-Transfer-Encoding", "")).strip().lower()
+        if encoding == "base64":
+            # Four characters per three bytes, plus a line break every 76
+            return (self.max_bytes + 2) // 3 * 4 * 78 // 76 + 4
+        if encoding == "quoted-printable":
+            return self.max_bytes * 3 + 3
+        return self.max_bytes + 1
+
+    def _end_part(self) -> None:
+        part, lines = self._part, self._capture
+        self._part, self._capture = None, None
+        if part is None or lines is None:
+            return
+        text = to_text(self._decode(part, lines), part.get_content_charset())
+        if part.get_content_type() == "text/plain":
+            self._plain = text
+            self.done = True
+        else:
+            self._html = text
+
+    def _decode(self, part: EmailMessage, lines: List[bytes]) -> bytes:
+        encoding = str(part.get("Content-Transfer-Encoding", "")).strip().lower()
+        if encoding == "base64":
+            data = b"".join(line.strip() for line in lines)
+            if self._budget is not None:
+                data = data[:len(data) // 4 * 4]
+            try:
+                body = base64.b64decode(data + b"=" * (-len(data) % 4))
+            except binascii.Error as e:
+                logger.warning(f"Undecodable base64 body: {e}")
+                body = b""
+        elif encoding == "quoted-printable":
+            body = binascii.a2b_qp(b"\n".join(lines))
+        else:
+            body = b"\n".join(lines)
+        return body if self.max_bytes is None else body[:self.max_bytes]
+
+
+def read_raw(raw: str, max_bytes: Optional[int] = None, chunk_size: int = RAW_CHUNK_SIZE) -> Dict:
+    """
+    Parse a ``format="raw"`` message incrementally.
+
+    The base64url ``raw`` string is decoded one chunk at a time and fed to
+    a RawMessageReader. Decoding stops as soon as the text/plain body is
+    complete, so attachments after it are never decoded.
+
+    Args:
+        raw: The message's ``raw`` field
+        max_bytes: Keep at most this many bytes of the body
+        chunk_size: Characters of ``raw`` decoded per step
+
+    Returns:
+        Dictionary with subject, sender, recipient, date and body
+    """
+    chunk_size -= chunk_size % 4
+    reader = RawMessageReader(max_bytes)
+    for start in range(0, len(raw), chunk_size):
+        chunk = raw[start:start + chunk_size]
+        reader.feed(base64.urlsafe_b64decode(chunk + "=" * (-len(chunk) % 4)))
+        if reader.done:
+            break
+    body = reader.close()
+    headers = reader.headers
+    return {
+        "subject": str(headers.get("Subject", "")),
+        "sender": str(headers.get("From", "")),
+        "recipient": str(headers.get("To", "")),
+        "date": str(headers.get("Date", "")),
+        "body": body,
+    }
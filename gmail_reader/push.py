@@ -0,0 +1,211 @@
+# gmail_reader/push.py
+
+"""Push-notification receivers that replace mailbox polling."""
+import base64
+import json
+import logging
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .sync import IncrementalSync
+
+logger = logging.getLogger(__name__)
+
+
+class PushNotification(NamedTuple):
+    """A Gmail mailbox change notification."""
+    email_address: str
+    history_id: str
+
+
+def decode_notification(data: bytes) -> PushNotification:
+    """Decode the JSON payload Gmail publishes to Pub/Sub."""
+    payload = json.loads(data)
+    return PushNotification(payload["emailAddress"], str(payload["historyId"]))
+
+
+def decode_push_envelope(envelope: Dict) -> PushNotification:
+    """Decode a Pub/Sub push request body into a notification."""
+    return decode_notification(base64.b64decode(envelope["message"]["data"]))
+
+
+class PushReceiver:
+    """
+    Turns mailbox change notifications into incremental fetches.
+
+    Nothing is fetched until a notification arrives, so idle mailboxes cost
+    no API calls. Notifications already covered by the sync checkpoint are
+    dropped, which coalesces bursts into a single history read.
+    """
+
+    def __init__(self, sync: IncrementalSync, on_messages: Callable[[List[Dict]], None]):
+        """
+        Initialize the receiver.
+
+        Args:
+            sync: Incremental sync for the watched mailbox
+            on_messages: Called with the new messages fetched for each notification
+        """
+        self.sync = sync
+        self.on_messages = on_messages
+        self._lock = threading.Lock()
+
+    def notify(self, notification: PushNotification) -> List[Dict]:
+        """Handle one notification and return the messages it produced."""
+        with self._lock:
+            checkpoint = self.sync.checkpoint.load()
+            if checkpoint is not None and int(notification.history_id) <= int(checkpoint):
+                logger.debug(f"Skipping notification for history {notification.history_id}, already synced")
+                return []
+
+            messages = self.sync.poll()
+
+        if messages:
+            self.on_messages(messages)
+        return messages
+
+    def start(self) -> None:
+        """Start receiving notifications."""
+
+    def stop(self) -> None:
+        """Stop receiving notifications."""
+
+
+class HttpPushReceiver(PushReceiver):
+    """Receives Pub/Sub push deliveries on a local HTTP endpoint."""
+
+    def __init__(
+        self,
+        sync: IncrementalSync,
+        on_messages: Callable[[List[Dict]], None],
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        path: str = "/gmail/push",
+        verification_token: Optional[str] = None
+    ):
+        """
+        Initialize the receiver.
+
+        Args:
+            sync: Incremental sync for the watched mailbox
+            on_messages: Called with the new messages fetched for each notification
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            path: URL path of the push endpoint
+            verification_token: If set, required as the ``token`` query parameter of the push URL
+        """
+        super().__init__(sync, on_messages)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.verification_token = verification_token
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Endpoint URL to configure on the push subscription."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self) -> None:
+        """Serve the endpoint in a background thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Listening for Gmail push notifications on {self.url}")
+
+    def stop(self) -> None:
+        """Stop the endpoint."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _make_handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                parsed = urllib.parse.urlparse(self.path)
+                if parsed.path != receiver.path:
+                    self._reply(404)
+                    return
+                if receiver.verification_token is not None:
+                    token = urllib.parse.parse_qs(parsed.query).get("token", [None])[0]
+                    if token != receiver.verification_token:
+                        self._reply(403)
+                        return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    notification = decode_push_envelope(json.loads(self.rfile.read(length)))
+                except (KeyError, ValueError) as e:
+                    logger.error(f"Malformed push notification: {e}")
+                    # Acknowledge so Pub/Sub does not redeliver a message we can never parse
+                    self._reply(204)
+                    return
+                try:
+                    receiver.notify(notification)
+                except Exception as e:
+                    logger.error(f"Error handling push notification: {e}")
+                    self._reply(500)
+                    return
+                self._reply(204)
+
+            def _reply(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+class PullSubscriber(PushReceiver):
+    """Receives notifications by pulling from a Pub/Sub subscription."""
+
+    def __init__(
+        self,
+        sync: IncrementalSync,
+        on_messages: Callable[[List[Dict]], None],
+        subscription: str
+    ):
+        """
+        Initialize the subscriber.
+
+        Args:
+            sync: Incremental sync for the watched mailbox
+            on_messages: Called with the new messages fetched for each notification
+            subscription: Fully qualified subscription, e.g. "projects/my-project/subscriptions/gmail"
+        """
+        super().__init__(sync, on_messages)
+        self.subscription = subscription
+        self._future = None
+
+    def start(self) -> None:
+        """Open a streaming pull on the subscription (requires google-cloud-pubsub)."""
+        try:
+            from google.cloud import pubsub_v1
+        except ImportError as e:
+            raise ImportError("PullSubscriber requires the google-cloud-pubsub package") from e
+
+        def callback(message):
+            try:
+                self.notify(decode_notification(message.data))
+                message.ack()
+            except Exception as e:
+                logger.error(f"Error handling pulled notification: {e}")
+                message.nack()
+
+        subscriber = pubsub_v1.SubscriberClient()
+        self._future = subscriber.subscribe(self.subscription, callback=callback)
+        logger.info(f"Pulling Gmail notifications from {self.subscription}")
+
+    def stop(self) -> None:
+        """Cancel the streaming pull."""
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
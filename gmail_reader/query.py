@@ -0,0 +1,468 @@
+# gmail_reader/query.py
+
+"""Parsing, building, evaluating and grouping Gmail search queries."""
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Pattern, Tuple, Union
+
+from .message import delivery_time
+
+# Operators understood locally; anything else needs the Gmail API
+TEXT_FIELDS = {"from": "sender", "to": "recipient", "subject": "subject"}
+LABEL_FIELDS = ("is", "in", "label")
+DATE_FIELDS = ("newer_than", "older_than", "after", "before", "newer", "older")
+
+# System label IDs; user labels have IDs like "Label_12" that differ from their names
+SYSTEM_LABELS = ("INBOX", "SENT", "DRAFT", "SPAM", "TRASH", "UNREAD", "STARRED", "IMPORTANT", "CHAT",
+                 "CATEGORY_PERSONAL", "CATEGORY_SOCIAL", "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES",
+                 "CATEGORY_FORUMS")
+_LABEL_VALUES = {
+    "is": {"unread": "UNREAD", "starred": "STARRED", "important": "IMPORTANT"},
+    "in": {"inbox": "INBOX", "sent": "SENT", "drafts": "DRAFT", "spam": "SPAM", "trash": "TRASH",
+           "starred": "STARRED", "important": "IMPORTANT", "chats": "CHAT"},
+}
+
+# Fields searched by free text, in the order of parsed-message keys
+FREE_TEXT_KEYS = ("subject", "sender", "recipient", "snippet", "body")
+
+# Gmail's newer_than/older_than units
+AGE_UNITS = {"h": 3600, "d": 86400, "m": 30 * 86400, "y": 365 * 86400}
+
+_FIELD_RE = re.compile(r"([A-Za-z_]+):")
+_AGE_RE = re.compile(r"^(\d+)([hdmy])$")
+_DATE_RE = re.compile(r"^(\d{4})[/-](\d{1,2})[/-](\d{1,2})$")
+# Words as the index's unicode61 tokenizer sees them: letters and digits, split on everything else
+WORD_RE = re.compile(r"[^\W_]+")
+_NEEDS_QUOTES_RE = re.compile(r'[\s(){}]|^-|^[A-Za-z_]+:|^(OR|AND)$|^$')
+
+
+class UnsupportedQueryError(ValueError):
+    """Raised for search syntax that can only be evaluated by Gmail."""
+
+
+class Term:
+    """One search term: ``field:value``, or free text when ``field`` is None."""
+
+    __slots__ = ("field", "value")
+
+    def __init__(self, field: Optional[str], value: str):
+        self.field = field.lower() if field else None
+        self.value = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Term) and (self.field, self.value) == (other.field, other.value)
+
+    def __repr__(self) -> str:
+        return f"Term({self.field!r}, {self.value!r})"
+
+
+class Not:
+    """Negation of a node."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node: "Node"):
+        self.node = node
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Not) and self.node == other.node
+
+    def __repr__(self) -> str:
+        return f"Not({self.node!r})"
+
+
+class And:
+    """Nodes that must all match."""
+
+    __slots__ = ("nodes",)
+
+    def __init__(self, nodes: List["Node"]):
+        self.nodes = nodes
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, And) and self.nodes == other.nodes
+
+    def __repr__(self) -> str:
+        return f"And({self.nodes!r})"
+
+
+class Or:
+    """Nodes of which at least one must match."""
+
+    __slots__ = ("nodes",)
+
+    def __init__(self, nodes: List["Node"]):
+        self.nodes = nodes
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Or) and self.nodes == other.nodes
+
+    def __repr__(self) -> str:
+        return f"Or({self.nodes!r})"
+
+
+Node = Union[Term, Not, And, Or]
+
+
+def parse_query(query: str) -> Node:
+    """
+    Parse a Gmail search query into a tree of Term, Not, And and Or nodes.
+
+    Supported syntax: implicit AND between terms (``AND`` is accepted too),
+    ``OR`` between terms, which binds tighter than AND as in Gmail, ``-``
+    negation, ``( )`` grouping, ``{ }`` OR-groups, quoted phrases and
+    field groups such as ``subject:(code OR pin)``. An empty query parses
+    to ``And([])``, which matches everything. Whether an operator can be
+    evaluated locally is checked separately by ``check_supported``.
+
+    Raises:
+        UnsupportedQueryError: If the query is malformed, e.g. has unbalanced parentheses
+    """
+    return _Parser(_tokenize(query)).parse_and(end=None)
+
+
+def check_supported(node: Node) -> None:
+    """
+    Raise UnsupportedQueryError unless every operator in the tree can be evaluated locally.
+
+    Supported: free text, ``from:``, ``to:``, ``subject:``, ``is:``/``in:``/``label:``
+    for system labels, ``newer_than:``/``older_than:`` and ``after:``/``before:``.
+    """
+    if isinstance(node, Term):
+        if node.field is None or node.field in TEXT_FIELDS:
+            return
+        if node.field in LABEL_FIELDS:
+            label_condition(node)
+            return
+        if node.field in DATE_FIELDS:
+            date_bound(node)
+            return
+        raise UnsupportedQueryError(f"Operator {node.field}: is not supported locally")
+    if isinstance(node, Not):
+        check_supported(node.node)
+    else:
+        for child in node.nodes:
+            check_supported(child)
+
+
+def date_bound(term: Term, now: Optional[float] = None) -> tuple:
+    """
+    Translate a date term into ``(">=" or "<", epoch seconds)``.
+
+    ``newer_than:2d`` is relative to ``now``; ``after:2024/01/31`` is
+    midnight UTC of that day, and an integer is taken as epoch seconds.
+    """
+    value = term.value
+    if term.field in ("newer_than", "older_than"):
+        match = _AGE_RE.match(value.lower())
+        if not match:
+            raise UnsupportedQueryError(f"Bad age {value!r} for {term.field}:")
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        bound = now - int(match.group(1)) * AGE_UNITS[match.group(2)]
+        return (">=" if term.field == "newer_than" else "<"), bound
+    if value.isdigit():
+        bound = float(value)
+    else:
+        match = _DATE_RE.match(value)
+        if not match:
+            raise UnsupportedQueryError(f"Bad date {value!r} for {term.field}:")
+        year, month, day = (int(group) for group in match.groups())
+        bound = datetime(year, month, day, tzinfo=timezone.utc).timestamp()
+    return (">=" if term.field in ("after", "newer") else "<"), bound
+
+
+def label_condition(term: Term) -> Optional[Tuple[str, bool]]:
+    """
+    Translate an ``is:``, ``in:`` or ``label:`` term into ``(label ID, whether it must be present)``.
+
+    Returns None for ``in:anywhere``, which matches every message.
+
+    Raises:
+        UnsupportedQueryError: For values that are not system labels, such as
+            user labels, whose IDs cannot be derived from their names
+    """
+    value = term.value.lower()
+    if term.field == "is" and value == "read":
+        return "UNREAD", False
+    if term.field == "in" and value in ("anywhere", "all"):
+        return None
+    if term.field == "label":
+        label = value.upper().replace("-", "_")
+        if label in SYSTEM_LABELS:
+            return label, True
+    elif value in _LABEL_VALUES.get(term.field, {}):
+        return _LABEL_VALUES[term.field][value], True
+    raise UnsupportedQueryError(f"{term.field}:{term.value} is not supported locally")
+
+
+def matches(node: Node, message: Mapping, now: Optional[float] = None) -> bool:
+    """
+    Evaluate a query tree against a parsed message, as ``MessageIndex`` would.
+
+    Text matching is word-based: the words of a term must appear in order
+    in one field, ignoring case and punctuation. Free text is looked up in
+    the subject, sender, recipient, snippet and body.
+
+    Args:
+        node: Parsed query
+        message: Parsed message (a Message or a dict with the same keys)
+        now: Reference time for ``newer_than:``/``older_than:``, in epoch seconds
+
+    Raises:
+        UnsupportedQueryError: For operators ``check_supported`` rejects
+    """
+    if isinstance(node, Term):
+        return _matches_term(node, message, now)
+    if isinstance(node, Not):
+        return not matches(node.node, message, now)
+    if isinstance(node, And):
+        return all(matches(child, message, now) for child in node.nodes)
+    return any(matches(child, message, now) for child in node.nodes)
+
+
+def _matches_term(term: Term, message: Mapping, now: Optional[float]) -> bool:
+    field = term.field
+    if field is None or field in TEXT_FIELDS:
+        pattern = _phrase_pattern(term.value)
+        if pattern is None:
+            # Gmail ignores punctuation-only terms
+            return True
+        keys = FREE_TEXT_KEYS if field is None else (TEXT_FIELDS[field],)
+        return any(pattern.search(message.get(key) or "") for key in keys)
+    if field in LABEL_FIELDS:
+        condition = label_condition(term)
+        if condition is None:
+            return True
+        label, present = condition
+        return (label in message.get("label_ids", ())) == present
+    if field not in DATE_FIELDS:
+        raise UnsupportedQueryError(f"Operator {field}: is not supported locally")
+    operator, bound = date_bound(term, now)
+    timestamp = delivery_time(message)
+    if timestamp is None:
+        return False
+    return timestamp >= bound * 1000 if operator == ">=" else timestamp < bound * 1000
+
+
+@lru_cache(maxsize=256)
+def _phrase_pattern(value: str) -> Optional[Pattern]:
+    """Regex matching the words of ``value`` in order, as whole words; None if it has no words."""
+    words = WORD_RE.findall(value)
+    if not words:
+        return None
+    return re.compile(r"(?<![^\W_])" + r"[\W_]+".join(map(re.escape, words)) + r"(?![^\W_])", re.IGNORECASE)
+
+
+def quote(value: str) -> str:
+    """
+    Quote a search value if Gmail would otherwise split or reinterpret it.
+
+    Values with spaces or brackets, a leading ``-``, something that looks
+    like an operator (``re:hello``), or the words OR and AND are wrapped in
+    double quotes. Gmail has no escape for a double quote, so any in the
+    value are dropped.
+    """
+    value = value.replace('"', "")
+    return f'"{value}"' if _NEEDS_QUOTES_RE.search(value) else value
+
+
+def term(field: Optional[str], value: str) -> str:
+    """A single ``field:value`` term with the value quoted as needed, or free text when ``field`` is None."""
+    return quote(value) if field is None else f"{field}:{quote(value)}"
+
+
+def any_of(*queries: str) -> str:
+    """
+    Queries joined with OR, grouped so each one keeps its meaning.
+
+    ``any_of("from:a", "subject:b is:unread")`` gives ``from:a OR (subject:b is:unread)``.
+    """
+    nodes = [parse_query(query) for query in queries]
+    return to_query(nodes[0] if len(nodes) == 1 else Or(nodes))
+
+
+def all_of(*queries: str) -> str:
+    """
+    Queries that must all match, grouped so each one keeps its meaning.
+
+    ``all_of("from:a OR from:b", "is:unread")`` gives ``(from:a OR from:b) is:unread``.
+    """
+    nodes: List[Node] = []
+    for query in queries:
+        node = parse_query(query)
+        nodes.extend(node.nodes if isinstance(node, And) else [node])
+    return to_query(nodes[0] if len(nodes) == 1 else And(nodes))
+
+
+def exclude(query: str) -> str:
+    """A query matching messages that ``query`` does not match."""
+    return to_query(Not(parse_query(query)))
+
+
+def to_query(node: Node) -> str:
+    """Write a query tree as a Gmail query string that parses back to the same tree."""
+    if isinstance(node, Term):
+        return term(node.field, node.value)
+    if isinstance(node, Not):
+        return "-" + _grouped(node.node)
+    if isinstance(node, Or):
+        if not node.nodes:
+            return "{}"
+        return " OR ".join(_grouped(child) for child in node.nodes)
+    return " ".join(_grouped(child) for child in node.nodes)
+
+
+def _grouped(node: Node) -> str:
+    return to_query(node) if isinstance(node, (Term, Not)) else f"({to_query(node)})"
+
+
+def plan_queries(queries: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Group named queries that mean the same thing, so each is searched only once.
+
+    Queries are compared in parsed form, ignoring spacing, letter case of
+    field names and the order of ANDed or ORed terms: ``subject:(a b)`` and
+    ``subject:b subject:a`` fall in one group. Queries that cannot be
+    parsed are compared as written.
+
+    Returns:
+        Names of the queries in each group, keyed by the group's normalized query
+    """
+    groups: Dict[str, List[str]] = {}
+    for name, query in queries.items():
+        try:
+            key = to_query(_normalized(parse_query(query)))
+        except UnsupportedQueryError:
+            key = query
+        groups.setdefault(key, []).append(name)
+    return groups
+
+
+def _normalized(node: Node) -> Node:
+    """The same query with the children of every And and Or in a fixed order."""
+    if isinstance(node, Not):
+        return Not(_normalized(node.node))
+    if isinstance(node, (And, Or)):
+        children = sorted((_normalized(child) for child in node.nodes), key=to_query)
+        return type(node)(children)
+    return node
+
+
+def _tokenize(query: str) -> List[tuple]:
+    """Split a query into ("(",), (")",), ("{",), ("}",), ("-",), ("OR",) and ("TERM", field, value) tokens."""
+    tokens: List[tuple] = []
+    i, n = 0, len(query)
+    while i < n:
+        char = query[i]
+        if char.isspace():
+            i += 1
+            continue
+        if char in "(){}":
+            tokens.append((char,))
+            i += 1
+            continue
+        if char == "-" and i + 1 < n and not query[i + 1].isspace():
+            tokens.append(("-",))
+            i += 1
+            continue
+
+        field = None
+        match = _FIELD_RE.match(query, i)
+        if match and match.end() < n and not query[match.end()].isspace():
+            field = match.group(1)
+            i = match.end()
+            if query[i] == "(":
+                # subject:(a b) applies the field to every term in the group
+                depth, start = 0, i
+                while i < n:
+                    depth += {"(": 1, ")": -1}.get(query[i], 0)
+                    i += 1
+                    if depth == 0:
+                        break
+                if depth:
+                    raise UnsupportedQueryError(f"Unbalanced parentheses in {query!r}")
+                tokens.append(("(",))
+                for token in _tokenize(query[start + 1:i - 1]):
+                    if token[0] == "TERM" and token[1] is None:
+                        token = ("TERM", field, token[2])
+                    tokens.append(token)
+                tokens.append((")",))
+                continue
+
+        if query[i] == '"':
+            end = query.find('"', i + 1)
+            if end < 0:
+                end = n
+            value = query[i + 1:end]
+            i = end + 1
+        else:
+            start = i
+            while i < n and not query[i].isspace() and query[i] not in "(){}":
+                i += 1
+            value = query[start:i]
+            if field is None and value in ("OR", "AND"):
+                if value == "OR":
+                    tokens.append(("OR",))
+                continue
+        tokens.append(("TERM", field, value))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over tokens; OR binds tighter than the implicit AND."""
+
+    def __init__(self, tokens: List[tuple]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[tuple]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse_and(self, end: Optional[str]) -> Node:
+        nodes: List[Node] = []
+        while True:
+            token = self.peek()
+            if token is None:
+                if end is not None:
+                    raise UnsupportedQueryError(f"Missing {end!r}")
+                break
+            if token[0] == end:
+                self.take()
+                break
+            if token[0] in (")", "}"):
+                raise UnsupportedQueryError(f"Unexpected {token[0]!r}")
+            nodes.append(self.parse_or())
+        return nodes[0] if len(nodes) == 1 else And(nodes)
+
+    def parse_or(self) -> Node:
+        nodes = [self.parse_unary()]
+        while self.peek() == ("OR",):
+            self.take()
+            if self.peek() is None:
+                break
+            nodes.append(self.parse_unary())
+        return nodes[0] if len(nodes) == 1 else Or(nodes)
+
+    def parse_unary(self) -> Node:
+        token = self.take()
+        kind = token[0]
+        if kind == "-":
+            if self.peek() is None:
+                return And([])
+            return Not(self.parse_unary())
+        if kind == "(":
+            return self.parse_and(end=")")
+        if kind == "{":
+            group = self.parse_and(end="}")
+            return Or(group.nodes) if isinstance(group, And) else group
+        if kind == "OR":
+            # A stray OR, e.g. at the start; treat as free text like Gmail does
+            return Term(None, "OR")
+        return Term(token[1], token[2])
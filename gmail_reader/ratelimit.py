@@ -0,0 +1,84 @@
+# gmail_reader/ratelimit.py
+
+"""Token-bucket rate limiting shared by the Gmail request layer and the extractor."""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Holds up to ``capacity`` tokens and refills at ``rate`` tokens per
+    second; ``acquire`` blocks until enough tokens are available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst; defaults to ``max(1, rate)``
+            clock: Monotonic time source
+            sleep: Sleep function
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, waiting as long as needed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay == 0.0:
+                return waited
+            self.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available without waiting; returns 0.0, or else the seconds until they would be."""
+        with self._lock:
+            self._refill()
+            # Tolerate rounding, or a shortfall of 1e-16 would ask for a sleep too short to move the clock
+            if self._tokens >= tokens - 1e-9:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` would be available, without taking them."""
+        with self._lock:
+            self._refill()
+            return max(0.0, tokens - self._tokens) / self.rate
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Change the refill rate and capacity, keeping accrued tokens up to the new capacity."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(1.0, rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def debit(self, tokens: float) -> None:
+        """Take tokens without waiting, possibly going into debt; a negative amount gives tokens back."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - tokens)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
@@ -0,0 +1,364 @@
+# gmail_reader/retry.py
+
+"""Retries, backoff and quota-aware throttling for Gmail API requests."""
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .config import USER_QUOTA_RATE
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Quota units per method, from https://developers.google.com/gmail/api/reference/quota
+QUOTA_UNITS = {
+    "getProfile": 1,
+    "history.list": 2,
+    "labels.get": 1,
+    "labels.list": 1,
+    "messages.attachments.get": 5,
+    "messages.batchModify": 50,
+    "messages.get": 5,
+    "messages.list": 5,
+    "messages.modify": 5,
+    "messages.send": 100,
+    "stop": 50,
+    "threads.get": 10,
+    "threads.list": 10,
+    "watch": 100,
+}
+DEFAULT_UNITS = 5
+# Share of the per-user quota that may be spent in a burst; the rest is the steady refill rate, so
+# a full bucket plus one second of refill never exceeds the quota in any one-second window
+BURST_SHARE = 0.1
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Gmail reports some rate limits as 403 with one of these reasons
+RETRYABLE_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded", "backendError"})
+
+
+class RetriesExhaustedError(Exception):
+    """Raised when a transient Gmail API error persists through every retry."""
+
+    def __init__(self, error: Exception, attempts: int):
+        super().__init__(f"Gave up after {attempts} attempts: {error}")
+        self.error = error
+        self.attempts = attempts
+
+
+def method_name(request) -> str:
+    """Gmail method of a googleapiclient request, e.g. "messages.get"."""
+    method_id = getattr(request, "methodId", None)
+    if not isinstance(method_id, str):
+        return "unknown"
+    return method_id[len("gmail.users."):] if method_id.startswith("gmail.users.") else method_id
+
+
+def quota_units(method: str) -> int:
+    """Quota units Gmail charges for one call of a method."""
+    return QUOTA_UNITS.get(method, DEFAULT_UNITS)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(error: Exception) -> Tuple[bool, Optional[int], Optional[float]]:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Returns:
+        Tuple of (retryable, HTTP status or None for transport errors, Retry-After seconds or None)
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True, None, None
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None)
+    if not isinstance(status, int):
+        return False, None, None
+    if is_retryable_status(status, getattr(error, "content", b"")):
+        return True, status, parse_retry_after(resp.get("retry-after"))
+    return False, status, None
+
+
+def is_retryable_status(status: int, content=b"") -> bool:
+    """Whether an HTTP error status, with its JSON error body, is worth retrying."""
+    return status in RETRYABLE_STATUSES or (status == 403 and _error_reason(content) in RETRYABLE_REASONS)
+
+
+def _error_reason(content) -> Optional[str]:
+    try:
+        details = json.loads(content.decode() if isinstance(content, bytes) else content)
+        return details["error"]["errors"][0]["reason"]
+    except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attempt ``n`` (from 0) waits a random time up to
+    ``min(max_delay, base_delay * 2 ** n)``, and never less than the
+    server's Retry-After.
+    """
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0, seed: Optional[int] = None):
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries: Retries after the first attempt before giving up
+            base_delay: Upper bound of the first backoff in seconds
+            max_delay: Upper bound of any backoff in seconds
+            seed: Seed for the jitter
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random.Random(seed)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number ``attempt + 1``."""
+        delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+
+class ExecutorStats:
+    """Counters kept by a RequestExecutor."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.units = 0
+        self.units_by_method: Counter = Counter()
+        self.errors_by_status: Counter = Counter()
+        self.throttle_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    def as_dict(self) -> Dict:
+        """Plain-dict copy of the counters."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "units": self.units,
+            "units_by_method": dict(self.units_by_method),
+            "errors_by_status": dict(self.errors_by_status),
+            "throttle_seconds": self.throttle_seconds,
+            "backoff_seconds": self.backoff_seconds,
+        }
+
+
+class RequestExecutor:
+    """
+    Executes Gmail API requests with retries and quota-aware throttling.
+
+    Before each request the executor takes the method's quota units from a
+    token bucket, so a busy client slows down before Gmail starts rejecting
+    it. The bucket holds ``BURST_SHARE`` of ``quota_rate`` (Gmail's per-user
+    limit is 250 units per second) and refills at the rest, so no one-second
+    window carries more than ``quota_rate`` units. Rate limits (429, 403 rateLimitExceeded), server errors
+    and connection failures are retried with jittered exponential backoff;
+    a Retry-After header pauses every request through the executor for at
+    least that long. Other errors are raised at once. When retries run out,
+    RetriesExhaustedError is raised so callers never mistake an outage for
+    an empty result.
+
+    One executor belongs to one mailbox, since Gmail's limits are per user.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        quota_rate: Optional[float] = USER_QUOTA_RATE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            policy: Retry policy; defaults to RetryPolicy()
+            quota_rate: Quota units per second to stay under, or None to not throttle
+            clock: Monotonic time source
+            sleep: Sleep function
+        """
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+        self.sleep = sleep
+        self.budget = TokenBucket(
+            quota_rate * (1 - BURST_SHARE), quota_rate * BURST_SHARE, clock=clock, sleep=sleep
+        ) if quota_rate else None
+        self.stats = ExecutorStats()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def execute(self, request, method: Optional[str] = None):
+        """
+        Execute a googleapiclient request (anything with ``execute()``) and return its response.
+
+        Raises:
+            RetriesExhaustedError: If a transient error persisted through every retry
+            HttpError: For errors that retrying cannot fix, such as 400 or 404
+        """
+        method = method or method_name(request)
+        units = quota_units(method)
+        attempt = 0
+        while True:
+            self._throttle(units)
+            self._charge(method, units)
+            try:
+                return request.execute()
+            except Exception as error:
+                delay = self._after_error(error, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            self.sleep(delay)
+
+    def execute_batch(
+        self,
+        new_batch: Callable,
+        make_request: Callable[[str], object],
+        request_ids: Iterable[str]
+    ) -> Tuple[Dict[str, Dict], Dict[str, Exception]]:
+        """
+        Run requests in one batch, re-batching the items that failed transiently.
+
+        Args:
+            new_batch: Creates an empty batch given a ``callback``, e.g. ``service.new_batch_http_request``
+            make_request: Builds the request for an ID
+            request_ids: IDs of the requests
+
+        Returns:
+            Tuple of (responses by ID, permanent errors by ID)
+
+        Raises:
+            RetriesExhaustedError: If some items still failed transiently after every retry
+        """
+        responses: Dict[str, Dict] = {}
+        errors: Dict[str, Exception] = {}
+        pending = list(request_ids)
+        attempt = 0
+        while pending:
+            failed: Dict[str, Exception] = {}
+
+            def on_response(request_id, response, exception):
+                if exception is None:
+                    responses[request_id] = response
+                else:
+                    failed[request_id] = exception
+
+            batch = new_batch(callback=on_response)
+            units = 0
+            for request_id in pending:
+                request = make_request(request_id)
+                method = method_name(request)
+                units += quota_units(method)
+                self._charge(method, quota_units(method))
+                batch.add(request, request_id=request_id)
+            self._throttle(units)
+            try:
+                batch.execute()
+            except Exception as error:
+                # The whole batch was rejected; every item shares its fate
+                failed = {request_id: error for request_id in pending}
+
+            delays = []
+            pending = []
+            for request_id, error in failed.items():
+                delay = self._after_error(error, attempt)
+                if delay is None:
+                    errors[request_id] = error
+                else:
+                    pending.append(request_id)
+                    delays.append(delay)
+            if pending:
+                attempt += 1
+                self.sleep(max(delays))
+        return responses, errors
+
+    def throttle_delay(self, units: int) -> float:
+        """
+        Take a request's quota units if it may be sent now, without waiting.
+
+        For callers that cannot block, such as AsyncGmailClient: sleep for the
+        returned time, then ask again.
+
+        Returns:
+            0.0 if the units were taken, else the seconds to wait first
+        """
+        pause = self._paused_until - self.clock()
+        if pause > 0:
+            return pause
+        if self.budget is None:
+            return 0.0
+        # Requests costing more than a full bucket run into debt instead of waiting forever
+        delay = self.budget.try_acquire(min(units, self.budget.capacity))
+        if delay == 0.0 and units > self.budget.capacity:
+            self.budget.debit(units - self.budget.capacity)
+        return delay
+
+    def _throttle(self, units: int) -> None:
+        """Wait out any Retry-After pause, then take quota units from the budget."""
+        waited = 0.0
+        while True:
+            delay = self.throttle_delay(units)
+            if not delay:
+                break
+            self.sleep(delay)
+            waited += delay
+        self._record_throttle(waited)
+
+    def _record_throttle(self, seconds: float) -> None:
+        if seconds:
+            with self._lock:
+                self.stats.throttle_seconds += seconds
+
+    def _charge(self, method: str, units: int) -> None:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.units += units
+            self.stats.units_by_method[method] += units
+
+    def _after_error(self, error: Exception, attempt: int) -> Optional[float]:
+        """Record a failed attempt; return the backoff before retrying, or None to give up."""
+        retryable, status, retry_after = classify(error)
+        return self._after_failure(error, attempt, retryable, status, retry_after)
+
+    def _after_failure(
+        self, error: Exception, attempt: int, retryable: bool, status: Optional[int], retry_after: Optional[float]
+    ) -> Optional[float]:
+        """Like ``_after_error``, for errors already classified, e.g. httpx errors from AsyncGmailClient."""
+        with self._lock:
+            self.stats.errors_by_status[status or "transport"] += 1
+            if not retryable:
+                self.stats.failures += 1
+                return None
+            if attempt >= self.policy.max_retries:
+                self.stats.failures += 1
+                raise RetriesExhaustedError(error, attempt + 1) from error
+            delay = self.policy.delay(attempt, retry_after)
+            if retry_after:
+                self._paused_until = max(self._paused_until, self.clock() + retry_after)
+            self.stats.retries += 1
+            self.stats.backoff_seconds += delay
+        logger.warning(f"Retrying after {status or 'connection'} error in {delay:.2f}s (attempt {attempt + 1}): {error}")
+        return delay
@@ -0,0 +1,340 @@
+# gmail_reader/scheduler.py
+
+"""Polling many mailboxes from one process within Gmail's quota limits."""
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .client import GmailClient
+from .config import MAX_RESULTS, POLL_INTERVAL, PROJECT_QUOTA_RATE, SCHEDULER_WORKERS, USER_QUOTA_RATE
+from .ratelimit import TokenBucket
+from .retry import RequestExecutor, quota_units
+from .sync import HistoryCheckpoint, IncrementalSync
+
+logger = logging.getLogger(__name__)
+
+POLL_UNITS = quota_units("history.list")
+MESSAGE_UNITS = quota_units("messages.get")
+
+
+class Mailbox:
+    """Scheduling state of one account."""
+
+    def __init__(
+        self, name: str, client: GmailClient, sync: IncrementalSync, interval: float, budget: Optional[TokenBucket]
+    ):
+        self.name = name
+        self.client = client
+        self.sync = sync
+        self.interval = interval
+        self.budget = budget
+        self.due = 0.0
+        self.polls = 0
+
+
+class SchedulerStats:
+    """Counters of a MailboxScheduler, with a bounded sample of how late polls started."""
+
+    def __init__(self, samples: int = 10000):
+        self.polls = 0
+        self.messages = 0
+        self.errors = 0
+        self.throttled = 0
+        self.units = 0
+        self.lateness: Deque[float] = deque(maxlen=samples)
+
+    def lateness_percentile(self, pct: float) -> float:
+        """Seconds a poll started after its due time, at the given percentile of recent polls."""
+        if not self.lateness:
+            return 0.0
+        ordered = sorted(self.lateness)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class MailboxScheduler:
+    """
+    Polls many mailboxes on a shared pool of worker threads.
+
+    Each mailbox is polled every ``interval`` seconds through IncrementalSync,
+    so an idle mailbox costs one ``history.list`` call per poll. Intervals
+    are jittered by up to ``jitter`` of their length and each mailbox's
+    first poll falls at a random point of its first interval, so mailboxes
+    added together do not poll in lockstep.
+
+    Polls are admitted against Gmail quota units. A mailbox is checked
+    against the budget of its client's RequestExecutor, which matches
+    Gmail's per-user limit and is charged by every request the client
+    makes, so requests are throttled once, not twice. A mailbox short of
+    budget is postponed until it recovers. Every mailbox also shares one
+    project-wide budget; when it runs out, dispatching pauses. Messages a
+    poll fetches are charged to it after the fact.
+
+    At most ``workers`` polls run at once, and a mailbox is never polled
+    twice concurrently. Per mailbox the scheduler keeps one small object and
+    one heap entry, so memory grows only with the number of mailboxes, not
+    with their traffic.
+
+    New messages are passed to ``on_messages(account, messages, results)``.
+    If an ``extractor`` is set, the worker that fetched the messages also
+    extracts their codes, and ``results`` holds one ExtractionResult per
+    message; otherwise ``results`` is None.
+
+    Usage::
+
+        with MailboxScheduler(credentials=manager, on_messages=handle) as scheduler:
+            for account in manager.accounts():
+                scheduler.add_account(account, interval=15)
+            ...
+    """
+
+    def __init__(
+        self,
+        workers: int = SCHEDULER_WORKERS,
+        user_quota_rate: float = USER_QUOTA_RATE,
+        project_quota_rate: float = PROJECT_QUOTA_RATE,
+        jitter: float = 0.1,
+        extractor=None,
+        on_messages: Optional[Callable[[str, List[Dict], Optional[List]], None]] = None,
+        credentials=None,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            workers: Polls (including their extractions) running at once
+            user_quota_rate: Quota units per second allowed for each mailbox whose client is built from ``credentials``
+            project_quota_rate: Quota units per second allowed for all mailboxes together
+            jitter: Fraction of the interval by which poll times are randomized
+            extractor: Object with ``extract_code_with_confidence(content, sender=...)``, e.g. VerificationCodeExtractor
+            on_messages: Called with the account name, its new messages and their extraction results
+            credentials: CredentialManager used to build clients for accounts added without one
+            clock: Monotonic time source
+            seed: Seed for the jitter, for reproducible schedules
+        """
+        self.workers = workers
+        self.user_quota_rate = user_quota_rate
+        self.jitter = jitter
+        self.extractor = extractor
+        self.on_messages = on_messages
+        self.credentials = credentials
+        self.clock = clock
+        self.stats = SchedulerStats()
+        self.project_budget = TokenBucket(project_quota_rate, clock=clock)
+        self._random = random.Random(seed)
+        self._mailboxes: Dict[str, Mailbox] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._condition = threading.Condition()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __enter__(self) -> "MailboxScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def __len__(self) -> int:
+        return len(self._mailboxes)
+
+    def add_account(
+        self,
+        name: str,
+        client: Optional[GmailClient] = None,
+        interval: float = POLL_INTERVAL,
+        query: str = "",
+        label_id: Optional[str] = "INBOX",
+        checkpoint: Optional[HistoryCheckpoint] = None,
+        full: Optional[bool] = None,
+        resync_limit: int = MAX_RESULTS
+    ) -> Mailbox:
+        """
+        Start polling a mailbox.
+
+        Args:
+            name: Account name, unique within the scheduler
+            client: Gmail client of the account; built from ``credentials`` if omitted
+            interval: Seconds between polls
+            query: Only report messages matching this search query (see IncrementalSync)
+            label_id: Only report new messages carrying this label
+            checkpoint: Where the account's history ID is kept; in memory by default
+            full: Fetch full messages rather than summaries; defaults to whether an extractor is set
+            resync_limit: Maximum number of messages reported by the first poll and by full resyncs
+        """
+        if client is None:
+            if self.credentials is None:
+                raise ValueError(f"No client given for {name!r} and no credential manager to build one")
+            client = GmailClient(
+                authenticator=self.credentials.authenticator(name),
+                executor=RequestExecutor(quota_rate=self.user_quota_rate)
+            )
+        sync = IncrementalSync(
+            client,
+            checkpoint or HistoryCheckpoint(path=None),
+            query=query,
+            label_id=label_id,
+            full=self.extractor is not None if full is None else full,
+            resync_limit=resync_limit
+        )
+        executor = getattr(client, "executor", None)
+        budget = executor.budget if isinstance(executor, RequestExecutor) else None
+        mailbox = Mailbox(name, client, sync, interval, budget)
+
+        with self._condition:
+            if name in self._mailboxes:
+                raise ValueError(f"Account {name!r} is already scheduled")
+            self._mailboxes[name] = mailbox
+            offset = self._random.uniform(0, interval) if self.jitter else 0.0
+            self._schedule(mailbox, self.clock() + offset)
+            self._condition.notify_all()
+        return mailbox
+
+    def remove_account(self, name: str) -> None:
+        """Stop polling a mailbox; a poll already running completes."""
+        with self._condition:
+            self._mailboxes.pop(name, None)
+
+    def run_pending(self) -> int:
+        """Dispatch every poll that is due and admitted; returns the number dispatched."""
+        with self._condition:
+            return self._dispatch(self.clock())
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no poll is running; returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """Dispatch polls as they fall due, until ``stop()`` or for ``duration`` seconds."""
+        deadline = None if duration is None else self.clock() + duration
+        with self._condition:
+            while not self._stopping:
+                now = self.clock()
+                if deadline is not None and now >= deadline:
+                    break
+                self._dispatch(now)
+                timeout = self._next_wakeup(now)
+                if deadline is not None:
+                    timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+                self._condition.wait(timeout)
+
+    def start(self) -> None:
+        """Run the scheduler in a background thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self.run, name="mailbox-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop dispatching and wait for running polls to finish."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _schedule(self, mailbox: Mailbox, due: float) -> None:
+        mailbox.due = due
+        heapq.heappush(self._heap, (due, next(self._sequence), mailbox.name))
+
+    def _next_interval(self, mailbox: Mailbox) -> float:
+        if not self.jitter:
+            return mailbox.interval
+        return mailbox.interval * (1 + self._random.uniform(-self.jitter, self.jitter))
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        """Seconds until dispatching could make progress, or None to wait for a notification."""
+        if self._in_flight >= self.workers or not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now, self._resume_at - now)
+
+    def _dispatch(self, now: float) -> int:
+        """Submit due polls to the worker pool; the caller holds the condition."""
+        if now < self._resume_at:
+            return 0
+        dispatched = 0
+        while self._heap and self._in_flight < self.workers:
+            due, _, name = self._heap[0]
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            mailbox = self._mailboxes.get(name)
+            if mailbox is None or mailbox.due != due:
+                # Removed, or superseded by a later schedule
+                continue
+
+            # The client's executor takes the units when it sends the request
+            # As in RequestExecutor, a poll costing more than the whole bucket only needs it full
+            wait = mailbox.budget.wait_time(min(POLL_UNITS, mailbox.budget.capacity)) \
+                if mailbox.budget is not None else 0.0
+            if wait:
+                self.stats.throttled += 1
+                self._schedule(mailbox, now + wait)
+                continue
+            wait = self.project_budget.try_acquire(POLL_UNITS)
+            if wait:
+                self.stats.throttled += 1
+                self._schedule(mailbox, due)
+                self._resume_at = now + wait
+                break
+
+            self.stats.lateness.append(now - due)
+            self._in_flight += 1
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mailbox")
+            self._pool.submit(self._poll, mailbox)
+            dispatched += 1
+        return dispatched
+
+    def _poll(self, mailbox: Mailbox) -> None:
+        messages: List[Dict] = []
+        failed = False
+        try:
+            messages = mailbox.sync.poll()
+            if messages:
+                # Admission only covered the history call; charge the fetches to the project now
+                self.project_budget.debit(MESSAGE_UNITS * len(messages))
+                results = self._extract(messages)
+                if self.on_messages is not None:
+                    self.on_messages(mailbox.name, messages, results)
+        except Exception as e:
+            logger.error(f"Polling {mailbox.name} failed: {e}")
+            failed = True
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                mailbox.polls += 1
+                self.stats.polls += 1
+                self.stats.errors += failed
+                self.stats.messages += len(messages)
+                self.stats.units += POLL_UNITS + MESSAGE_UNITS * len(messages)
+                if self._mailboxes.get(mailbox.name) is mailbox:
+                    self._schedule(mailbox, self.clock() + self._next_interval(mailbox))
+                self._condition.notify_all()
+
+    def _extract(self, messages: List[Dict]) -> Optional[List]:
+        if self.extractor is None:
+            return None
+        return [
+            self.extractor.extract_code_with_confidence(
+                message.get("body") or message.get("snippet", ""), sender=message.get("sender")
+            )
+            for message in messages
+        ]
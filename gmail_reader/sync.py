@@ -0,0 +1,136 @@
+# gmail_reader/sync.py
+
+"""Incremental mailbox sync driven by the Gmail History API."""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .client import SUMMARY_FIELDS, GmailClient, HistoryExpiredError
+from .config import HISTORY_FILE, MAX_RESULTS
+from .query import check_supported, matches, parse_query
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCheckpoint:
+    """Stores the last synced mailbox historyId, on disk or in memory."""
+    
+    def __init__(self, path: Optional[Path] = HISTORY_FILE):
+        """
+        Initialize the checkpoint.
+        
+        Args:
+            path: JSON file to persist the history ID in, or None to keep it in memory only
+        """
+        self.path = Path(path) if path is not None else None
+        self._history_id: Optional[str] = None
+    
+    def load(self) -> Optional[str]:
+        """Return the saved history ID, or None if no sync has happened yet."""
+        if self._history_id is None and self.path is not None and self.path.exists():
+            try:
+                self._history_id = json.loads(self.path.read_text()).get("history_id")
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading history checkpoint: {e}")
+        return self._history_id
+    
+    def save(self, history_id: str) -> None:
+        """Persist a new history ID."""
+        self._history_id = history_id
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"history_id": history_id}))
+    
+    def clear(self) -> None:
+        """Forget the checkpoint so the next sync is a full resync."""
+        self._history_id = None
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+class IncrementalSync:
+    """
+    Fetches only messages added since the last sync.
+    
+    The first poll, and any poll whose checkpoint has expired, runs a full
+    search with ``query`` instead. Later polls read ``users.history.list``,
+    so their cost scales with new mail rather than mailbox size. History
+    records cannot be filtered by a search query, so with ``query`` the
+    added messages are fetched in full and checked against it locally;
+    ``label_id`` narrows them before anything is fetched.
+    """
+    
+    def __init__(
+        self,
+        client: GmailClient,
+        checkpoint: Optional[HistoryCheckpoint] = None,
+        query: str = "",
+        label_id: Optional[str] = "INBOX",
+        full: bool = False,
+        resync_limit: int = MAX_RESULTS,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the sync.
+        
+        Args:
+            client: Gmail client to fetch with
+            checkpoint: Where the history ID is kept; defaults to the configured history file
+            query: Only report messages matching this search query
+            label_id: Only report added messages carrying this label
+            full: Return full parsed messages instead of summaries
+            resync_limit: Maximum number of messages returned by a full resync
+            clock: Reference time for ``newer_than:``/``older_than:`` in ``query``
+            
+        Raises:
+            UnsupportedQueryError: If ``query`` uses operators that cannot be checked locally
+        """
+        self.client = client
+        self.checkpoint = checkpoint or HistoryCheckpoint()
+        self.query = query
+        self._node = parse_query(query) if query.strip() else None
+        if self._node is not None:
+            check_supported(self._node)
+        self.clock = clock
+        self.label_id = label_id
+        self.full = full
+        self.resync_limit = resync_limit
+    
+    def poll(self) -> List[Dict]:
+        """Return messages added since the previous poll."""
+        start_history_id = self.checkpoint.load()
+        if start_history_id is None:
+            return self.resync()
+        
+        try:
+            message_ids, history_id = self.client.list_history(start_history_id, label_id=self.label_id)
+        except HistoryExpiredError:
+            logger.warning("History checkpoint expired, running full resync")
+            return self.resync()
+        
+        messages = self._fetch(message_ids) if message_ids else []
+        self.checkpoint.save(history_id)
+        logger.debug(f"Incremental sync found {len(messages)} new messages")
+        return messages
+    
+    def resync(self) -> List[Dict]:
+        """Run a full search and reset the checkpoint to the current mailbox state."""
+        # Read the history ID first so mail arriving during the search is not skipped
+        history_id = self.client.get_history_id()
+        messages = list(self.client.iter_messages(self.query, limit=self.resync_limit, full=self.full))
+        self.checkpoint.save(history_id)
+        logger.info(f"Full resync returned {len(messages)} messages")
+        return messages
+    
+    def _fetch(self, message_ids: List[str]) -> List[Dict]:
+        if self._node is not None:
+            now = self.clock()
+            messages = [m for m in self.client.get_messages(message_ids) if matches(self._node, m, now)]
+            if self.full:
+                return messages
+            return [{field: message.get(field, "") for field in SUMMARY_FIELDS} for message in messages]
+        if self.full:
+            return self.client.get_messages(message_ids)
+        return self.client.get_message_summaries(message_ids)
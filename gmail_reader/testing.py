@@ -0,0 +1,506 @@
+# gmail_reader/testing.py
+
+"""In-memory fake of the Gmail REST API for tests and benchmarks."""
+import base64
+import email.parser
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from .query import And, DATE_FIELDS, Node, Not, Term, UnsupportedQueryError, date_bound, parse_query
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/gmail/v1/users/me/"
+
+
+class FakeResponse(dict):
+    """Minimal httplib2.Response look-alike returned by the fake transport."""
+
+    def __init__(self, status: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = "OK" if status < 300 else "Error"
+        self["status"] = str(status)
+
+
+class FakeGmailBackend:
+    """
+    Stand-in for the Gmail API that serves an in-memory mailbox.
+
+    The backend doubles as an httplib2-compatible transport, so it can be
+    handed to ``googleapiclient`` as ``http`` and receives exactly the HTTP
+    round trips the real API would, including multipart batch requests.
+    Errors such as 429s can be injected with ``fail_next`` or ``error_rate``.
+    """
+
+    def __init__(self):
+        self.messages: Dict[str, Dict] = {}
+        self.labels: List[Dict] = [
+            {"id": "INBOX", "name": "INBOX", "type": "system"},
+            {"id": "UNREAD", "name": "UNREAD", "type": "system"},
+        ]
+        self.history_id = 1000
+        self.history: List[Dict] = []
+        self.min_history_id = 0
+        self.http_requests = 0
+        self.api_calls: List[Tuple[str, str]] = []
+        self._ids = itertools.count(1)
+        self.watch_topic: Optional[str] = None
+        self.on_change = None
+        self.faults: List[Tuple[int, Optional[str]]] = []
+        self.error_rate = 0.0
+        self.error_status = 429
+        self.errors_injected = 0
+        self._random = random.Random(0)
+
+    # ------------------------------------------------------------------
+    # Mailbox setup
+    # ------------------------------------------------------------------
+
+    def add_message(
+        self,
+        subject: str = "",
+        sender: str = "sender@example.com",
+        body: str = "",
+        recipient: str = "me@example.com",
+        label_ids: Optional[List[str]] = None,
+        internal_date: Optional[int] = None,
+        html: Optional[str] = None,
+        message_id: Optional[str] = None,
+    ) -> Dict:
+        """Deliver a message to the fake mailbox and return its API resource."""
+        message_id = message_id or f"{next(self._ids):016x}"
+        self.history_id += 1
+        internal_date = internal_date if internal_date is not None else int(time.time() * 1000)
+        headers = [
+            {"name": "Subject", "value": subject},
+            {"name": "From", "value": sender},
+            {"name": "To", "value": recipient},
+            {"name": "Date", "value": time.strftime(
+                "%a, %d %b %Y %H:%M:%S +0000", time.gmtime(internal_date / 1000))},
+        ]
+        if html is None:
+            payload = {"mimeType": "text/plain", "headers": headers,
+                       "body": {"size": len(body), "data": _encode(body)}}
+        else:
+            payload = {
+                "mimeType": "multipart/alternative",
+                "headers": headers,
+                "body": {"size": 0},
+                "parts": [
+                    {"partId": "0", "mimeType": "text/plain",
+                     "body": {"size": len(body), "data": _encode(body)}},
+                    {"partId": "1", "mimeType": "text/html",
+                     "body": {"size": len(html), "data": _encode(html)}},
+                ],
+            }
+        message = {
+            "id": message_id,
+            "threadId": message_id,
+            "labelIds": list(label_ids if label_ids is not None else ["INBOX", "UNREAD"]),
+            "snippet": body[:100],
+            "historyId": str(self.history_id),
+            "internalDate": str(internal_date),
+            "sizeEstimate": len(body) + len(html or ""),
+            "payload": payload,
+        }
+        self.messages[message_id] = message
+        self.history.append({
+            "id": str(self.history_id),
+            "messagesAdded": [{"message": {
+                "id": message_id, "threadId": message_id, "labelIds": message["labelIds"]}}],
+        })
+        if self.watch_topic and self.on_change:
+            self.on_change("me@example.com", str(self.history_id))
+        return message
+
+    def expire_history(self) -> None:
+        """Make every existing history checkpoint too old to resume from."""
+        self.min_history_id = self.history_id
+
+    def fail_next(self, count: int = 1, status: int = 429, retry_after: Optional[str] = None) -> None:
+        """Fail the next ``count`` API calls (batch items included) with ``status``."""
+        self.faults.extend([(status, retry_after)] * count)
+
+    def _next_fault(self) -> Optional[Tuple[int, Optional[str]]]:
+        """Pop a queued fault, or draw one at ``error_rate``."""
+        if self.faults:
+            fault = self.faults.pop(0)
+        elif self.error_rate and self._random.random() < self.error_rate:
+            fault = (self.error_status, None)
+        else:
+            return None
+        self.errors_injected += 1
+        return fault
+
+    # ------------------------------------------------------------------
+    # httplib2 transport interface
+    # ------------------------------------------------------------------
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=5, connection_type=None):
+        """Serve one HTTP round trip, as ``httplib2.Http.request`` would."""
+        self.http_requests += 1
+        parsed = urllib.parse.urlparse(uri)
+        if parsed.path.startswith("/batch"):
+            return self._handle_batch(body, headers or {})
+        fault = self._next_fault()
+        if fault is not None:
+            status, retry_after = fault
+            response_headers = {"content-type": "application/json"}
+            if retry_after is not None:
+                response_headers["retry-after"] = retry_after
+            return FakeResponse(status, response_headers), json.dumps(_error(status, "Injected error")).encode()
+        status, data = self.handle(method, parsed.path, urllib.parse.parse_qs(parsed.query), body)
+        return FakeResponse(status, {"content-type": "application/json"}), json.dumps(data).encode()
+
+    def build_service(self):
+        """Build a googleapiclient Gmail service that talks to this backend."""
+        from .client import build_from_document, load_discovery_document
+        return build_from_document(load_discovery_document(), http=self)
+
+    # ------------------------------------------------------------------
+    # API routing
+    # ------------------------------------------------------------------
+
+    def handle(self, method: str, path: str, params: Dict[str, List[str]],
+               body=None) -> Tuple[int, Dict]:
+        """Dispatch a single API call and return ``(status, json_body)``."""
+        if not path.startswith(API_PREFIX):
+            return 404, _error(404, f"Unknown path {path}")
+        resource = path[len(API_PREFIX):]
+        self.api_calls.append((method, resource))
+
+        if method == "GET" and resource == "messages":
+            return self._list_messages(params)
+        if method == "GET" and resource.startswith("messages/"):
+            return self._get_message(resource.split("/", 1)[1], params)
+        if method == "GET" and resource == "labels":
+            return 200, {"labels": self.labels}
+        if method == "GET" and resource == "profile":
+            return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id),
+                         "messagesTotal": len(self.messages)}
+        if method == "GET" and resource == "history":
+            return self._list_history(params)
+        if method == "POST" and resource == "watch":
+            self.watch_topic = json.loads(body)["topicName"]
+            expiration = int(time.time() * 1000) + 7 * 24 * 3600 * 1000
+            return 200, {"historyId": str(self.history_id), "expiration": str(expiration)}
+        if method == "POST" and resource == "stop":
+            self.watch_topic = None
+            return 204, {}
+        return 404, _error(404, f"Unknown resource {resource}")
+
+    def _list_messages(self, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        query = _param(params, "q", "")
+        page_size = int(_param(params, "maxResults", "100"))
+        offset = int(_param(params, "pageToken", "0"))
+        try:
+            node = parse_query(query)
+        except UnsupportedQueryError:
+            return 400, _error(400, f"Invalid query {query!r}")
+        matching = [m for m in self._sorted_messages() if _matches(m, node)]
+        page = matching[offset:offset + page_size]
+        result: Dict = {"resultSizeEstimate": len(matching)}
+        if page:
+            result["messages"] = [{"id": m["id"], "threadId": m["threadId"]} for m in page]
+        if offset + page_size < len(matching):
+            result["nextPageToken"] = str(offset + page_size)
+        return 200, result
+
+    def _list_history(self, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        start = int(_param(params, "startHistoryId", "0"))
+        if start < self.min_history_id:
+            return 404, _error(404, "Requested entity was not found.")
+        label_id = _param(params, "labelId", "")
+        page_size = int(_param(params, "maxResults", "100"))
+        offset = int(_param(params, "pageToken", "0"))
+        records = [
+            record for record in self.history
+            if int(record["id"]) > start and (not label_id or any(
+                label_id in added["message"]["labelIds"] for added in record["messagesAdded"]))
+        ]
+        result: Dict = {"historyId": str(self.history_id)}
+        page = records[offset:offset + page_size]
+        if page:
+            result["history"] = page
+        if offset + page_size < len(records):
+            result["nextPageToken"] = str(offset + page_size)
+        return 200, result
+
+    def _get_message(self, message_id: str, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        message = self.messages.get(message_id)
+        if message is None:
+            return 404, _error(404, "Requested entity was not found.")
+        fmt = _param(params, "format", "full")
+        if fmt == "metadata":
+            wanted = set(params.get("metadataHeaders", []))
+            payload = message["payload"]
+            headers = [h for h in payload["headers"] if not wanted or h["name"] in wanted]
+            result = {k: v for k, v in message.items() if k != "payload"}
+            result["payload"] = {"mimeType": payload["mimeType"], "headers": headers}
+            return 200, result
+        if fmt == "raw":
+            result = {k: v for k, v in message.items() if k != "payload"}
+            result["raw"] = _encode_bytes(_to_rfc822(message).as_bytes())
+            return 200, result
+        return 200, message
+
+    def _sorted_messages(self) -> List[Dict]:
+        return sorted(self.messages.values(), key=lambda m: int(m["internalDate"]), reverse=True)
+
+    # ------------------------------------------------------------------
+    # Batch endpoint
+    # ------------------------------------------------------------------
+
+    def _handle_batch(self, body: str, headers: Dict[str, str]):
+        content_type = headers.get("content-type") or headers.get("Content-Type", "")
+        parser = email.parser.Parser()
+        envelope = parser.parsestr(f"content-type: {content_type}\r\n\r\n{body}")
+        boundary = "fake_batch_boundary"
+        chunks = []
+        for part in envelope.get_payload():
+            request_line = part.get_payload().split("\n", 1)[0].strip()
+            method, target, _ = request_line.split(" ", 2)
+            parsed = urllib.parse.urlparse(target)
+            fault = self._next_fault()
+            extra_headers = ""
+            if fault is None:
+                status, data = self.handle(method, parsed.path, urllib.parse.parse_qs(parsed.query))
+            else:
+                status, data = fault[0], _error(fault[0], "Injected error")
+                if fault[1] is not None:
+                    extra_headers = f"Retry-After: {fault[1]}\r\n"
+            content_id = part["Content-ID"]
+            chunks.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:]}\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"{extra_headers}"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(data)}\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        response = FakeResponse(200, {"content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, "".join(chunks).encode()
+
+
+class FakeGmailServer:
+    """
+    Serve a FakeGmailBackend over real HTTP on localhost.
+
+    Use as a context manager; ``base_url`` points at the user's API root.
+    The server keeps connections alive and records how many were opened and
+    the peak number of requests handled concurrently.
+    """
+
+    def __init__(self, backend: FakeGmailBackend, delay: float = 0.0):
+        self.backend = backend
+        self.delay = delay
+        self.connections = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def __enter__(self) -> "FakeGmailServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                self._dispatch()
+
+            def do_POST(self):
+                self._dispatch()
+
+            def _dispatch(self):
+                with fake._lock:
+                    fake._in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake._in_flight)
+                try:
+                    if fake.delay:
+                        time.sleep(fake.delay)
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else None
+                    parsed = urllib.parse.urlparse(self.path)
+                    retry_after = None
+                    with fake._lock:
+                        fake.backend.http_requests += 1
+                        fault = fake.backend._next_fault()
+                        if fault is None:
+                            status, data = fake.backend.handle(
+                                self.command, parsed.path, urllib.parse.parse_qs(parsed.query), body)
+                        else:
+                            status, retry_after = fault
+                            data = _error(status, "Injected error")
+                    content = json.dumps(data).encode()
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                finally:
+                    with fake._lock:
+                        fake._in_flight -= 1
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+class LocalPublisher:
+    """
+    Stand-in for Cloud Pub/Sub push delivery.
+
+    Attached to a FakeGmailBackend, it POSTs a Pub/Sub push envelope to
+    ``endpoint`` whenever a watched mailbox changes, exactly as the real
+    push subscription would.
+    """
+
+    def __init__(self, endpoint: str, subscription: str = "projects/test/subscriptions/gmail"):
+        self.endpoint = endpoint
+        self.subscription = subscription
+        self.published = 0
+
+    def attach(self, backend: FakeGmailBackend) -> None:
+        """Publish notifications for changes to ``backend`` while it is watched."""
+        backend.on_change = self.publish
+
+    def publish(self, email_address: str, history_id: str) -> int:
+        """Deliver one notification and return the receiver's HTTP status."""
+        data = json.dumps({"emailAddress": email_address, "historyId": int(history_id)})
+        self.published += 1
+        envelope = {
+            "message": {
+                "data": base64.b64encode(data.encode()).decode(),
+                "messageId": str(self.published),
+            },
+            "subscription": self.subscription,
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(envelope).encode(),
+            headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+
+def _param(params: Dict[str, List[str]], name: str, default: str) -> str:
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _error(code: int, message: str) -> Dict:
+    return {"error": {"code": code, "message": message}}
+
+
+def _encode(text: str) -> str:
+    return _encode_bytes(text.encode("utf-8"))
+
+
+def _encode_bytes(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def _header(message: Dict, name: str) -> str:
+    for header in message["payload"]["headers"]:
+        if header["name"] == name:
+            return header["value"]
+    return ""
+
+
+def _to_rfc822(message: Dict) -> EmailMessage:
+    msg = EmailMessage()
+    for name in ("Subject", "From", "To", "Date"):
+        msg[name] = _header(message, name)
+    payload = message["payload"]
+    parts = payload.get("parts") or [payload]
+    for part in parts:
+        text = base64.urlsafe_b64decode(part["body"].get("data", "")).decode("utf-8")
+        subtype = part["mimeType"].split("/", 1)[1]
+        if msg.get_content_type() == "text/plain" and not msg.get_payload():
+            msg.set_content(text, subtype=subtype)
+        else:
+            msg.add_alternative(text, subtype=subtype)
+    return msg
+
+
+def _matches(message: Dict, node: Node) -> bool:
+    """Evaluate a parsed query, with a small subset of Gmail's operators, against a message."""
+    if isinstance(node, Term):
+        return _matches_term(message, node)
+    if isinstance(node, Not):
+        return not _matches(message, node.node)
+    if isinstance(node, And):
+        return all(_matches(message, child) for child in node.nodes)
+    return any(_matches(message, child) for child in node.nodes)
+
+
+def _matches_term(message: Dict, term: Term) -> bool:
+    field, value = term.field, term.value.lower()
+    if field == "from":
+        return value in _header(message, "From").lower()
+    if field == "subject":
+        return value in _header(message, "Subject").lower()
+    if field in ("is", "label"):
+        return value.upper() in message["labelIds"]
+    if field == "after":
+        return int(message["internalDate"]) // 1000 > int(value)
+    if field in DATE_FIELDS:
+        operator, bound = date_bound(term)
+        timestamp = int(message["internalDate"]) / 1000
+        return timestamp >= bound if operator == ">=" else timestamp < bound
+    if field is not None:
+        value = f"{field}:{value}"
+    haystack = " ".join([_header(message, "Subject"), message["snippet"]]).lower()
+    return value in haystack
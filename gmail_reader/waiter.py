@@ -0,0 +1,176 @@
+# gmail_reader/waiter.py
+
+"""Waiting for verification codes to arrive by email."""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Set, Union
+
+from .client import GmailClient, HistoryExpiredError
+from .query import Node, UnsupportedQueryError, check_supported, matches, parse_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 120.0
+SEARCH_LIMIT = 10
+
+
+class PollStrategy:
+    """
+    Adaptive polling schedule.
+
+    Polls every ``initial`` seconds at first and stretches the interval by
+    ``backoff`` after each poll, up to ``max_interval``. Codes usually land
+    within seconds, so early polls are fast and long waits stay cheap.
+    """
+
+    def __init__(self, initial: float = 1.0, backoff: float = 1.2, max_interval: float = 5.0):
+        self.initial = initial
+        self.backoff = backoff
+        self.max_interval = max_interval
+
+    def intervals(self) -> Iterator[float]:
+        """Yield successive sleep intervals in seconds."""
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+class CodeWaiter:
+    """
+    Waits for a verification email and returns its code.
+
+    The first poll searches for matching mail. Later polls ask the History
+    API what was delivered since the previous poll and fetch those messages
+    directly, checking them against the query locally, so a message is
+    found even while Gmail's search index lags behind its history. Queries
+    that cannot be evaluated locally are searched instead, on every poll
+    until each message history reported has been seen. Messages already
+    inspected are never fetched again.
+    """
+
+    def __init__(
+        self,
+        client: GmailClient,
+        extractor=None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the waiter.
+
+        Args:
+            client: Gmail client to poll with
+            extractor: Object with an ``extract_code(content)`` method; defaults to VerificationCodeExtractor
+            clock: Wall-clock source in epoch seconds
+            sleep: Sleep function
+        """
+        self.client = client
+        self._extractor = extractor
+        self.clock = clock
+        self.sleep = sleep
+
+    @property
+    def extractor(self):
+        """Code extractor, created on first use."""
+        if self._extractor is None:
+            from .extractor import VerificationCodeExtractor
+            self._extractor = VerificationCodeExtractor()
+        return self._extractor
+
+    def wait_for_code(
+        self,
+        query: str = "",
+        since: Union[datetime, float, None] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        poll_strategy: Optional[PollStrategy] = None
+    ) -> Optional[str]:
+        """
+        Wait until a matching email with a verification code arrives.
+
+        Args:
+            query: Gmail search query identifying the email (e.g. "from:noreply@example.com")
+            since: Ignore mail delivered before this time; defaults to now
+            timeout: Maximum time to wait in seconds
+            poll_strategy: Polling schedule; defaults to PollStrategy()
+
+        Returns:
+            The extracted code, or None if none arrived before the timeout
+        """
+        if since is None:
+            since = self.clock()
+        elif isinstance(since, datetime):
+            since = since.timestamp()
+        # after: has one-second granularity, so include the starting second
+        search = f"{query} after:{int(since) - 1}".strip()
+
+        node: Optional[Node] = parse_query(search)
+        try:
+            check_supported(node)
+        except UnsupportedQueryError:
+            node = None
+
+        deadline = self.clock() + timeout
+        intervals = (poll_strategy or PollStrategy()).intervals()
+        seen: Set[str] = set()
+        # Messages history reported that a search has not returned yet
+        unsearched: Set[str] = set()
+        history_id = None
+
+        while True:
+            added = None
+            if history_id is not None:
+                try:
+                    added, history_id = self.client.list_history(history_id)
+                except HistoryExpiredError:
+                    history_id = None
+            if history_id is None:
+                history_id = self.client.get_history_id()
+
+            code = None
+            if added is None:
+                code = self._check_new_messages(search, seen)
+            elif node is not None:
+                code = self._check_added(added, node, seen)
+            else:
+                unsearched.update(message_id for message_id in added if message_id not in seen)
+                if unsearched:
+                    code = self._check_new_messages(search, seen)
+                    unsearched -= seen
+            if code:
+                return code
+
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                logger.warning(f"No verification code received within {timeout}s")
+                return None
+            self.sleep(min(next(intervals), remaining))
+
+    def _check_new_messages(self, search: str, seen: Set[str]) -> Optional[str]:
+        """Fetch unseen matching messages and extract a code from the newest."""
+        new_ids = [msg_id for msg_id in self.client.list_message_ids(search, SEARCH_LIMIT) if msg_id not in seen]
+        if not new_ids:
+            return None
+        seen.update(new_ids)
+        return self._extract(self.client.get_messages(new_ids))
+
+    def _check_added(self, added: List[str], node: Node, seen: Set[str]) -> Optional[str]:
+        """Fetch unseen messages reported by history and extract a code from the newest matching one."""
+        new_ids = [msg_id for msg_id in added if msg_id not in seen]
+        if not new_ids:
+            return None
+        seen.update(new_ids)
+        now = self.clock()
+        # History lists messages in delivery order; look at the newest first
+        messages = [message for message in reversed(self.client.get_messages(new_ids)) if matches(node, message, now)]
+        return self._extract(messages)
+
+    def _extract(self, messages: List) -> Optional[str]:
+        for message in messages:
+            content = message.get("body") or message.get("snippet", "")
+            code = self.extractor.extract_code(content) if content else None
+            if code:
+                logger.info(f"Received verification code in message {message.get('id')}")
+                return code
+        return None
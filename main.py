@@ -6,7 +6,9 @@ Gmail Reader - Example usage script
 import logging
 import sys
 from gmail_reader import GmailClient
+from gmail_reader.cache import MessageCache
 from gmail_reader.extractor import VerificationCodeExtractor
+from gmail_reader.query import any_of, term
 from constants import (
     DEFAULT_MAX_RESULTS,
     RECENT_EMAILS_DISPLAY_LIMIT,
@@ -72,8 +74,9 @@ def demonstrate_email_operations(client: GmailClient) -> None:
     
     # Demonstrate search capabilities
     print("\n\nSearch demonstrations:")
-    for description, query in SEARCH_QUERIES.items():
-        results = client.search_messages(query=query, max_results=RECENT_EMAILS_DISPLAY_LIMIT)
+    # Two batched round trips for all queries instead of two per search
+    search_results = client.search_many(SEARCH_QUERIES, max_results=RECENT_EMAILS_DISPLAY_LIMIT)
+    for description, results in search_results.items():
         print(f"\n• {description.title()}: {len(results)} emails found")
         if results:
             print(f"  Latest: {results[0].get('subject', 'No subject')}")
@@ -101,19 +104,20 @@ def demonstrate_verification_extraction(client: GmailClient) -> None:
     extractor = VerificationCodeExtractor()
     
     # Search for potential verification emails
-    query = " OR ".join([f"subject:{keyword}" for keyword in VERIFICATION_KEYWORDS])
+    query = any_of(*(term("subject", keyword) for keyword in VERIFICATION_KEYWORDS))
     
-    potential_emails = client.search_messages(
+    # Fetch full messages in one pass instead of searching and then re-fetching each one
+    potential_emails = list(client.iter_messages(
         query=query, 
-        max_results=VERIFICATION_EMAILS_PROCESS_LIMIT * 2
-    )
+        limit=VERIFICATION_EMAILS_PROCESS_LIMIT,
+        full=True
+    ))
     print(f"\n✓ Found {len(potential_emails)} potential verification emails")
     
     # Extract codes
     extracted_codes = []
-    for email in potential_emails[:VERIFICATION_EMAILS_PROCESS_LIMIT]:
+    for full_email in potential_emails:
         try:
-            full_email = client.get_message(email['id'])
             body = full_email.get('body', '')
             
             if body:
@@ -126,7 +130,7 @@ def demonstrate_verification_extraction(client: GmailClient) -> None:
                         'date': full_email.get('date', 'Unknown')
                     })
         except Exception as e:
-            logger.error(f"Error processing email {email['id']}: {e}")
+            logger.error(f"Error processing email {full_email['id']}: {e}")
     
     # Display results
     if extracted_codes:
@@ -158,7 +162,7 @@ def main():
     try:
         # Initialize and connect
         logger.info("Initializing Gmail client...")
-        client = GmailClient()
+        client = GmailClient(cache=MessageCache())
         
         logger.info("Connecting to Gmail...")
         client.connect()
@@ -5,6 +5,17 @@ from unittest.mock import Mock, MagicMock, patch
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import Resource
 
+from gmail_reader.extractor.llm_extractor import model_registry
+from gmail_reader.testing import FakeGmailBackend
+
+@pytest.fixture(autouse=True)
+def fresh_model_registry():
+    """Start every test with no shared models and treat LLM endpoints as reachable."""
+    model_registry.clear()
+    with patch('gmail_reader.extractor.llm_extractor.probe_endpoint', return_value=True) as probe:
+        yield probe
+    model_registry.clear()
+
 @pytest.fixture
 def mock_credentials():
     """Mock Google OAuth2 credentials."""
@@ -97,4 +108,9 @@ def sample_email_content():
         "multiple_codes": "Primary code: ABC123\nBackup code: XYZ789\nEmergency PIN: 4567",
         "no_code": "This email contains no verification codes.",
         "complex_html": "<html><body>Your code: <b>HTML456</b></body></html>"
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def fake_gmail():
+    """In-memory Gmail backend usable as an HTTP transport."""
+    return FakeGmailBackend()
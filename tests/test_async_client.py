@@ -0,0 +1,118 @@
+# tests/test_async_client.py
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from gmail_reader.async_client import AsyncGmailClient
+from gmail_reader.auth import GmailAuthenticator
+from gmail_reader.retry import RequestExecutor
+from gmail_reader.testing import FakeGmailServer
+
+class TestAsyncGmailClient:
+    
+    @pytest.fixture
+    def auth(self, mock_credentials):
+        auth = Mock(spec=GmailAuthenticator)
+        auth.authenticate.return_value = mock_credentials
+        return auth
+    
+    @pytest.mark.unit
+    def test_init(self, auth):
+        """Test client initialization."""
+        client = AsyncGmailClient(authenticator=auth, max_concurrency=5)
+        assert client.authenticator == auth
+        assert client.max_concurrency == 5
+        assert client.http is None
+    
+    @pytest.mark.integration
+    def test_list_and_get_messages(self, auth, fake_gmail):
+        """Test listing and reading messages against the fake server."""
+        for i in range(3):
+            fake_gmail.add_message(subject=f"S{i}", body=f"Code {i}", internal_date=1000 * i)
+        
+        async def scenario(base_url):
+            async with AsyncGmailClient(authenticator=auth, base_url=base_url) as client:
+                summaries = await client.list_messages(max_results=3)
+                message = await client.get_message(summaries[0]["id"])
+                raw = await client.get_message_raw(summaries[0]["id"])
+                labels = await client.get_labels()
+            return summaries, message, raw, labels
+        
+        with FakeGmailServer(fake_gmail) as server:
+            summaries, message, raw, labels = asyncio.run(scenario(server.base_url))
+        
+        assert [msg["subject"] for msg in summaries] == ["S2", "S1", "S0"]
+        assert message["body"] == "Code 2"
+        assert "raw" in raw
+        assert labels[0]["id"] == "INBOX"
+    
+    @pytest.mark.integration
+    def test_concurrency_is_bounded_and_connections_reused(self, auth, fake_gmail):
+        """Test the semaphore bound and keep-alive connection reuse."""
+        for i in range(20):
+            fake_gmail.add_message(subject=f"S{i}")
+        
+        async def scenario(base_url):
+            async with AsyncGmailClient(authenticator=auth, base_url=base_url, max_concurrency=4) as client:
+                return await client.list_messages(max_results=20)
+        
+        with FakeGmailServer(fake_gmail, delay=0.01) as server:
+            summaries = asyncio.run(scenario(server.base_url))
+        
+        assert len(summaries) == 20
+        assert server.max_in_flight <= 4
+        assert server.connections <= 4
+    
+    @pytest.mark.integration
+    def test_error_handling(self, auth, fake_gmail):
+        """Test that API errors are logged and an empty result returned."""
+        async def scenario(base_url):
+            async with AsyncGmailClient(authenticator=auth, base_url=base_url) as client:
+                return await client.get_message("missing")
+        
+        with FakeGmailServer(fake_gmail) as server:
+            assert asyncio.run(scenario(server.base_url)) == {}
+    
+    @pytest.mark.integration
+    def test_failed_summary_is_dropped(self, auth, fake_gmail):
+        """Test that a message deleted between listing and fetching does not discard the other summaries."""
+        for i in range(3):
+            fake_gmail.add_message(subject=f"S{i}", internal_date=1000 * i)
+        deleted = fake_gmail.add_message(subject="Deleted", internal_date=500)
+        list_messages = fake_gmail._list_messages
+        
+        def list_then_delete(params):
+            result = list_messages(params)
+            fake_gmail.messages.pop(deleted["id"], None)
+            return result
+        
+        fake_gmail._list_messages = list_then_delete
+        
+        async def scenario(base_url):
+            async with AsyncGmailClient(authenticator=auth, base_url=base_url) as client:
+                return await client.list_messages(max_results=10)
+        
+        with FakeGmailServer(fake_gmail) as server:
+            summaries = asyncio.run(scenario(server.base_url))
+        
+        assert [msg["subject"] for msg in summaries] == ["S2", "S1", "S0"]
+    
+    @pytest.mark.integration
+    def test_requests_are_charged_to_the_executor(self, auth, fake_gmail):
+        """Test that quota units are counted and taken from the executor's budget."""
+        for i in range(4):
+            fake_gmail.add_message(subject=f"S{i}")
+        executor = RequestExecutor(quota_rate=100)
+        
+        async def scenario(base_url):
+            async with AsyncGmailClient(authenticator=auth, base_url=base_url, executor=executor) as client:
+                await client.list_messages(max_results=4)
+                await client.get_message("missing")
+        
+        with FakeGmailServer(fake_gmail) as server:
+            asyncio.run(scenario(server.base_url))
+        
+        assert executor.stats.units_by_method == {"messages.list": 5, "messages.get": 25}
+        assert executor.stats.errors_by_status == {404: 1}
+        # The 10-unit burst covers the listing and one get; the rest wait about 20 / 90 s for the refill
+        assert executor.stats.throttle_seconds > 0.1
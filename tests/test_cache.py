@@ -0,0 +1,94 @@
+# tests/test_cache.py
+import pytest
+
+from gmail_reader.cache import MessageCache
+from gmail_reader.client import GmailClient
+
+class TestMessageCache:
+    
+    @pytest.mark.unit
+    def test_put_and_get(self, tmp_path):
+        """Test storing and reading back a message."""
+        cache = MessageCache(tmp_path / "cache.db")
+        cache.put("m1", {"id": "m1", "body": "hello"})
+        
+        assert cache.get("m1") == {"id": "m1", "body": "hello"}
+        assert cache.get("missing") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    @pytest.mark.unit
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        path = tmp_path / "cache.db"
+        MessageCache(path).put("m1", {"id": "m1"})
+        
+        reopened = MessageCache(path)
+        assert "m1" in reopened
+        assert reopened.get("m1") == {"id": "m1"}
+    
+    @pytest.mark.unit
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = MessageCache(path=None, max_entries=2, memory_entries=1)
+        cache.put("m1", {"id": "m1"})
+        cache.put("m2", {"id": "m2"})
+        cache.get("m1")
+        cache.put("m3", {"id": "m3"})
+        
+        assert len(cache) == 2
+        assert "m1" in cache
+        assert "m2" not in cache
+        assert "m3" in cache
+    
+    @pytest.mark.unit
+    def test_get_many_returns_copies(self):
+        """Test that callers cannot mutate cached entries."""
+        cache = MessageCache(path=None)
+        cache.put("m1", {"id": "m1", "body": "a"})
+        
+        cache.get_many(["m1"])["m1"]["body"] = "changed"
+        
+        assert cache.get("m1")["body"] == "a"
+
+class TestClientCaching:
+    
+    @pytest.fixture
+    def client(self, fake_gmail):
+        client = GmailClient(cache=MessageCache(path=None))
+        client.service = fake_gmail.build_service()
+        return client
+    
+    @pytest.mark.unit
+    def test_repeat_get_message_uses_no_network(self, client, fake_gmail):
+        """Test that a cached message is served locally."""
+        message_id = fake_gmail.add_message(subject="S", body="Body")["id"]
+        
+        first = client.get_message(message_id)
+        requests = fake_gmail.http_requests
+        
+        assert client.get_message(message_id) == first
+        assert fake_gmail.http_requests == requests
+    
+    @pytest.mark.unit
+    def test_get_messages_fetches_only_misses(self, client, fake_gmail):
+        """Test that batches only include uncached messages."""
+        ids = [fake_gmail.add_message(subject=f"S{i}")["id"] for i in range(3)]
+        client.get_message(ids[0])
+        fake_gmail.api_calls.clear()
+        
+        messages = client.get_messages(ids)
+        
+        assert [msg["id"] for msg in messages] == ids
+        assert fake_gmail.api_calls == [("GET", f"messages/{ids[1]}"), ("GET", f"messages/{ids[2]}")]
+    
+    @pytest.mark.unit
+    def test_summaries_served_from_cache(self, client, fake_gmail):
+        """Test that listing reuses cached full messages for summaries."""
+        fake_gmail.add_message(subject="Cached", body="Body")
+        list(client.iter_messages(full=True))
+        fake_gmail.api_calls.clear()
+        
+        summaries = client.list_messages()
+        
+        assert summaries[0]["subject"] == "Cached"
+        assert fake_gmail.api_calls == [("GET", "messages")]
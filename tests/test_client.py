@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from googleapiclient.errors import HttpError
 
-from gmail_reader.client import GmailClient
+from gmail_reader.client import GmailClient, load_discovery_document
 from gmail_reader.auth import GmailAuthenticator
 
 class TestGmailClient:
@@ -23,7 +23,7 @@ class TestGmailClient:
         assert client.authenticator == auth
     
     @pytest.mark.unit
-    @patch('gmail_reader.client.build')
+    @patch('gmail_reader.client.build_from_document')
     def test_connect(self, mock_build, mock_credentials, mock_gmail_service):
         """Test connecting to Gmail API."""
         mock_build.return_value = mock_gmail_service
@@ -34,9 +34,41 @@ class TestGmailClient:
         client.connect()
         
         auth.authenticate.assert_called_once()
-        mock_build.assert_called_once_with("gmail", "v1", credentials=mock_credentials)
+        mock_build.assert_called_once_with(load_discovery_document(), credentials=mock_credentials)
         assert client.service == mock_gmail_service
     
+    @pytest.mark.unit
+    def test_connect_offline_shares_discovery_document(self):
+        """Test that connect() builds working services offline from one shared discovery document."""
+        from google.oauth2.credentials import Credentials
+        
+        clients = []
+        for token in ("token-a", "token-b"):
+            auth = Mock(spec=GmailAuthenticator)
+            auth.authenticate.return_value = Credentials(token=token)
+            client = GmailClient(authenticator=auth)
+            client.connect()
+            clients.append(client)
+        
+        assert load_discovery_document() is load_discovery_document()
+        request = clients[0].service.users().messages().list(userId="me")
+        assert request.uri.startswith("https://gmail.googleapis.com/gmail/v1/users/me/messages")
+        assert clients[0].service._http.credentials.token == "token-a"
+        assert clients[1].service._http.credentials.token == "token-b"
+    
+    @pytest.mark.unit
+    def test_discovery_document_from_file(self, tmp_path):
+        """Test that a local discovery document is read once and then reused."""
+        path = tmp_path / "gmail.json"
+        path.write_text('{"name": "custom", "version": "v0"}')
+        
+        with patch.dict('gmail_reader.client._discovery_documents', clear=True):
+            document = load_discovery_document("custom", "v0", path=path)
+            path.unlink()
+            
+            assert document["name"] == "custom"
+            assert load_discovery_document("custom", "v0", path=path) is document
+    
     @pytest.mark.unit
     def test_list_messages(self, mock_gmail_service):
         """Test listing messages."""
@@ -44,14 +76,14 @@ class TestGmailClient:
         client.service = mock_gmail_service
         
         # Call _get_message_summary with proper mock
-        with patch.object(client, '_get_message_summary') as mock_summary:
-            mock_summary.side_effect = lambda msg_id: {
+        with patch.object(client, '_get_message_summaries') as mock_summaries:
+            mock_summaries.side_effect = lambda msg_ids: [{
                 "id": msg_id,
                 "subject": f"Message {msg_id}",
                 "sender": "test@example.com",
                 "date": "2024-01-01",
                 "snippet": "Test snippet"
-            }
+            } for msg_id in msg_ids]
             
             messages = client.list_messages(max_results=3)
             
@@ -64,15 +96,15 @@ class TestGmailClient:
     @pytest.mark.unit
     def test_list_messages_auto_connect(self, mock_gmail_service, mock_credentials):
         """Test list messages with automatic connection."""
-        with patch('gmail_reader.client.build') as mock_build:
+        with patch('gmail_reader.client.build_from_document') as mock_build:
             mock_build.return_value = mock_gmail_service
             auth = Mock(spec=GmailAuthenticator)
             auth.authenticate.return_value = mock_credentials
             
             client = GmailClient(authenticator=auth)
             
-            with patch.object(client, '_get_message_summary') as mock_summary:
-                mock_summary.side_effect = lambda msg_id: {"id": msg_id, "subject": f"Message {msg_id}"}
+            with patch.object(client, '_get_message_summaries') as mock_summaries:
+                mock_summaries.side_effect = lambda msg_ids: [{"id": msg_id, "subject": f"Message {msg_id}"} for msg_id in msg_ids]
                 messages = client.list_messages()
                 
                 assert client.service is not None
@@ -84,8 +116,8 @@ class TestGmailClient:
         client = GmailClient()
         client.service = mock_gmail_service
         
-        with patch.object(client, '_get_message_summary') as mock_summary:
-            mock_summary.return_value = {"id": "msg1", "subject": "Test"}
+        with patch.object(client, '_get_message_summaries') as mock_summaries:
+            mock_summaries.return_value = [{"id": "msg1", "subject": "Test"}]
             messages = client.search_messages(query="is:unread", max_results=5)
             
             mock_gmail_service.users().messages().list.assert_called_with(
@@ -105,6 +137,27 @@ class TestGmailClient:
         assert message["sender"] == "noreply@example.com"
         assert "123456" in message["body"]
     
+    @pytest.mark.unit
+    def test_get_message_summary_uses_metadata_format(self, mock_gmail_service):
+        """Test that summaries request only metadata headers."""
+        client = GmailClient()
+        client.service = mock_gmail_service
+        
+        with patch.object(client, '_get_message_body') as mock_body:
+            summary = client._get_message_summary("msg1")
+            mock_body.assert_not_called()
+        
+        assert summary == {
+            "id": "msg1",
+            "subject": "Verification Code",
+            "sender": "noreply@example.com",
+            "date": "2024-01-01 12:00:00",
+            "snippet": "Your verification code is 123456"
+        }
+        mock_gmail_service.users().messages().get.assert_called_with(
+            userId="me", id="msg1", format="metadata", metadataHeaders=["Subject", "From", "Date"]
+        )
+    
     @pytest.mark.unit
     def test_get_message_raw(self, mock_gmail_service):
         """Test getting raw message data."""
@@ -189,4 +242,91 @@ class TestGmailClient:
         client.service = mock_gmail_service
         
         messages = client.list_messages()
-        assert messages == []
\ No newline at end of file
+        assert messages == []
+
+
+class TestGmailClientBatching:
+    
+    @pytest.fixture
+    def client(self, fake_gmail):
+        client = GmailClient()
+        client.service = fake_gmail.build_service()
+        return client
+    
+    @pytest.mark.unit
+    def test_list_messages_uses_one_batch_per_page(self, client, fake_gmail):
+        """Test that summaries for a page are fetched in a single batch round trip."""
+        for i in range(10):
+            fake_gmail.add_message(subject=f"Subject {i}", body=f"Body {i}", internal_date=1000 * i)
+        
+        messages = client.list_messages(max_results=10)
+        
+        assert [msg["subject"] for msg in messages] == [f"Subject {i}" for i in reversed(range(10))]
+        # One list call plus one batch call
+        assert fake_gmail.http_requests == 2
+    
+    @pytest.mark.unit
+    def test_batch_is_chunked(self, client, fake_gmail):
+        """Test that batches are split at the configured batch size."""
+        ids = [fake_gmail.add_message(subject=f"S{i}")["id"] for i in range(5)]
+        
+        with patch('gmail_reader.client.BATCH_SIZE', 2):
+            messages = client.get_messages(ids)
+        
+        assert [msg["id"] for msg in messages] == ids
+        assert fake_gmail.http_requests == 3
+    
+    @pytest.mark.unit
+    def test_get_messages_skips_failed_items(self, client, fake_gmail):
+        """Test that a failed item in a batch does not drop the others."""
+        message_id = fake_gmail.add_message(subject="Present", body="Hello")["id"]
+        
+        messages = client.get_messages(["missing", message_id])
+        
+        assert len(messages) == 1
+        assert messages[0]["subject"] == "Present"
+        assert messages[0]["body"] == "Hello"
+    
+    @pytest.mark.unit
+    def test_list_messages_does_not_decode_bodies(self, client, fake_gmail):
+        """Test that listing fetches metadata only."""
+        fake_gmail.add_message(subject="Newsletter", body="x" * 100000, html="<p>" + "y" * 100000 + "</p>")
+        
+        with patch.object(client, '_get_message_body') as mock_body:
+            messages = client.list_messages()
+            mock_body.assert_not_called()
+        
+        assert messages[0]["subject"] == "Newsletter"
+        assert set(messages[0]) == {"id", "subject", "sender", "date", "snippet"}
+    
+    @pytest.mark.unit
+    def test_iter_messages_follows_page_tokens(self, client, fake_gmail):
+        """Test that iteration walks every result page."""
+        for i in range(7):
+            fake_gmail.add_message(subject=f"S{i}", internal_date=1000 * i)
+        
+        subjects = [msg["subject"] for msg in client.iter_messages(page_size=3)]
+        
+        assert subjects == [f"S{i}" for i in reversed(range(7))]
+        assert fake_gmail.api_calls.count(("GET", "messages")) == 3
+    
+    @pytest.mark.unit
+    def test_iter_messages_is_lazy(self, client, fake_gmail):
+        """Test that later pages are not requested before they are consumed."""
+        for i in range(6):
+            fake_gmail.add_message(subject=f"S{i}")
+        
+        iterator = client.iter_messages(page_size=2)
+        next(iterator)
+        
+        assert fake_gmail.api_calls.count(("GET", "messages")) == 1
+    
+    @pytest.mark.unit
+    def test_iter_messages_limit_and_full(self, client, fake_gmail):
+        """Test limiting results and yielding full messages."""
+        for i in range(5):
+            fake_gmail.add_message(subject=f"S{i}", body=f"Body {i}", internal_date=1000 * i)
+        
+        messages = list(client.iter_messages(page_size=2, limit=3, full=True))
+        
+        assert [msg["body"] for msg in messages] == ["Body 4", "Body 3", "Body 2"]
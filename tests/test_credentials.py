@@ -0,0 +1,198 @@
+# tests/test_credentials.py
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from gmail_reader.auth import GmailAuthenticator
+from gmail_reader.credentials import CredentialManager, TokenStore, seconds_left
+
+
+def make_credentials(token="token", expires_in=3600.0, refresh_token="refresh"):
+    expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=expires_in)
+    return Credentials(
+        token=token,
+        refresh_token=refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="client",
+        client_secret="secret",
+        expiry=expiry
+    )
+
+
+@pytest.fixture
+def fake_refresh():
+    """Patch Credentials.refresh to issue a new one-hour token and count calls."""
+    calls = []
+
+    def refresh(creds, request):
+        time.sleep(0.05)
+        calls.append(creds.token)
+        creds.token = f"refreshed-{len(calls)}"
+        creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+    with patch.object(Credentials, "refresh", autospec=True, side_effect=refresh):
+        yield calls
+
+
+class TestTokenStore:
+
+    @pytest.mark.unit
+    def test_save_load_accounts(self, tmp_path):
+        """Test storing tokens for several accounts."""
+        store = TokenStore(tmp_path / "tokens")
+        assert store.accounts() == []
+
+        store.save("work@example.com", make_credentials("a"))
+        store.save("home", make_credentials("b"))
+
+        assert store.accounts() == ["home", "work@example.com"]
+        assert store.load("work@example.com").token == "a"
+        assert store.load("missing") is None
+        assert not list((tmp_path / "tokens").glob("*.tmp"))
+
+    @pytest.mark.unit
+    def test_rejects_path_like_account_names(self, tmp_path):
+        """Test that account names cannot escape the token directory."""
+        store = TokenStore(tmp_path)
+        for name in ("../other", ".hidden", "a/b", ""):
+            with pytest.raises(ValueError):
+                store.path(name)
+
+
+class TestCredentialManager:
+
+    @pytest.mark.unit
+    def test_get_reuses_loaded_credentials(self, tmp_path, fake_refresh):
+        """Test that fresh credentials are loaded once and then served from memory."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials("a"))
+        manager = CredentialManager(store)
+
+        with patch.object(store, "load", wraps=store.load) as load:
+            first = manager.get("work")
+            assert manager.get("work") is first
+
+        assert load.call_count == 1
+        assert first.token == "a"
+        assert fake_refresh == []
+
+    @pytest.mark.unit
+    def test_missing_account(self, tmp_path):
+        """Test that an account without a token raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            CredentialManager(TokenStore(tmp_path)).get("nobody")
+
+    @pytest.mark.unit
+    def test_expired_without_refresh_token(self, tmp_path):
+        """Test that an expired token without a refresh token raises ValueError."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials(expires_in=-10, refresh_token=None))
+
+        with pytest.raises(ValueError):
+            CredentialManager(store).get("work")
+
+    @pytest.mark.unit
+    def test_refreshes_before_expiry(self, tmp_path, fake_refresh):
+        """Test that a token inside the refresh margin is refreshed in place and saved."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials("old", expires_in=3600))
+        manager = CredentialManager(store, refresh_margin=300)
+        creds = manager.get("work")
+        creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=120)
+        store.save("work", creds)
+
+        assert manager.get("work") is creds
+        assert creds.token == "refreshed-1"
+        assert seconds_left(creds) > 300
+        assert store.load("work").token == "refreshed-1"
+
+    @pytest.mark.unit
+    def test_concurrent_callers_refresh_once(self, tmp_path, fake_refresh):
+        """Test that many threads hitting an expired token trigger a single refresh."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials("old", expires_in=-10))
+        manager = CredentialManager(store)
+        barrier = threading.Barrier(8)
+        tokens = []
+
+        def worker():
+            barrier.wait()
+            tokens.append(manager.get("work").token)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert fake_refresh == ["old"]
+        assert tokens == ["refreshed-1"] * 8
+        assert manager.refreshes == 1
+
+    @pytest.mark.unit
+    def test_adopts_token_refreshed_by_another_process(self, tmp_path, fake_refresh):
+        """Test that a token refreshed on disk by another process is reused instead of refreshed."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials("old"))
+        manager = CredentialManager(store, refresh_margin=300)
+        held = manager.get("work")
+        held.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=60)
+        store.save("work", make_credentials("from-other-process"))
+
+        assert manager.get("work") is held
+        assert held.token == "from-other-process"
+        assert seconds_left(held) > 300
+        assert fake_refresh == []
+
+    @pytest.mark.unit
+    def test_background_refresh(self, tmp_path, fake_refresh):
+        """Test that the background thread refreshes due tokens without any caller."""
+        store = TokenStore(tmp_path)
+        store.save("a", make_credentials("a", expires_in=3600))
+        store.save("b", make_credentials("b", expires_in=3600))
+        manager = CredentialManager(store, refresh_margin=300)
+        a, b = manager.get("a"), manager.get("b")
+        a.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=60)
+        store.save("a", a)
+
+        manager.start(interval=0.01)
+        try:
+            deadline = time.monotonic() + 5
+            while manager.refreshes == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            manager.stop()
+
+        assert a.token == "refreshed-1"
+        assert b.token == "b"
+        assert manager.refreshes == 1
+
+    @pytest.mark.unit
+    def test_authenticator_for_client(self, tmp_path):
+        """Test that the per-account authenticator returns the manager's credentials."""
+        store = TokenStore(tmp_path)
+        store.save("work", make_credentials("a"))
+        manager = CredentialManager(store)
+
+        assert manager.authenticator("work").authenticate() is manager.get("work")
+        assert manager.accounts() == ["work"]
+
+
+class TestGmailAuthenticatorCaching:
+
+    @pytest.mark.unit
+    def test_valid_credentials_not_reloaded(self, temp_token_file):
+        """Test that valid credentials are served from memory instead of re-reading the token file."""
+        temp_token_file.write_text(make_credentials("a").to_json())
+        auth = GmailAuthenticator(token_file=temp_token_file)
+
+        with patch('gmail_reader.auth.Credentials.from_authorized_user_file',
+                   wraps=Credentials.from_authorized_user_file) as from_file:
+            first = auth.authenticate()
+            assert auth.authenticate() is first
+
+        assert from_file.call_count == 1
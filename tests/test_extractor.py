@@ -47,12 +47,36 @@ class TestVerificationCodeExtractor:
     
     @pytest.mark.unit
     def test_extract_code_with_llm(self, mock_llm):
-        """Test code extraction using LLM."""
+        """Test that ambiguous content is handed to the LLM."""
         with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
             extractor = VerificationCodeExtractor()
-            code = extractor.extract_code("Your verification code is: 123456")
+            result = extractor.extract_code_with_confidence("Use code 654321 or code 123456, whichever is newer")
             
-            assert code == "123456"
+            assert result.code == "123456"
+            assert result.source == "llm"
+            mock_llm.invoke.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_extract_code_confident_skips_llm(self, mock_llm):
+        """Test that a confidently scored code is returned without calling the LLM."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = VerificationCodeExtractor()
+            result = extractor.extract_code_with_confidence("Your verification code is: 482913")
+            
+            assert result.code == "482913"
+            assert result.source == "scorer"
+            assert result.confidence >= extractor.confidence_threshold
+            assert extractor.extract_code("Your verification code is: 482913") == "482913"
+            mock_llm.invoke.assert_not_called()
+    
+    @pytest.mark.unit
+    def test_extract_code_threshold_forces_llm(self, mock_llm):
+        """Test that a threshold above 1 always consults the LLM."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = VerificationCodeExtractor(confidence_threshold=1.1)
+            result = extractor.extract_code_with_confidence("Your verification code is: 123456")
+            
+            assert result == ("123456", 0.9, "llm")
             mock_llm.invoke.assert_called_once()
     
     @pytest.mark.unit
@@ -69,9 +93,10 @@ class TestVerificationCodeExtractor:
         """Test extraction without fallback."""
         with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=None):
             extractor = VerificationCodeExtractor()
-            code = extractor.extract_code("Your code is 789012", use_fallback=False)
+            content = "Reference 789012"
             
-            assert code is None
+            assert extractor.extract_code(content, use_fallback=False) is None
+            assert extractor.extract_code_with_confidence(content).source == "regex"
     
     @pytest.mark.unit
     def test_extract_multiple_codes(self, mock_llm):
@@ -97,4 +122,58 @@ class TestVerificationCodeExtractor:
             assert len(codes) >= 3
             assert "1234" in codes
             assert "5678" in codes
-            assert "9012" in codes
\ No newline at end of file
+            assert "9012" in codes
+    
+    @pytest.mark.unit
+    def test_extract_code_learns_sender_template(self, mock_llm):
+        """Test that a learned sender rule bypasses the LLM."""
+        from gmail_reader.extractor.templates import TemplateLearner
+        mock_llm.invoke.side_effect = lambda prompt: Mock(content=prompt.split("code is ")[1][:6])
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = VerificationCodeExtractor(
+                template_learner=TemplateLearner(min_samples=2), confidence_threshold=1.1
+            )
+            sender = "Acme <no-reply@acme.com>"
+            
+            assert extractor.extract_code("Hi A, your Acme code is 111111. Thanks", sender=sender) == "111111"
+            assert extractor.extract_code("Hi B, your Acme code is 222222. Thanks", sender=sender) == "222222"
+            assert extractor.extract_code("Hi C, your Acme code is 333333. Thanks", sender=sender) == "333333"
+            
+            assert mock_llm.invoke.call_count == 2
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch(self, mock_llm):
+        """Test that only emails the scorer is unsure about are batched into one LLM call."""
+        mock_llm.invoke.return_value = Mock(content='{"1": "654321", "2": null}')
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = VerificationCodeExtractor()
+            results = extractor.extract_codes_batch([
+                "Your verification code is: 482913",
+                "Use code 123456 or code 654321, whichever is newer",
+                "",
+                "Nothing to see",
+            ], use_fallback=False)
+            
+            assert [result.code for result in results] == ["482913", "654321", None, None]
+            assert [result.source for result in results] == ["scorer", "llm", "none", "none"]
+            mock_llm.invoke.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_prompt_content_is_trimmed(self, mock_llm):
+        """Test that markup and footers are stripped before the body reaches the LLM."""
+        content = (
+            "<html><head><style>.code { font-family: monospace; }</style></head><body>"
+            "<p>Use code 654321 or code 123456, whichever is newer</p>"
+            "<p>Unsubscribe | Privacy Policy</p></body></html>"
+        )
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = VerificationCodeExtractor()
+            extractor.extract_code(content)
+            
+            prompt = mock_llm.invoke.call_args[0][0]
+            assert "Use code 654321 or code 123456" in prompt
+            assert "monospace" not in prompt
+            assert "Unsubscribe" not in prompt
@@ -0,0 +1,118 @@
+# tests/test_extractor_cache.py
+import pytest
+from unittest.mock import Mock, patch
+
+from gmail_reader.extractor.cache import CacheBackend, DiskBackend, MemoryBackend, ResultCache, normalize_content
+from gmail_reader.extractor.llm_extractor import LLMExtractor
+from gmail_reader.extractor.prompts import PromptManager
+
+class TestResultCache:
+    
+    @pytest.mark.unit
+    def test_normalize_content(self):
+        """Test whitespace normalization."""
+        assert normalize_content("  Your code\n\n is\t123456 ") == "Your code is 123456"
+    
+    @pytest.mark.unit
+    def test_key_depends_on_template_config_and_content(self):
+        """Test what the cache key covers."""
+        key = ResultCache.make_key("T {content}", {"model": "a"}, "code 1")
+        
+        assert key == ResultCache.make_key("T {content}", {"model": "a"}, " code  1\n")
+        assert key == ResultCache.make_key("T {content}", {"model": "a", "api_key": "x"}, "code 1")
+        assert key != ResultCache.make_key("U {content}", {"model": "a"}, "code 1")
+        assert key != ResultCache.make_key("T {content}", {"model": "b"}, "code 1")
+        assert key != ResultCache.make_key("T {content}", {"model": "a"}, "code 2")
+    
+    @pytest.mark.unit
+    def test_hit_miss_and_none_values(self):
+        """Test counters and caching of negative results."""
+        cache = ResultCache()
+        assert cache.get("k") == (False, None)
+        
+        cache.set("k", None)
+        assert cache.get("k") == (True, None)
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+    
+    @pytest.mark.unit
+    def test_ttl_expiry(self):
+        """Test that expired entries are misses."""
+        cache = ResultCache(ttl=10)
+        with patch('gmail_reader.extractor.cache.time.time', return_value=1000.0):
+            cache.set("k", "123456")
+        with patch('gmail_reader.extractor.cache.time.time', return_value=1011.0):
+            assert cache.get("k") == (False, None)
+        assert len(cache.backend) == 0
+    
+    @pytest.mark.unit
+    def test_memory_backend_size_eviction(self):
+        """Test LRU eviction in the memory backend."""
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", 1, float("inf"))
+        backend.set("b", 2, float("inf"))
+        backend.get("a")
+        backend.set("c", 3, float("inf"))
+        
+        assert backend.get("b") is None
+        assert backend.get("a") == (1, float("inf"))
+    
+    @pytest.mark.unit
+    def test_incomplete_backend_is_rejected(self):
+        """Test that a backend missing part of the interface fails when constructed, not when first used."""
+        class GetOnlyBackend(CacheBackend):
+            def get(self, key):
+                return None
+        
+        with pytest.raises(TypeError):
+            GetOnlyBackend()
+    
+    @pytest.mark.unit
+    def test_disk_backend_persists_and_evicts(self, tmp_path):
+        """Test the SQLite backend."""
+        backend = DiskBackend(tmp_path / "results.db", max_entries=2)
+        backend.set("a", ["X1", "X2"], 1e12)
+        backend.set("b", None, 1e12)
+        backend.set("c", "C", 1e12)
+        
+        reopened = DiskBackend(tmp_path / "results.db")
+        assert len(reopened) == 2
+        assert reopened.get("b") == (None, 1e12)
+        assert reopened.get("c") == ("C", 1e12)
+
+class TestLLMExtractorCaching:
+    
+    @pytest.mark.unit
+    def test_repeated_content_invokes_llm_once(self, mock_llm):
+        """Test that identical content is answered from the cache."""
+        cache = ResultCache()
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({"model": "m"}, PromptManager(), cache=cache)
+            
+            assert extractor.extract_single_code("Your code is 123456") == "123456"
+            assert extractor.extract_single_code("Your code is  123456\n") == "123456"
+        
+        mock_llm.invoke.assert_called_once()
+        assert cache.stats()["hits"] == 1
+    
+    @pytest.mark.unit
+    def test_failures_are_not_cached(self, mock_llm):
+        """Test that a failed call is retried next time."""
+        mock_llm.invoke.side_effect = [Exception("timeout"), Mock(content="654321")]
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager(), cache=ResultCache())
+            
+            assert extractor.extract_single_code("Code 654321") is None
+            assert extractor.extract_single_code("Code 654321") == "654321"
+    
+    @pytest.mark.unit
+    def test_multiple_codes_cached_separately(self, mock_llm):
+        """Test that single and multi extraction do not share entries."""
+        mock_llm.invoke.side_effect = [Mock(content="A1B2C3"), Mock(content="A1B2C3, D4E5F6")]
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager(), cache=ResultCache())
+            
+            assert extractor.extract_single_code("codes") == "A1B2C3"
+            assert extractor.extract_multiple_codes("codes") == ["A1B2C3", "D4E5F6"]
+            assert extractor.extract_multiple_codes("codes") == ["A1B2C3", "D4E5F6"]
+        
+        assert mock_llm.invoke.call_count == 2
@@ -38,4 +38,16 @@ class TestExtractorConfig:
             assert llm_config["model_provider"] == "openai"
             assert llm_config["api_key"] == "test-key"
             assert llm_config["temperature"] == 0.7
-            assert llm_config["base_url"] == "https://api.openai.com"
\ No newline at end of file
+            assert llm_config["base_url"] == "https://api.openai.com"
+    
+    @pytest.mark.unit
+    def test_load_confidence_threshold(self):
+        """Test loading the scorer confidence threshold with its default."""
+        with patch('gmail_reader.extractor.config.config', new=configparser.ConfigParser()):
+            assert ExtractorConfig().load_confidence_threshold() == 0.7
+        
+        mock_config = configparser.ConfigParser()
+        mock_config.add_section("extractor")
+        mock_config.set("extractor", "confidence_threshold", "0.9")
+        with patch('gmail_reader.extractor.config.config', mock_config):
+            assert ExtractorConfig().load_confidence_threshold() == 0.9
@@ -1,9 +1,27 @@
 # tests/test_extractor_llm.py
 import pytest
+import json
+import re
+import threading
+import time
 from unittest.mock import Mock, patch
 
-from gmail_reader.extractor.llm_extractor import LLMExtractor
+from gmail_reader.extractor.llm_extractor import LLMExtractor, model_registry, probe_endpoint, thread_rate_limiter
 from gmail_reader.extractor.prompts import PromptManager
+from gmail_reader.extractor.cache import ResultCache
+
+
+def answer_batch(prompt):
+    """Stub model: answers batch prompts with JSON and single prompts with the bare code."""
+    items = re.findall(r"### Email (\d+)\n(.*?)\n", prompt)
+    if not items:
+        match = re.search(r"\b\d{6}\b", prompt)
+        return Mock(content=match.group(0) if match else "NONE")
+    answer = {}
+    for number, text in items:
+        match = re.search(r"\b\d{6}\b", text)
+        answer[number] = match.group(0) if match else None
+    return Mock(content=f"```json\n{json.dumps(answer)}\n```")
 
 class TestLLMExtractor:
     
@@ -40,7 +58,7 @@ class TestLLMExtractor:
             assert extractor.is_available() is True
         
         with patch('gmail_reader.extractor.llm_extractor.init_chat_model', side_effect=Exception()):
-            extractor = LLMExtractor({}, prompt_manager)
+            extractor = LLMExtractor({"model": "broken"}, prompt_manager)
             assert extractor.is_available() is False
     
     @pytest.mark.unit
@@ -121,4 +139,218 @@ class TestLLMExtractor:
             extractor = LLMExtractor({}, prompt_manager)
             codes = extractor.extract_multiple_codes("No codes")
             
-            assert codes == []
\ No newline at end of file
+            assert codes == []
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch_single_call(self, mock_llm):
+        """Test that several emails are answered by one JSON response, in order."""
+        mock_llm.invoke.side_effect = answer_batch
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            codes = extractor.extract_codes_batch(["Code 111111", "Nothing here", "", "Use 333333"])
+            
+            assert codes == ["111111", None, None, "333333"]
+            mock_llm.invoke.assert_called_once()
+            assert "### Email 3\nUse 333333" in mock_llm.invoke.call_args[0][0]
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch_token_budget(self, mock_llm):
+        """Test that batches are sized to the token budget and item limit."""
+        mock_llm.invoke.side_effect = answer_batch
+        contents = [f"Your code is {100000 + i} " + "filler " * 50 for i in range(6)]
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            
+            assert extractor.extract_codes_batch(contents, token_budget=300) == [str(100000 + i) for i in range(6)]
+            # Prompt overhead plus two ~100-token emails fit in 300 tokens
+            assert mock_llm.invoke.call_count == 3
+            
+            mock_llm.invoke.reset_mock()
+            extractor.extract_codes_batch(contents, max_items=4)
+            assert mock_llm.invoke.call_count == 2
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch_split_on_parse_failure(self, mock_llm):
+        """Test that unparseable batch answers are split down until they parse."""
+        def flaky(prompt):
+            if prompt.count("### Email") > 2:
+                return Mock(content="Sure! Here are the codes: 1) 111111 ...")
+            return answer_batch(prompt)
+        mock_llm.invoke.side_effect = flaky
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            codes = extractor.extract_codes_batch([f"Code {n}" for n in ("111111", "222222", "333333", "444444")])
+            
+            assert codes == ["111111", "222222", "333333", "444444"]
+            # One failed batch of four, then two batches of two
+            assert mock_llm.invoke.call_count == 3
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch_rejects_shifted_answers(self, mock_llm):
+        """Test that answers attributed to the wrong email trigger a retry."""
+        def shifted(prompt):
+            if "### Email 2" in prompt:
+                return Mock(content='{"1": "222222", "2": "111111"}')
+            return answer_batch(prompt)
+        mock_llm.invoke.side_effect = shifted
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            
+            assert extractor.extract_codes_batch(["Code 111111", "Code 222222"]) == ["111111", "222222"]
+            assert mock_llm.invoke.call_count == 3
+    
+    @pytest.mark.unit
+    def test_extract_codes_batch_cache(self, mock_llm):
+        """Test that batch results are cached per email and failures are not."""
+        calls = []
+        def failing_for_b(prompt):
+            calls.append(prompt)
+            if "222222" in prompt:
+                raise Exception("API Error")
+            return answer_batch(prompt)
+        mock_llm.invoke.side_effect = failing_for_b
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager(), cache=ResultCache())
+            
+            assert extractor.extract_codes_batch(["Code 111111", "Code 222222"]) == ["111111", None]
+            calls.clear()
+            assert extractor.extract_codes_batch(["Code  111111", "Code 222222"]) == ["111111", None]
+            # Only the failed email is asked again
+            assert len(calls) == 1 and "222222" in calls[0]
+    
+    @pytest.mark.unit
+    def test_rate_limiter_used_before_invoke(self, mock_llm):
+        """Test that a configured rate limiter is consulted before each model call."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            extractor.rate_limiter = Mock()
+            extractor.rate_limiter.acquire.return_value = 0.0
+            
+            extractor.extract_single_code("Your code is 123456")
+            extractor.extract_multiple_codes("Codes 123456")
+            
+            assert extractor.rate_limiter.acquire.call_count == 2
+    
+    @pytest.mark.unit
+    def test_thread_rate_limiter_takes_precedence(self, mock_llm):
+        """Test that a limiter set for the current thread is used instead of the extractor's own."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor({}, PromptManager())
+            extractor.rate_limiter = Mock()
+            thread_limiter = Mock()
+            thread_limiter.acquire.return_value = 0.0
+            
+            with thread_rate_limiter(thread_limiter):
+                extractor.extract_single_code("Your code is 123456")
+            
+            assert thread_limiter.acquire.call_count == 1
+            assert extractor.rate_limiter.acquire.call_count == 0
+    
+    @pytest.mark.unit
+    def test_model_created_lazily(self, mock_llm):
+        """Test that the model is built on first use, not on construction."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm) as init:
+            extractor = LLMExtractor({"model": "lazy"}, PromptManager())
+            assert init.call_count == 0
+            
+            extractor.extract_single_code("Your code is 123456")
+            extractor.extract_single_code("Your code is 654321")
+            
+            init.assert_called_once_with(model="lazy")
+    
+    @pytest.mark.unit
+    def test_model_shared_per_config(self, mock_llm):
+        """Test that identical configs share one model, built once even under concurrency."""
+        def slow_init(**kwargs):
+            time.sleep(0.05)
+            return Mock()
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', side_effect=slow_init) as init:
+            extractors = [LLMExtractor({"model": "shared", "temperature": 0.0}, PromptManager()) for _ in range(8)]
+            threads = [threading.Thread(target=lambda e=e: e.llm) for e in extractors]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            other = LLMExtractor({"temperature": 0.0, "model": "other"}, PromptManager())
+            
+            assert init.call_count == 1
+            assert all(extractor.llm is extractors[0].llm for extractor in extractors)
+            assert other.llm is not extractors[0].llm
+            assert init.call_count == 2
+    
+    @pytest.mark.unit
+    def test_failed_init_retried_after_ttl(self, mock_llm):
+        """Test that a failed initialization is not retried on every call until the TTL passes."""
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', side_effect=Exception("down")) as init:
+            extractor = LLMExtractor({"model": "flaky"}, PromptManager(), probe_ttl=60)
+            assert extractor.is_available() is False
+            assert extractor.extract_single_code("Your code is 123456") is None
+            assert init.call_count == 1
+            
+            extractor.probe_ttl = 0
+            init.side_effect = None
+            init.return_value = mock_llm
+            assert extractor.is_available() is True
+    
+    @pytest.mark.unit
+    def test_availability_probe_cached(self, mock_llm, fresh_model_registry):
+        """Test that the endpoint probe decides availability and is cached for the TTL."""
+        probe = fresh_model_registry
+        probe.return_value = False
+        config = {"model": "mistral", "base_url": "http://localhost:11434"}
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            first = LLMExtractor(config, PromptManager())
+            second = LLMExtractor(config, PromptManager())
+            
+            assert first.is_available() is False
+            assert second.is_available() is False
+            probe.assert_called_once_with("http://localhost:11434")
+            
+            probe.return_value = True
+            model_registry.invalidate_probe("http://localhost:11434")
+            assert first.is_available() is True
+    
+    @pytest.mark.unit
+    def test_invoke_failure_invalidates_probe(self, mock_llm, fresh_model_registry):
+        """Test that a failed call makes the next availability check probe again."""
+        probe = fresh_model_registry
+        mock_llm.invoke.side_effect = ConnectionError("refused")
+        config = {"model": "mistral", "base_url": "http://localhost:11434"}
+        
+        with patch('gmail_reader.extractor.llm_extractor.init_chat_model', return_value=mock_llm):
+            extractor = LLMExtractor(config, PromptManager())
+            assert extractor.is_available() is True
+            assert extractor.extract_single_code("Your code is 123456") is None
+            
+            probe.return_value = False
+            assert extractor.is_available() is False
+            assert probe.call_count == 2
+    
+    @pytest.mark.unit
+    def test_probe_endpoint(self):
+        """Test the real probe against a local server and a closed port."""
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        
+        class NotFound(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(404)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(("127.0.0.1", 0), NotFound)
+        threading.Thread(target=server.handle_request, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            assert probe_endpoint(url) is True
+        finally:
+            server.server_close()
+        assert probe_endpoint(url, timeout=0.5) is False
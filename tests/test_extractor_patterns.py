@@ -53,4 +53,39 @@ class TestRegexPatterns:
         codes = patterns.extract_multiple_codes(content)
         
         assert codes.count("1234") == 1
-        assert "5678" in codes
\ No newline at end of file
+        assert "5678" in codes
+    
+    @pytest.mark.unit
+    def test_patterns_precompiled(self):
+        """Test that patterns are compiled once at construction."""
+        patterns = RegexPatterns()
+        assert [p.pattern for p in patterns.compiled] == RegexPatterns.DEFAULT_PATTERNS
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("content,expected", [
+        ("Your code is 123456", "123456"),
+        ("OTP: ABC123", "ABC123"),
+        ("Verification code: XYZ789", "XYZ789"),
+        ("PIN: 9876", "9876"),
+        ("No code here", None),
+        ("Order 55555555 shipped. Your code: 4321", "4321"),
+        ("Here is the link, reference 987654", "987654"),
+    ])
+    def test_extract_code_combined_matches_sequential(self, content, expected):
+        """Test that the single-pass scan agrees with per-pattern search."""
+        assert RegexPatterns(combined=True).extract_code(content) == expected
+        assert RegexPatterns().extract_code(content) == expected
+    
+    @pytest.mark.unit
+    def test_combined_with_groupless_custom_patterns(self):
+        """Test combining patterns without capture groups."""
+        patterns = RegexPatterns(custom_patterns=[r'[A-Z]{3}-\d{3}', r'\d{6}'], combined=True)
+        assert patterns.extract_code("ref 123456 then ABC-123") == "ABC-123"
+        assert patterns.extract_code("ref 123456") == "123456"
+    
+    @pytest.mark.unit
+    def test_combined_disabled_for_backreferences(self):
+        """Test that patterns with backreferences fall back to sequential search."""
+        patterns = RegexPatterns(custom_patterns=[r'(\d{4})-\1'], combined=True)
+        assert patterns._combined_regex is None
+        assert patterns.extract_code("code 1234-1234") == "1234"
@@ -0,0 +1,174 @@
+# tests/test_extractor_pipeline.py
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from gmail_reader.extractor import llm_extractor
+from gmail_reader.extractor.pipeline import ExtractionPipeline, get_rate_limiter
+from gmail_reader.extractor.scoring import ExtractionResult
+
+
+class SlowExtractor:
+    """Extracts the content itself as the code after a per-content delay, tracking concurrency."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.llm_extractor = Mock(llm_config={"model_provider": "test"}, rate_limiter=None)
+
+    def extract_code_with_confidence(self, content, sender=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delays.get(content, 0.01))
+        with self.lock:
+            self.in_flight -= 1
+        if content == "boom":
+            raise RuntimeError("model crashed")
+        return ExtractionResult(content, 0.9, "llm")
+
+
+class TestRateLimiterRegistry:
+
+    @pytest.mark.unit
+    def test_shared_per_provider(self):
+        """Test that the provider registry hands out one bucket per provider."""
+        assert get_rate_limiter("provider-a", 5) is get_rate_limiter("provider-a", 50)
+        assert get_rate_limiter("provider-a", 5) is not get_rate_limiter("provider-b", 5)
+
+    @pytest.mark.unit
+    def test_lowest_rate_applies(self):
+        """Test that a later, stricter caller lowers the shared rate instead of being ignored."""
+        bucket = get_rate_limiter("provider-c", 10)
+
+        assert get_rate_limiter("provider-c", 20).rate == 10
+        assert get_rate_limiter("provider-c", 4).rate == 4
+        assert bucket.capacity == 4
+
+
+class TestExtractionPipeline:
+
+    @pytest.mark.unit
+    def test_completion_order(self):
+        """Test that results stream back as they finish, not in submission order."""
+        extractor = SlowExtractor({"slow": 0.3})
+
+        with ExtractionPipeline(extractor, max_in_flight=2) as pipeline:
+            for key in ("slow", "a", "b"):
+                pipeline.submit(key, key)
+            keys = [key for key, _ in pipeline.results()]
+
+        assert sorted(keys) == ["a", "b", "slow"]
+        assert keys[-1] == "slow"
+
+    @pytest.mark.unit
+    def test_max_in_flight(self):
+        """Test that no more than max_in_flight extractions run at once."""
+        extractor = SlowExtractor()
+        messages = [{"id": str(n), "body": str(n)} for n in range(20)]
+
+        with ExtractionPipeline(extractor, max_in_flight=3) as pipeline:
+            results = dict(pipeline.map(messages))
+
+        assert len(results) == 20
+        assert results["7"] == ExtractionResult("7", 0.9, "llm")
+        assert 1 < extractor.max_in_flight <= 3
+
+    @pytest.mark.unit
+    def test_backpressure(self):
+        """Test that messages are pulled from the source only as queue slots free up."""
+        extractor = SlowExtractor({str(n): 0.05 for n in range(10)})
+        pulled = []
+
+        def source():
+            for n in range(10):
+                pulled.append(n)
+                yield {"id": str(n), "body": str(n)}
+
+        with ExtractionPipeline(extractor, max_in_flight=1, queue_size=2) as pipeline:
+            stream = pipeline.map(source())
+            next(stream)
+            # One finished, one in flight, two queued and one blocked in submit
+            assert len(pulled) <= 5
+            assert len(list(stream)) == 9
+
+    @pytest.mark.unit
+    def test_failed_extraction(self):
+        """Test that an exception in one extraction yields an empty result, not a hang."""
+        with ExtractionPipeline(SlowExtractor(), max_in_flight=2) as pipeline:
+            pipeline.submit("x", "boom")
+            pipeline.submit("y", "ok")
+            results = dict(pipeline.results())
+
+        assert results["x"] == ExtractionResult(None, 0.0, "none")
+        assert results["y"].code == "ok"
+
+    @pytest.mark.unit
+    def test_source_error_is_raised(self):
+        """Test that an error from the message source ends map() with that error instead of a hang."""
+        def source():
+            yield {"id": "1", "body": "1"}
+            yield {"id": "2", "body": "2"}
+            raise RuntimeError("retries exhausted")
+
+        results = {}
+        with ExtractionPipeline(SlowExtractor(), max_in_flight=2) as pipeline:
+            with pytest.raises(RuntimeError, match="retries exhausted"):
+                for key, result in pipeline.map(source()):
+                    results[key] = result
+
+        assert sorted(results) == ["1", "2"]
+
+    @pytest.mark.unit
+    def test_close_with_unread_results(self):
+        """Test that closing does not block on results nobody read from the bounded output queue."""
+        pipeline = ExtractionPipeline(SlowExtractor(), max_in_flight=1, queue_size=1)
+        pipeline.submit("a", "a")
+        pipeline.submit("b", "b")
+        closer = threading.Thread(target=pipeline.close)
+        closer.start()
+        closer.join(5)
+
+        assert not closer.is_alive()
+
+    @pytest.mark.unit
+    def test_close_after_leaving_map(self):
+        """Test that closing returns when the consumer stops iterating map() early."""
+        pipeline = ExtractionPipeline(SlowExtractor(), max_in_flight=2)
+        messages = [{"id": str(n), "body": "code"} for n in range(50)]
+
+        def leave_early():
+            with pipeline:
+                for _ in pipeline.map(messages):
+                    # Let the workers fill both queues before leaving
+                    time.sleep(0.2)
+                    break
+
+        consumer = threading.Thread(target=leave_early, daemon=True)
+        consumer.start()
+        consumer.join(5)
+
+        assert not consumer.is_alive()
+
+    @pytest.mark.unit
+    def test_rate_limit_applies_to_workers_only(self):
+        """Test that a rate limit throttles the pipeline's workers without changing the shared extractor."""
+        seen = []
+
+        class RecordingExtractor(SlowExtractor):
+            def extract_code_with_confidence(self, content, sender=None):
+                seen.append(getattr(llm_extractor._thread_state, "rate_limiter", None))
+                return super().extract_code_with_confidence(content, sender)
+
+        extractor = RecordingExtractor()
+        with ExtractionPipeline(extractor, rate_limit=3.0) as pipeline:
+            pipeline.submit("a", "a")
+            list(pipeline.results())
+
+        assert seen == [get_rate_limiter("test", 3.0)]
+        assert extractor.llm_extractor.rate_limiter is None
+        assert getattr(llm_extractor._thread_state, "rate_limiter", None) is None
@@ -0,0 +1,75 @@
+# tests/test_extractor_preprocess.py
+import pytest
+
+from gmail_reader.extractor.preprocess import ContentPreprocessor, html_to_text
+
+
+class TestContentPreprocessor:
+
+    @pytest.fixture
+    def preprocessor(self):
+        return ContentPreprocessor(window_chars=40, max_tokens=100)
+
+    @pytest.mark.unit
+    def test_html_to_text(self):
+        """Test that styles, scripts, comments and tags are removed and entities decoded."""
+        content = (
+            "<html><head><style>p { color: red }</style></head><body>"
+            "<!-- tracking --><p>Your code&nbsp;is <b>123456</b></p><script>var x = 1;</script>"
+            "<img src=\"https://t.example.com/pixel.gif\" width=\"1\"></body></html>"
+        )
+        text = html_to_text(content)
+
+        assert "color" not in text and "var x" not in text and "tracking" not in text
+        assert "pixel" not in text
+        assert "Your code is  123456" in text
+
+    @pytest.mark.unit
+    def test_strips_quotes_signature_and_boilerplate(self, preprocessor):
+        """Test that replies, signatures and footer lines are dropped."""
+        content = (
+            "Your code is 123456\n"
+            "Unsubscribe from these emails\n"
+            "© 2024 Example Inc. All rights reserved.\n"
+            "> quoted line with code 999999\n"
+            "-- \n"
+            "Bob, Example Inc.\n"
+            "On Mon, Jan 1, 2024 at 10:00 Alice wrote:\n"
+            "Old code 888888\n"
+        )
+
+        assert preprocessor.clean(content) == "Your code is 123456"
+
+    @pytest.mark.unit
+    def test_reply_quote_removed(self, preprocessor):
+        """Test that everything after a reply header is dropped."""
+        content = "Here is the code 123456\nOn Mon, Jan 1, 2024 at 10:00 Alice <a@example.com> wrote:\nold 888888"
+
+        assert "888888" not in preprocessor.clean(content)
+
+    @pytest.mark.unit
+    def test_keyword_windows(self, preprocessor):
+        """Test that only text around keywords is kept, with nearby windows merged."""
+        filler = "lorem ipsum " * 20
+        content = f"{filler}Your verification code is 482913.{filler}Use the PIN 7731 at the door.{filler}"
+
+        text = preprocessor.process(content)
+
+        assert "482913" in text and "7731" in text
+        assert text.count("\n...\n") == 1
+        assert len(text) < len(content) / 2
+
+    @pytest.mark.unit
+    def test_no_keyword_keeps_beginning(self, preprocessor):
+        """Test that mail without keywords keeps its start, capped to the token budget."""
+        content = "Enter X7K2P9 to continue. " + "filler " * 200
+
+        text = preprocessor.process(content)
+
+        assert text.startswith("Enter X7K2P9")
+        assert len(text) == 400
+
+    @pytest.mark.unit
+    def test_empty(self, preprocessor):
+        """Test that empty content stays empty."""
+        assert preprocessor.process("") == ""
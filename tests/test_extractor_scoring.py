@@ -0,0 +1,67 @@
+# tests/test_extractor_scoring.py
+import pytest
+
+from gmail_reader.extractor.scoring import CandidateScorer, ExtractionResult
+
+
+class TestCandidateScorer:
+
+    @pytest.fixture
+    def scorer(self):
+        return CandidateScorer()
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("content,expected", [
+        ("Your verification code is: 123456", "123456"),
+        ("482913 is your confirmation code. Ref 5521", "482913"),
+        ("Dear Bob, use one-time passcode 449911 to approve the payment of $4412.", "449911"),
+        ("<p>Hi,</p><p>Your code:</p><p><b>AB12CD</b></p><p>Req 4411</p>", "AB12CD"),
+    ])
+    def test_confident_on_typical_mail(self, scorer, content, expected):
+        """Test that common OTP templates score above the default threshold."""
+        result = scorer.best(content)
+
+        assert result.code == expected
+        assert result.confidence >= 0.7
+        assert result.source == "scorer"
+
+    @pytest.mark.unit
+    def test_rival_codes_lower_confidence(self, scorer):
+        """Test that two equally labelled codes make the result ambiguous."""
+        result = scorer.best("Use code 123456 or code 654321")
+
+        assert result.confidence < 0.5
+
+    @pytest.mark.unit
+    def test_label_credited_to_first_code(self, scorer):
+        """Test that a keyword only fully supports the code right after it."""
+        scores = dict(scorer.score("Codes: 1234, 5678"))
+
+        assert scores["1234"] > scores["5678"]
+
+    @pytest.mark.unit
+    def test_skips_non_codes(self, scorer):
+        """Test that dates, phone numbers, amounts, order numbers and words are not candidates."""
+        content = "Meeting on 2024-01-01, call 555-1234. Order #99812 total $1200, see example.com/12345 Welcome"
+
+        assert scorer.score(content) == []
+        assert scorer.best(content) == ExtractionResult(None, 0.0, "scorer")
+
+    @pytest.mark.unit
+    def test_year_penalized(self, scorer):
+        """Test that year-like numbers score below other codes."""
+        scores = dict(scorer.score("Copyright 2024. Your code is 7391"))
+
+        assert scores["7391"] > scores.get("2024", 0.0)
+
+    @pytest.mark.unit
+    def test_html_emphasis(self, scorer):
+        """Test that emphasized tokens outscore plain ones and markup is ignored."""
+        content = (
+            "<html><head><style>.x { color: #123456 }</style></head>"
+            "<body><p>Ref 882211</p><span style=\"font-size:24px\">739104</span></body></html>"
+        )
+        candidates = scorer.score(content)
+
+        assert candidates[0].code == "739104"
+        assert "123456" not in dict(candidates)
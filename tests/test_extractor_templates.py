@@ -0,0 +1,97 @@
+# tests/test_extractor_templates.py
+import json
+import pytest
+
+from gmail_reader.extractor.templates import RULES_VERSION, TemplateLearner, sender_key
+
+SENDER = "Acme Security <No-Reply@Acme.com>"
+
+def acme_mail(name, code):
+    return f"Hello {name},\n\nYour Acme sign-in code is {code}.\nIt expires in 10 minutes.\nRef 88{code[::-1]}"
+
+class TestTemplateLearner:
+    
+    @pytest.mark.unit
+    def test_sender_key(self):
+        """Test sender normalization."""
+        assert sender_key(SENDER) == "no-reply@acme.com"
+        assert sender_key("plain@example.com") == "plain@example.com"
+    
+    @pytest.mark.unit
+    def test_learns_after_min_samples(self):
+        """Test that a rule appears only after enough samples."""
+        learner = TemplateLearner(min_samples=2)
+        
+        assert learner.learn(SENDER, acme_mail("Bob", "123456"), "123456") is False
+        assert learner.extract(SENDER, acme_mail("Eve", "999999")) is None
+        
+        assert learner.learn(SENDER, acme_mail("Alice", "654321"), "654321") is True
+        assert learner.extract(SENDER, acme_mail("Eve", "999999")) == "999999"
+    
+    @pytest.mark.unit
+    def test_rule_tolerates_reflowed_whitespace(self):
+        """Test that whitespace differences do not break the anchor."""
+        learner = TemplateLearner()
+        learner.learn(SENDER, acme_mail("Bob", "123456"), "123456")
+        learner.learn(SENDER, acme_mail("Alice", "654321"), "654321")
+        
+        assert learner.extract(SENDER, "Your  Acme\nsign-in code is 777000.") == "777000"
+    
+    @pytest.mark.unit
+    def test_rule_does_not_match_other_templates(self):
+        """Test that unrelated content is left to the LLM."""
+        learner = TemplateLearner()
+        learner.learn(SENDER, acme_mail("Bob", "123456"), "123456")
+        learner.learn(SENDER, acme_mail("Alice", "654321"), "654321")
+        
+        assert learner.extract(SENDER, "Your order 123456 has shipped") is None
+        assert learner.extract("other@example.com", acme_mail("Bob", "123456")) is None
+    
+    @pytest.mark.unit
+    def test_code_leading_the_text(self):
+        """Test anchoring on the text after the code."""
+        learner = TemplateLearner()
+        learner.learn(SENDER, "AB12CD is your Acme confirmation code. Ref 1", "AB12CD")
+        learner.learn(SENDER, "XY98ZW is your Acme confirmation code. Ref 2", "XY98ZW")
+        
+        assert learner.extract(SENDER, "QQ11RR is your Acme confirmation code. Ref 3") == "QQ11RR"
+        assert learner.extract(SENDER, "Ref 77 QQ11RR is your invoice") is None
+    
+    @pytest.mark.unit
+    def test_no_rule_without_shared_anchor(self):
+        """Test that samples without common context produce no rule."""
+        learner = TemplateLearner()
+        learner.learn(SENDER, "Use 123456 now", "123456")
+        
+        assert learner.learn(SENDER, "Token: 654321", "654321") is False
+        assert learner.rules == {}
+    
+    @pytest.mark.unit
+    def test_relearns_when_template_changes(self):
+        """Test that a template change bumps the rule revision."""
+        learner = TemplateLearner(max_samples=2)
+        learner.learn(SENDER, acme_mail("Bob", "123456"), "123456")
+        learner.learn(SENDER, acme_mail("Alice", "654321"), "654321")
+        
+        learner.learn(SENDER, "New look! Your Acme login code: AB12CD", "AB12CD")
+        learner.learn(SENDER, "New look! Your Acme login code: ZZ98YY", "ZZ98YY")
+        
+        rule = learner.rules["no-reply@acme.com"]
+        assert rule.revision == 2
+        assert learner.extract(SENDER, "New look! Your Acme login code: QQ11RR") == "QQ11RR"
+    
+    @pytest.mark.unit
+    def test_persistence_and_versioning(self, tmp_path):
+        """Test that rules are saved, reloaded and version-checked."""
+        path = tmp_path / "rules.json"
+        learner = TemplateLearner(path=path)
+        learner.learn(SENDER, acme_mail("Bob", "123456"), "123456")
+        learner.learn(SENDER, acme_mail("Alice", "654321"), "654321")
+        
+        assert TemplateLearner(path=path).extract(SENDER, acme_mail("Eve", "999999")) == "999999"
+        assert "Bob" not in path.read_text()
+        
+        data = json.loads(path.read_text())
+        data["version"] = RULES_VERSION + 1
+        path.write_text(json.dumps(data))
+        assert TemplateLearner(path=path).rules == {}
@@ -0,0 +1,49 @@
+# tests/test_imports.py
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["langchain", "googleapiclient.discovery", "google_auth_oauthlib", "httpx"]
+
+
+def loaded_heavy_modules(statement):
+    """Run a statement in a fresh interpreter and return the heavy modules it imported."""
+    script = (
+        f"import sys\n{statement}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+class TestLazyImports:
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("statement", [
+        "import gmail_reader",
+        "import gmail_reader.extractor",
+        "from gmail_reader.extractor.patterns import RegexPatterns",
+        "from gmail_reader.extractor import VerificationCodeExtractor; VerificationCodeExtractor(llm_config={})",
+    ])
+    def test_no_heavy_imports(self, statement):
+        """Test that light entry points import none of the heavy dependencies."""
+        assert loaded_heavy_modules(statement) == []
+
+    @pytest.mark.unit
+    def test_client_defers_discovery_and_oauth_flow(self):
+        """Test that creating a client imports neither the discovery module nor the OAuth flow."""
+        assert loaded_heavy_modules("from gmail_reader import GmailClient; GmailClient()") == []
+
+    @pytest.mark.unit
+    def test_lazy_attributes(self):
+        """Test that lazily exported names resolve and unknown names still fail."""
+        import gmail_reader
+        import gmail_reader.extractor
+        from gmail_reader.client import GmailClient
+
+        assert gmail_reader.GmailClient is GmailClient
+        assert "AsyncGmailClient" in dir(gmail_reader)
+        assert gmail_reader.extractor.ExtractionResult.__name__ == "ExtractionResult"
+        with pytest.raises(AttributeError):
+            gmail_reader.DoesNotExist
@@ -0,0 +1,120 @@
+# tests/test_index.py
+import pytest
+
+from gmail_reader.cache import MessageCache
+from gmail_reader.client import GmailClient
+from gmail_reader.index import MessageIndex
+from gmail_reader.query import UnsupportedQueryError, matches, parse_query
+
+NOW = 1_700_000_000
+DAY = 86400
+
+
+@pytest.fixture
+def backend(fake_gmail):
+    fake_gmail.add_message(subject="Your verification code", sender="GitHub <noreply@github.com>",
+                           body="Your code is 123456", internal_date=(NOW - 3 * DAY) * 1000,
+                           label_ids=["INBOX"])
+    fake_gmail.add_message(subject="Sign-in PIN", sender="Bank <alerts@bank.example>",
+                           body="Use PIN 4321 to sign in", internal_date=(NOW - 3600) * 1000)
+    fake_gmail.add_message(subject="Weekly newsletter", sender="news@shop.example",
+                           body="Deals of the week", internal_date=(NOW - 600) * 1000)
+    return fake_gmail
+
+
+@pytest.fixture
+def index():
+    index = MessageIndex(path=None, clock=lambda: NOW)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def client(backend, index):
+    client = GmailClient(index=index)
+    client.service = backend.build_service()
+    client.get_messages(client.list_message_ids(max_results=10))
+    return client
+
+
+def subjects(messages):
+    return [message["subject"] for message in messages]
+
+
+class TestMessageIndex:
+
+    @pytest.mark.unit
+    def test_fetched_messages_are_indexed(self, client, index):
+        """Test that full messages fetched through the client populate the index."""
+        assert len(index) == 3
+        assert subjects(index.search("")) == ["Weekly newsletter", "Sign-in PIN", "Your verification code"]
+
+    @pytest.mark.unit
+    def test_operators(self, client, index):
+        """Test the supported subset of Gmail query syntax."""
+        assert subjects(index.search("from:github.com")) == ["Your verification code"]
+        assert subjects(index.search("from:noreply@github.com")) == ["Your verification code"]
+        assert subjects(index.search("subject:pin")) == ["Sign-in PIN"]
+        assert subjects(index.search('"code is 123456"')) == ["Your verification code"]
+        assert subjects(index.search("is:unread")) == ["Weekly newsletter", "Sign-in PIN"]
+        assert subjects(index.search("is:read")) == ["Your verification code"]
+        assert subjects(index.search("newer_than:1d")) == ["Weekly newsletter", "Sign-in PIN"]
+        assert subjects(index.search("older_than:2d")) == ["Your verification code"]
+        assert subjects(index.search("subject:(code OR pin) -from:bank.example")) == ["Your verification code"]
+        assert subjects(index.search("{deals 4321} is:unread", max_results=1)) == ["Weekly newsletter"]
+
+    @pytest.mark.unit
+    def test_agrees_with_local_matching(self, client, index):
+        """Test that the index and query.matches split text into the same words, underscores included."""
+        messages = index.search("")
+        for query in ("_", "-_", "subject:_", "sign_in", "from:(noreply OR _)"):
+            expected = [m["id"] for m in messages if matches(parse_query(query), m, now=NOW)]
+            assert index.search_ids(query) == expected, query
+
+    @pytest.mark.unit
+    def test_unsupported_queries(self, client, index):
+        """Test that operators the index cannot evaluate are rejected."""
+        assert not index.supports("has:attachment")
+        assert index.supports("from:x newer_than:2d")
+        with pytest.raises(UnsupportedQueryError):
+            index.search("has:attachment")
+
+    @pytest.mark.unit
+    def test_reindexing_replaces(self, client, index, backend):
+        """Test that adding a message again replaces its text and labels."""
+        message = dict(index.search("subject:pin")[0])
+        message["label_ids"] = ["INBOX"]
+        message["subject"] = "Sign-in code"
+        index.add(message)
+
+        assert len(index) == 3
+        assert index.search("subject:pin") == []
+        assert subjects(index.search("subject:code is:read")) == ["Sign-in code", "Your verification code"]
+        index.remove(message["id"])
+        assert message["id"] not in index
+
+    @pytest.mark.unit
+    def test_search_messages_uses_index(self, client, backend):
+        """Test that the client answers supported searches locally and others remotely, with summaries either way."""
+        backend.http_requests = 0
+
+        local = client.search_messages("from:github.com", max_results=5)
+        assert backend.http_requests == 0
+        remote = client.search_messages("from:github.com", local=False)
+        assert local == remote
+        assert list(local[0]) == ["id", "subject", "sender", "date", "snippet"]
+        assert backend.http_requests > 0
+        client.search_messages("has:attachment")
+        with pytest.raises(UnsupportedQueryError):
+            client.search_messages("has:attachment", local=True)
+
+    @pytest.mark.unit
+    def test_build_from_cache(self, backend, index):
+        """Test indexing messages already in the message cache, dated from their Date header."""
+        cache = MessageCache(path=None)
+        client = GmailClient(cache=cache)
+        client.service = backend.build_service()
+        client.get_messages(client.list_message_ids(max_results=10))
+
+        assert index.add_many(cache.iter_messages(chunk_size=2)) == 3
+        assert subjects(index.search("newer_than:1d")) == ["Weekly newsletter", "Sign-in PIN"]
@@ -0,0 +1,101 @@
+# tests/test_message.py
+import base64
+from unittest.mock import patch
+
+import pytest
+
+from gmail_reader.cache import MessageCache
+from gmail_reader.client import GmailClient
+from gmail_reader.message import MESSAGE_KEYS, Message
+
+
+def resource(body="Your code is 123456"):
+    return {
+        "id": "msg1",
+        "threadId": "thread1",
+        "snippet": "Your code is",
+        "labelIds": ["INBOX", "UNREAD"],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "Subject", "value": "Code"},
+                {"name": "From", "value": "noreply@example.com"},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 12:00:00 +0000"},
+            ],
+            "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()},
+        },
+    }
+
+
+class TestMessage:
+
+    @pytest.mark.unit
+    def test_dict_compatible(self):
+        """Test that a Message reads like the dictionaries returned before."""
+        message = Message(resource())
+
+        assert message == {
+            "id": "msg1",
+            "thread_id": "thread1",
+            "subject": "Code",
+            "sender": "noreply@example.com",
+            "recipient": "me@example.com",
+            "date": "Mon, 1 Jan 2024 12:00:00 +0000",
+            "snippet": "Your code is",
+            "body": "Your code is 123456",
+            "label_ids": ["INBOX", "UNREAD"],
+        }
+        assert list(message) == list(MESSAGE_KEYS)
+        assert message["subject"] == message.subject == "Code"
+        assert message.get("missing", "default") == "default"
+        assert "body" in message and "payload" not in message
+        with pytest.raises(KeyError):
+            message["payload"]
+
+    @pytest.mark.unit
+    def test_body_decoded_lazily_once(self):
+        """Test that the body is decoded on first access only."""
+        with patch("gmail_reader.message.payload_text", return_value="decoded") as decode:
+            message = Message(resource())
+            assert message.subject == "Code"
+            decode.assert_not_called()
+
+            assert message["body"] == "decoded"
+            assert message.body == "decoded"
+            decode.assert_called_once()
+
+    @pytest.mark.unit
+    def test_compact(self):
+        """Test that instances use slots rather than a per-instance dict."""
+        message = Message(resource())
+
+        assert not hasattr(message, "__dict__")
+        with pytest.raises(AttributeError):
+            message.extra = 1
+        assert message.to_dict()["body"] == "Your code is 123456"
+        assert message.summary() == {
+            "id": "msg1", "subject": "Code", "sender": "noreply@example.com",
+            "date": "Mon, 1 Jan 2024 12:00:00 +0000", "snippet": "Your code is",
+        }
+
+    @pytest.mark.unit
+    def test_empty_resource(self):
+        """Test that a resource without payload yields empty fields."""
+        message = Message({})
+
+        assert message["subject"] == "" and message.body == "" and message.label_ids == []
+
+    @pytest.mark.unit
+    def test_client_and_cache(self, fake_gmail):
+        """Test that the client returns Messages and the cache stores plain dicts."""
+        fake_gmail.add_message(subject="Hello", body="Your code is 654321")
+        client = GmailClient(cache=MessageCache(path=None))
+        client.service = fake_gmail.build_service()
+
+        fetched = client.get_messages(client.list_message_ids())
+        cached = client.get_messages(client.list_message_ids())
+
+        assert isinstance(fetched[0], Message)
+        assert cached == [dict(fetched[0])]
+        assert cached[0]["body"] == "Your code is 654321"
@@ -0,0 +1,186 @@
+# tests/test_mime.py
+import base64
+import tracemalloc
+from email.message import EmailMessage
+
+import pytest
+
+from gmail_reader.client import GmailClient
+from gmail_reader.mime import RawMessageReader, decode_data, find_text_part, payload_text, read_raw, walk_parts
+
+
+def encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def text_part(mime_type, text, **extra):
+    return {"mimeType": mime_type, "body": {"size": len(text), "data": encode(text.encode())}, **extra}
+
+
+def nested_payload():
+    """multipart/mixed holding an attachment and a multipart/alternative, as Gmail returns it."""
+    return {
+        "mimeType": "multipart/mixed",
+        "headers": [{"name": "Subject", "value": "Invoice"}],
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    text_part("text/plain", "Your code is 123456"),
+                    text_part("text/html", "<p>Your code is 123456</p>"),
+                ],
+            },
+            {"mimeType": "application/pdf", "filename": "invoice.pdf",
+             "body": {"size": 50000, "attachmentId": "att-1"}},
+        ],
+    }
+
+
+def raw_message(plain="Your code is 123456", html=None, attachment=None, attachment_first=False, cte=None):
+    message = EmailMessage()
+    message["Subject"] = "Your code"
+    message["From"] = "noreply@service.com"
+    message["To"] = "me@example.com"
+    message.set_content(plain, cte=cte)
+    if html is not None:
+        message.add_alternative(html, subtype="html")
+    if attachment is not None:
+        if attachment_first:
+            wrapper = EmailMessage()
+            for name in ("Subject", "From", "To"):
+                wrapper[name] = message[name]
+            wrapper.add_attachment(attachment, maintype="application", subtype="octet-stream", filename="big.bin")
+            body = EmailMessage()
+            body.set_content(plain)
+            wrapper.attach(body)
+            message = wrapper
+        else:
+            message.add_attachment(attachment, maintype="application", subtype="octet-stream", filename="big.bin")
+    return encode(message.as_bytes())
+
+
+class TestPayloadText:
+
+    @pytest.mark.unit
+    def test_walk_parts_in_document_order(self):
+        """Test that the walker visits nested parts depth first, in order."""
+        types = [part["mimeType"] for part in walk_parts(nested_payload())]
+
+        assert types == ["multipart/mixed", "multipart/alternative", "text/plain", "text/html", "application/pdf"]
+
+    @pytest.mark.unit
+    def test_nested_text_part(self):
+        """Test that text/plain inside multipart/alternative inside multipart/mixed is found."""
+        assert payload_text(nested_payload()) == "Your code is 123456"
+        assert GmailClient._get_message_body(nested_payload()) == "Your code is 123456"
+
+    @pytest.mark.unit
+    def test_html_fallback_and_attachments(self):
+        """Test that HTML is used without a plain part, and text attachments are never the body."""
+        payload = {
+            "mimeType": "multipart/mixed",
+            "parts": [
+                text_part("text/plain", "attached notes", filename="notes.txt"),
+                text_part("text/html", "<b>Code 654321</b>"),
+            ],
+        }
+
+        assert find_text_part(payload)["mimeType"] == "text/html"
+        assert payload_text(payload) == "<b>Code 654321</b>"
+        assert payload_text({"mimeType": "multipart/mixed", "parts": []}) == ""
+
+    @pytest.mark.unit
+    def test_charset(self):
+        """Test that the part's declared charset is used."""
+        part = {
+            "mimeType": "text/plain",
+            "headers": [{"name": "Content-Type", "value": 'text/plain; charset="iso-8859-1"'}],
+            "body": {"data": encode("Código 123456".encode("iso-8859-1"))},
+        }
+
+        assert payload_text(part) == "Código 123456"
+
+    @pytest.mark.unit
+    def test_max_bytes_decodes_a_prefix(self):
+        """Test that a byte limit decodes only the start of the data, unpadded data included."""
+        data = encode(b"0123456789" * 1000).rstrip("=")
+
+        assert decode_data(data, max_bytes=5) == b"01234"
+        assert decode_data(data) == b"0123456789" * 1000
+        assert payload_text(text_part("text/plain", "é" * 10), max_bytes=5) == "éé"
+
+
+class TestRawMessages:
+
+    @pytest.mark.unit
+    def test_plain_and_headers(self):
+        """Test parsing a single-part raw message."""
+        parsed = read_raw(raw_message())
+
+        assert parsed["subject"] == "Your code"
+        assert parsed["sender"] == "noreply@service.com"
+        assert parsed["body"].strip() == "Your code is 123456"
+
+    @pytest.mark.unit
+    def test_nested_multipart_with_attachment(self):
+        """Test that the text of an alternative nested in a mixed message is found."""
+        raw = raw_message(html="<p>Your code is 123456</p>", attachment=b"\0" * 100000)
+
+        assert read_raw(raw, chunk_size=1000)["body"].strip() == "Your code is 123456"
+
+    @pytest.mark.unit
+    def test_quoted_printable_and_limit(self):
+        """Test quoted-printable bodies and the byte limit."""
+        raw = raw_message(plain="Código: 123456 " + "x" * 200, cte="quoted-printable")
+
+        assert b"C=C3=B3digo" in base64.urlsafe_b64decode(raw)
+        assert read_raw(raw)["body"].startswith("Código: 123456 xxx")
+        assert read_raw(raw, max_bytes=11)["body"] == "Código: 12"
+
+    @pytest.mark.unit
+    def test_html_only(self):
+        """Test that an HTML-only message yields its HTML."""
+        message = EmailMessage()
+        message.set_content("<p>Code 777777</p>", subtype="html")
+
+        assert read_raw(encode(message.as_bytes()))["body"].strip() == "<p>Code 777777</p>"
+
+    @pytest.mark.unit
+    def test_stops_after_text_part(self):
+        """Test that reading stops once the plain text is complete."""
+        message = raw_message(attachment=b"\0" * 100000)
+        data = base64.urlsafe_b64decode(message)
+        split = data.index(b"big.bin")
+        reader = RawMessageReader()
+
+        reader.feed(data[:split])
+
+        assert reader.done
+        assert reader.close().strip() == "Your code is 123456"
+
+    @pytest.mark.unit
+    def test_memory_bounded_by_text_part(self):
+        """Test that an attachment before the text is skipped rather than kept."""
+        raw = raw_message(attachment=b"\1" * 4_000_000, attachment_first=True)
+
+        tracemalloc.start()
+        parsed = read_raw(raw)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert parsed["body"].strip() == "Your code is 123456"
+        assert peak < 1_000_000
+
+    @pytest.mark.unit
+    def test_client_reads_raw_messages(self, fake_gmail):
+        """Test GmailClient.read_raw_message against the fake backend."""
+        message = fake_gmail.add_message(subject="Hi", body="Your code is 123456", html="<p>123456</p>")
+        client = GmailClient()
+        client.service = fake_gmail.build_service()
+
+        parsed = client.read_raw_message(message["id"])
+
+        assert parsed["subject"] == "Hi"
+        assert parsed["body"].strip() == "Your code is 123456"
+        assert parsed["label_ids"] == ["INBOX", "UNREAD"]
+        assert client.read_raw_message("missing") == {}
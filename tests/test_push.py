@@ -0,0 +1,91 @@
+# tests/test_push.py
+import base64
+import json
+import pytest
+from unittest.mock import Mock
+
+from gmail_reader.client import GmailClient
+from gmail_reader.push import HttpPushReceiver, PushNotification, PushReceiver, decode_push_envelope
+from gmail_reader.sync import HistoryCheckpoint, IncrementalSync
+from gmail_reader.testing import LocalPublisher
+
+@pytest.fixture
+def client(fake_gmail):
+    client = GmailClient()
+    client.service = fake_gmail.build_service()
+    return client
+
+@pytest.fixture
+def sync(client):
+    sync = IncrementalSync(client, HistoryCheckpoint(path=None))
+    sync.poll()
+    return sync
+
+class TestDecoding:
+    
+    @pytest.mark.unit
+    def test_decode_push_envelope(self):
+        """Test decoding a Pub/Sub push request body."""
+        data = base64.b64encode(json.dumps({"emailAddress": "me@example.com", "historyId": 9876}).encode())
+        envelope = {"message": {"data": data.decode(), "messageId": "1"}, "subscription": "sub"}
+        
+        assert decode_push_envelope(envelope) == PushNotification("me@example.com", "9876")
+
+class TestPushReceiver:
+    
+    @pytest.mark.unit
+    def test_notify_fetches_new_messages(self, sync, fake_gmail):
+        """Test that a notification triggers a history fetch."""
+        on_messages = Mock()
+        receiver = PushReceiver(sync, on_messages)
+        fake_gmail.add_message(subject="New")
+        
+        messages = receiver.notify(PushNotification("me@example.com", str(fake_gmail.history_id)))
+        
+        assert [msg["subject"] for msg in messages] == ["New"]
+        on_messages.assert_called_once_with(messages)
+    
+    @pytest.mark.unit
+    def test_stale_notification_is_skipped(self, sync, fake_gmail):
+        """Test that notifications already covered by the checkpoint cost no calls."""
+        receiver = PushReceiver(sync, Mock())
+        fake_gmail.api_calls.clear()
+        
+        assert receiver.notify(PushNotification("me@example.com", str(fake_gmail.history_id))) == []
+        assert fake_gmail.api_calls == []
+
+class TestHttpPushReceiver:
+    
+    @pytest.mark.integration
+    def test_end_to_end_with_local_publisher(self, client, sync, fake_gmail):
+        """Test watch, publish and fetch through the local stand-in publisher."""
+        received = []
+        receiver = HttpPushReceiver(sync, received.extend, host="127.0.0.1", port=0)
+        receiver.start()
+        try:
+            LocalPublisher(receiver.url).attach(fake_gmail)
+            response = client.watch("projects/test/topics/gmail", label_ids=["INBOX"])
+            assert response["historyId"] == str(fake_gmail.history_id)
+            
+            fake_gmail.api_calls.clear()
+            fake_gmail.add_message(subject="Pushed", body="Your code is 424242")
+            
+            assert [msg["subject"] for msg in received] == ["Pushed"]
+            assert ("GET", "messages") not in fake_gmail.api_calls
+            
+            client.stop_watch()
+            fake_gmail.add_message(subject="Unwatched")
+            assert len(received) == 1
+        finally:
+            receiver.stop()
+    
+    @pytest.mark.integration
+    def test_rejects_wrong_token(self, sync, fake_gmail):
+        """Test the verification token check."""
+        receiver = HttpPushReceiver(sync, Mock(), host="127.0.0.1", port=0, verification_token="secret")
+        receiver.start()
+        try:
+            assert LocalPublisher(receiver.url + "?token=wrong").publish("me@example.com", "1") == 403
+            assert LocalPublisher(receiver.url + "?token=secret").publish("me@example.com", "1") == 204
+        finally:
+            receiver.stop()
@@ -0,0 +1,190 @@
+# tests/test_query.py
+import time
+
+import pytest
+
+from gmail_reader.client import SUMMARY_FIELDS, GmailClient
+from gmail_reader.index import MessageIndex
+from gmail_reader.query import (
+    And, Not, Or, Term, UnsupportedQueryError, all_of, any_of, check_supported, date_bound, exclude, matches,
+    parse_query, plan_queries, term, to_query,
+)
+
+NOW = 1_700_000_000
+
+
+class TestParseQuery:
+
+    @pytest.mark.unit
+    def test_terms_and_precedence(self):
+        """Test that OR binds tighter than the implicit AND, as in Gmail."""
+        assert parse_query("from:a@b.com subject:code OR subject:pin newer_than:2d") == And([
+            Term("from", "a@b.com"),
+            Or([Term("subject", "code"), Term("subject", "pin")]),
+            Term("newer_than", "2d"),
+        ])
+
+    @pytest.mark.unit
+    def test_negation_grouping_and_phrases(self):
+        """Test negation, parentheses, OR-groups and quoted phrases."""
+        assert parse_query('-is:read (code OR pin)') == And([
+            Not(Term("is", "read")), Or([Term(None, "code"), Term(None, "pin")])
+        ])
+        assert parse_query('{a b} subject:"your code"') == And([
+            Or([Term(None, "a"), Term(None, "b")]), Term("subject", "your code")
+        ])
+        assert parse_query("SUBJECT:(code pin)") == And([Term("subject", "code"), Term("subject", "pin")])
+        assert parse_query("a AND b") == And([Term(None, "a"), Term(None, "b")])
+        assert parse_query("") == And([])
+
+    @pytest.mark.unit
+    def test_malformed_queries(self):
+        """Test that unbalanced groups are rejected."""
+        for query in ("(a b", "a)", "subject:(a b"):
+            with pytest.raises(UnsupportedQueryError):
+                parse_query(query)
+
+    @pytest.mark.unit
+    def test_supported_operators(self):
+        """Test which operators can be evaluated locally."""
+        check_supported(parse_query("from:x to:y subject:z is:unread is:read in:anywhere label:category-updates newer_than:1y after:2024/1/31"))
+        for query in ("has:attachment", "label:work", "is:muted", "larger:5M", "newer_than:soon", "before:yesterday"):
+            with pytest.raises(UnsupportedQueryError):
+                check_supported(parse_query(query))
+
+    @pytest.mark.unit
+    def test_date_bounds(self):
+        """Test relative ages and absolute dates."""
+        assert date_bound(Term("newer_than", "2d"), now=1_000_000) == (">=", 1_000_000 - 2 * 86400)
+        assert date_bound(Term("older_than", "3h"), now=1_000_000) == ("<", 1_000_000 - 3 * 3600)
+        assert date_bound(Term("after", "2024/01/31")) == (">=", 1706659200)
+        assert date_bound(Term("before", "1700000000")) == ("<", 1700000000)
+
+
+class TestQueryBuilder:
+
+    @pytest.mark.unit
+    def test_quoting(self):
+        """Test that values Gmail would split or reinterpret are quoted."""
+        assert term("from", "github.com") == "from:github.com"
+        assert term("subject", "your code") == 'subject:"your code"'
+        assert term("subject", 'say "hi"') == 'subject:"say hi"'
+        assert term(None, "re:hello") == '"re:hello"'
+        assert term(None, "-1") == '"-1"'
+        assert term(None, "OR") == '"OR"'
+        for value in ("a b", "x(y)", "{z}", "re:hi", "OR", "-x", ""):
+            assert parse_query(term("subject", value)) == Term("subject", value)
+
+    @pytest.mark.unit
+    def test_grouping(self):
+        """Test that combined queries keep the meaning of their parts."""
+        assert any_of("from:a", "subject:b is:unread") == "from:a OR (subject:b is:unread)"
+        assert all_of("from:a OR from:b", "is:unread newer_than:2d") == "(from:a OR from:b) is:unread newer_than:2d"
+        assert exclude("from:a subject:b") == "-(from:a subject:b)"
+        assert any_of("subject:code") == "subject:code"
+        query = '-(a OR "b c") {d e} subject:(f OR g) -from:h'
+        assert parse_query(to_query(parse_query(query))) == parse_query(query)
+
+
+class TestMatches:
+
+    MESSAGE = {
+        "id": "1", "subject": "Your verification code", "sender": "GitHub <noreply@github.com>",
+        "recipient": "me@example.com", "snippet": "Your code is 123456", "body": "Your code is 123456",
+        "date": "Tue, 14 Nov 2023 20:00:00 +0000", "label_ids": ["INBOX", "UNREAD"],
+    }
+
+    def check(self, query):
+        return matches(parse_query(query), self.MESSAGE, now=NOW)
+
+    @pytest.mark.unit
+    def test_text_and_labels(self):
+        """Test word-based text matching and label operators."""
+        assert self.check("from:github.com subject:code")
+        assert self.check('"code is 123456" is:unread in:inbox')
+        assert not self.check("subject:codes")
+        assert not self.check("is:read OR label:starred")
+        assert self.check("-from:bank (pin OR verification)")
+
+    @pytest.mark.unit
+    def test_dates(self):
+        """Test date operators against the Date header."""
+        assert self.check("newer_than:1d after:2023/11/14")
+        assert not self.check("older_than:1d")
+        assert not self.check("before:2023/11/14")
+
+    @pytest.mark.unit
+    def test_unsupported(self):
+        """Test that operators check_supported rejects raise rather than guess."""
+        for query in ("has:attachment", "label:work"):
+            with pytest.raises(UnsupportedQueryError):
+                self.check(query)
+
+
+class TestPlanQueries:
+
+    @pytest.mark.unit
+    def test_groups_equivalent_queries(self):
+        """Test that queries differing only in spacing, case and term order are grouped."""
+        groups = plan_queries({
+            "unread bank": "from:bank is:unread",
+            "bank unread": "IS:unread   from:bank",
+            "codes": "subject:(code OR pin)",
+            "pins": "subject:pin OR subject:code",
+            "files": "has:attachment",
+            "broken": "(unread",
+        })
+        assert list(groups.values()) == [["unread bank", "bank unread"], ["codes", "pins"], ["files"], ["broken"]]
+        assert "(unread" in groups
+
+    @pytest.mark.unit
+    def test_search_many(self, fake_gmail):
+        """Test that searches take one listing batch and one fetch batch, returning what separate searches return."""
+        now = int(time.time())
+        fake_gmail.add_message(subject="Your code", sender="noreply@github.com", internal_date=(now - 60) * 1000)
+        fake_gmail.add_message(subject="Security alert", sender="alerts@bank.example",
+                               internal_date=(now - 3600) * 1000, label_ids=["INBOX"])
+        fake_gmail.add_message(subject="Old news", sender="news@shop.example",
+                               internal_date=(now - 30 * 86400) * 1000, label_ids=["INBOX", "STARRED"])
+        client = GmailClient()
+        client.service = fake_gmail.build_service()
+        queries = {
+            "unread": "is:unread",
+            "bank": "from:bank",
+            "recent": "newer_than:7d",
+            "also recent": "newer_than:7d ",
+            "starred": "is:starred",
+            "codes": all_of(any_of(term("subject", "code"), term("subject", "pin")), "newer_than:1d"),
+        }
+
+        fake_gmail.http_requests = 0
+        results = client.search_many(queries, max_results=2)
+        assert fake_gmail.http_requests == 2
+        assert list(results) == list(queries)
+        assert {name: [m["subject"] for m in messages] for name, messages in results.items()} == {
+            "unread": ["Your code"],
+            "bank": ["Security alert"],
+            "recent": ["Your code", "Security alert"],
+            "also recent": ["Your code", "Security alert"],
+            "starred": ["Old news"],
+            "codes": ["Your code"],
+        }
+        for name, query in queries.items():
+            assert results[name] == client.search_messages(query, max_results=2)
+
+    @pytest.mark.unit
+    def test_search_many_uses_index(self, fake_gmail, tmp_path):
+        """Test that queries the index supports are answered from it and the rest from Gmail."""
+        fake_gmail.add_message(subject="Security alert", sender="alerts@bank.example", label_ids=["INBOX"])
+        fake_gmail.add_message(subject="Report", sender="news@shop.example", label_ids=["INBOX", "WORK"])
+        client = GmailClient(index=MessageIndex(tmp_path / "index.db"))
+        client.service = fake_gmail.build_service()
+        client.index.add_many(client.get_messages(client.list_message_ids()))
+
+        fake_gmail.http_requests = 0
+        results = client.search_many({"bank": "from:bank", "work": "label:work", "bad": "(work"})
+        assert fake_gmail.http_requests == 2
+        assert [m["subject"] for m in results["bank"]] == ["Security alert"]
+        assert [m["subject"] for m in results["work"]] == ["Report"]
+        assert results["bad"] == []
+        assert set(results["bank"][0]) == set(SUMMARY_FIELDS)
@@ -0,0 +1,57 @@
+# tests/test_ratelimit.py
+import pytest
+
+from gmail_reader.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    @pytest.mark.unit
+    def test_burst_then_rate(self):
+        """Test that a full bucket allows a burst and then paces to the rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(5)]
+
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        assert waits[3] == pytest.approx(0.5)
+        assert clock.now == pytest.approx(1.0)
+
+    @pytest.mark.unit
+    def test_try_acquire_and_debit(self):
+        """Test non-blocking acquisition, waiting times and debiting into debt."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10.0, capacity=10, clock=clock, sleep=clock.sleep)
+
+        assert bucket.try_acquire(8) == 0.0
+        assert bucket.try_acquire(4) == pytest.approx(0.2)
+        bucket.debit(7)
+        assert bucket.try_acquire(1) == pytest.approx(0.6)
+        bucket.debit(-5)
+        assert bucket.try_acquire(1) == pytest.approx(0.1)
+        assert bucket.wait_time(1) == pytest.approx(0.1)
+        assert bucket.wait_time(1) == pytest.approx(0.1)
+        assert clock.now == 0.0
+
+    @pytest.mark.unit
+    def test_refills_over_time(self):
+        """Test that idle time refills the bucket up to its capacity."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire(2)
+
+        clock.now += 10
+
+        assert bucket.acquire(2) == 0.0
@@ -0,0 +1,208 @@
+# tests/test_retry.py
+import asyncio
+import json
+import time
+from email.utils import formatdate
+from unittest.mock import Mock
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from gmail_reader.async_client import AsyncGmailClient
+from gmail_reader.auth import GmailAuthenticator
+from gmail_reader.client import GmailClient
+from gmail_reader.retry import (
+    RequestExecutor,
+    RetriesExhaustedError,
+    RetryPolicy,
+    classify,
+    parse_retry_after,
+)
+from gmail_reader.testing import FakeGmailServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(status, reason=None, retry_after=None):
+    resp = {"retry-after": retry_after} if retry_after else {}
+    resp = type("Response", (dict,), {})(resp)
+    resp.status = status
+    resp.reason = "Error"
+    errors = [{"reason": reason}] if reason else []
+    return HttpError(resp, json.dumps({"error": {"code": status, "errors": errors}}).encode())
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client(fake_gmail, clock):
+    executor = RequestExecutor(RetryPolicy(seed=1), clock=clock, sleep=clock.sleep)
+    client = GmailClient(executor=executor)
+    client.service = fake_gmail.build_service()
+    return client
+
+
+class TestClassification:
+
+    @pytest.mark.unit
+    def test_classify(self):
+        """Test which errors are retried."""
+        assert classify(http_error(429, retry_after="3")) == (True, 429, 3.0)
+        assert classify(http_error(503)) == (True, 503, None)
+        assert classify(http_error(403, reason="userRateLimitExceeded")) == (True, 403, None)
+        assert classify(http_error(403, reason="forbidden")) == (False, 403, None)
+        assert classify(http_error(404)) == (False, 404, None)
+        assert classify(ConnectionResetError()) == (True, None, None)
+        assert classify(ValueError()) == (False, None, None)
+
+    @pytest.mark.unit
+    def test_parse_retry_after(self):
+        """Test Retry-After in seconds and as an HTTP date."""
+        assert parse_retry_after("12") == 12.0
+        assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+    @pytest.mark.unit
+    def test_backoff_is_jittered_and_bounded(self):
+        """Test full-jitter exponential backoff with a floor at Retry-After."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=8.0, seed=3)
+
+        delays = [policy.delay(attempt) for attempt in range(10)]
+
+        assert all(0 <= delay <= min(8.0, 2 ** attempt) for attempt, delay in enumerate(delays))
+        assert len(set(delays)) == len(delays)
+        assert policy.delay(0, retry_after=5.0) == 5.0
+
+
+class TestRequestExecutor:
+
+    @pytest.mark.unit
+    def test_retries_injected_429s(self, client, fake_gmail, clock):
+        """Test that rate-limited calls are retried until they succeed."""
+        fake_gmail.add_message(subject="Hello")
+        fake_gmail.fail_next(2)
+
+        assert client.list_message_ids() != []
+        assert client.executor.stats.retries == 2
+        assert client.executor.stats.errors_by_status[429] == 2
+        assert len(clock.sleeps) == 2
+
+    @pytest.mark.unit
+    def test_honors_retry_after(self, client, fake_gmail, clock):
+        """Test that the wait before a retry is at least the server's Retry-After."""
+        fake_gmail.fail_next(1, status=503, retry_after="7")
+
+        client.get_labels()
+
+        assert sum(clock.sleeps) >= 7
+
+    @pytest.mark.unit
+    def test_exhausted_retries_raise(self, client, fake_gmail):
+        """Test that a persistent rate limit raises instead of looking like an empty mailbox."""
+        fake_gmail.add_message(subject="Hello")
+        fake_gmail.fail_next(10)
+
+        with pytest.raises(RetriesExhaustedError) as excinfo:
+            client.list_messages()
+
+        assert excinfo.value.attempts == 6
+        assert client.executor.stats.failures == 1
+
+    @pytest.mark.unit
+    def test_permanent_errors_are_not_retried(self, client, fake_gmail, clock):
+        """Test that a 404 fails at once and keeps the old empty result."""
+        assert client.get_message("missing") == {}
+        assert clock.sleeps == []
+        assert client.executor.stats.errors_by_status[404] == 1
+
+    @pytest.mark.unit
+    def test_batch_items_are_retried(self, client, fake_gmail):
+        """Test that items of a batch rejected with 429 are re-sent in a smaller batch."""
+        ids = [fake_gmail.add_message(subject=f"S{n}")["id"] for n in range(5)]
+        fake_gmail.fail_next(2)
+        fake_gmail.http_requests = 0
+
+        messages = client.get_messages(ids)
+
+        assert [message["id"] for message in messages] == ids
+        assert fake_gmail.http_requests == 2
+        assert client.executor.stats.retries == 2
+
+    @pytest.mark.unit
+    def test_quota_units_and_throttling(self, fake_gmail, clock):
+        """Test per-method quota accounting and proactive throttling."""
+        executor = RequestExecutor(quota_rate=10, clock=clock, sleep=clock.sleep)
+        client = GmailClient(executor=executor)
+        client.service = fake_gmail.build_service()
+
+        for _ in range(4):
+            client.list_message_ids()
+        client.get_history_id()
+
+        assert executor.stats.units_by_method == {"messages.list": 20, "getProfile": 1}
+        assert executor.stats.units == 21
+        # The 1-unit burst runs the first list into debt; each later request waits for 9 units/s to repay it
+        assert executor.stats.throttle_seconds == pytest.approx(4 * 5 / 9)
+        assert executor.stats.as_dict()["requests"] == 5
+
+    @pytest.mark.unit
+    def test_throttled_units_fit_any_second(self, clock):
+        """Test that units sent in any one-second window stay within the quota rate."""
+        executor = RequestExecutor(quota_rate=250, clock=clock, sleep=clock.sleep)
+        sent = []
+        request = Mock()
+        request.execute.side_effect = lambda: sent.append(clock.now)
+
+        for _ in range(300):
+            executor.execute(request, method="messages.list")
+
+        for start in sent:
+            units = 5 * sum(1 for t in sent if start <= t < start + 1)
+            assert units <= 250
+
+    @pytest.mark.unit
+    def test_unknown_request_objects(self, clock):
+        """Test that anything with execute() works, using the default cost."""
+        request = Mock()
+        request.execute.side_effect = [ConnectionResetError(), {"ok": True}]
+        executor = RequestExecutor(quota_rate=None, clock=clock, sleep=clock.sleep)
+
+        assert executor.execute(request) == {"ok": True}
+        assert executor.stats.units_by_method == {"unknown": 10}
+
+
+class TestAsyncRetries:
+
+    @pytest.mark.integration
+    def test_async_client_retries(self, fake_gmail, mock_credentials):
+        """Test that the async client backs off on 429 and then succeeds."""
+        auth = Mock(spec=GmailAuthenticator)
+        auth.authenticate.return_value = mock_credentials
+        fake_gmail.fail_next(2, retry_after="0")
+
+        async def scenario(base_url):
+            client = AsyncGmailClient(authenticator=auth, base_url=base_url,
+                                      retry_policy=RetryPolicy(base_delay=0.01, seed=1))
+            async with client:
+                return await client.get_labels()
+
+        with FakeGmailServer(fake_gmail) as server:
+            labels = asyncio.run(scenario(server.base_url))
+
+        assert labels[0]["id"] == "INBOX"
+        assert fake_gmail.errors_injected == 2
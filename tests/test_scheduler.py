@@ -0,0 +1,196 @@
+# tests/test_scheduler.py
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from gmail_reader.client import GmailClient
+from gmail_reader.extractor.scoring import ExtractionResult
+from gmail_reader.retry import RequestExecutor
+from gmail_reader.scheduler import POLL_UNITS, MailboxScheduler
+from gmail_reader.testing import FakeGmailBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_client(backend, executor=None):
+    client = GmailClient(executor=executor)
+    client.service = backend.build_service()
+    return client
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestMailboxScheduler:
+
+    @pytest.mark.unit
+    def test_polls_accounts_and_reports_new_messages(self, clock):
+        """Test that each mailbox is polled and only new messages are reported."""
+        backends = {name: FakeGmailBackend() for name in ("a", "b")}
+        backends["a"].add_message(subject="Old")
+        received = []
+        scheduler = MailboxScheduler(
+            workers=2, jitter=0, clock=clock,
+            on_messages=lambda account, messages, results: received.append(
+                (account, [m["subject"] for m in messages]))
+        )
+        for name, backend in backends.items():
+            scheduler.add_account(name, make_client(backend), interval=10)
+
+        assert scheduler.run_pending() == 2
+        assert scheduler.wait_idle(5)
+        assert received == [("a", ["Old"])]
+
+        backends["b"].add_message(subject="New")
+        assert scheduler.run_pending() == 0
+        clock.now += 10
+        assert scheduler.run_pending() == 2
+        assert scheduler.wait_idle(5)
+
+        assert received[-1] == ("b", ["New"])
+        assert scheduler.stats.polls == 4
+        assert scheduler.stats.messages == 2
+
+    @pytest.mark.unit
+    def test_jitter_spreads_first_polls(self, clock):
+        """Test that the first polls of many mailboxes fall across their first interval."""
+        scheduler = MailboxScheduler(clock=clock, seed=3)
+        dues = [scheduler.add_account(f"user{n}", Mock(), interval=30).due - clock.now for n in range(200)]
+
+        assert all(0 <= due <= 30 for due in dues)
+        assert max(dues) - min(dues) > 25
+        assert scheduler.run_pending() <= 1
+
+    @pytest.mark.unit
+    def test_worker_limit(self, clock):
+        """Test that no more polls than workers are dispatched at once."""
+        scheduler = MailboxScheduler(workers=3, jitter=0, clock=clock)
+        for n in range(10):
+            scheduler.add_account(f"user{n}", make_client(FakeGmailBackend()), interval=10)
+
+        assert scheduler.run_pending() == 3
+        scheduler.wait_idle(5)
+        assert scheduler.run_pending() == 3
+        scheduler.wait_idle(5)
+
+    @pytest.mark.unit
+    def test_user_budget_postpones_mailbox(self, clock):
+        """Test that a mailbox whose client is over its quota budget is postponed until the budget recovers."""
+        executor = RequestExecutor(quota_rate=POLL_UNITS, clock=clock, sleep=clock.sleep)
+        scheduler = MailboxScheduler(jitter=0, clock=clock)
+        mailbox = scheduler.add_account("a", make_client(FakeGmailBackend(), executor), interval=0.1)
+
+        assert scheduler.run_pending() == 1
+        scheduler.wait_idle(5)
+        clock.now += 0.1
+        assert scheduler.run_pending() == 0
+
+        assert scheduler.stats.throttled == 1
+        # A poll costs more than the bucket holds, so admission waits for a full bucket
+        wait = executor.budget.wait_time(executor.budget.capacity)
+        assert wait > 0
+        assert mailbox.due == pytest.approx(clock.now + wait)
+        # Admission does not take units; only the requests the client sends do
+        assert executor.budget.wait_time(executor.budget.capacity) == wait
+
+    @pytest.mark.unit
+    def test_project_budget_pauses_dispatch(self, clock):
+        """Test that the shared quota budget caps polls across all mailboxes."""
+        scheduler = MailboxScheduler(workers=10, project_quota_rate=3 * POLL_UNITS, jitter=0, clock=clock)
+        for n in range(5):
+            scheduler.add_account(f"user{n}", make_client(FakeGmailBackend()), interval=10)
+
+        assert scheduler.run_pending() == 3
+        assert scheduler.run_pending() == 0
+        clock.now += 0.5
+        assert scheduler.run_pending() == 1
+        scheduler.wait_idle(5)
+
+    @pytest.mark.unit
+    def test_removed_account_is_not_polled(self, clock):
+        """Test that removing an account cancels its scheduled polls."""
+        backend = FakeGmailBackend()
+        scheduler = MailboxScheduler(jitter=0, clock=clock)
+        scheduler.add_account("a", make_client(backend), interval=10)
+        scheduler.remove_account("a")
+
+        assert scheduler.run_pending() == 0
+        assert backend.http_requests == 0
+        assert len(scheduler) == 0
+
+    @pytest.mark.unit
+    def test_extracts_codes_in_worker(self, clock):
+        """Test that fetched messages are passed through the extractor."""
+        backend = FakeGmailBackend()
+        backend.add_message(subject="Code", body="Your code is 123456")
+        extractor = Mock()
+        extractor.extract_code_with_confidence.return_value = ExtractionResult("123456", 0.9, "scorer")
+        received = []
+        scheduler = MailboxScheduler(
+            jitter=0, clock=clock, extractor=extractor,
+            on_messages=lambda account, messages, results: received.extend(results)
+        )
+        scheduler.add_account("a", make_client(backend))
+
+        scheduler.run_pending()
+        scheduler.wait_idle(5)
+
+        extractor.extract_code_with_confidence.assert_called_once_with(
+            "Your code is 123456", sender="sender@example.com")
+        assert received == [ExtractionResult("123456", 0.9, "scorer")]
+
+    @pytest.mark.unit
+    def test_failed_poll_is_rescheduled(self, clock):
+        """Test that a failing mailbox is counted and polled again later."""
+        client = Mock()
+        client.get_history_id.side_effect = RuntimeError("boom")
+        scheduler = MailboxScheduler(jitter=0, clock=clock)
+        mailbox = scheduler.add_account("a", client, interval=10)
+
+        scheduler.run_pending()
+        scheduler.wait_idle(5)
+
+        assert scheduler.stats.errors == 1
+        assert mailbox.due == clock.now + 10
+
+    @pytest.mark.unit
+    def test_clients_from_credential_manager(self, clock):
+        """Test that accounts added without a client use the credential manager."""
+        credentials = Mock()
+        scheduler = MailboxScheduler(credentials=credentials, user_quota_rate=100, clock=clock)
+
+        mailbox = scheduler.add_account("work")
+
+        credentials.authenticator.assert_called_once_with("work")
+        assert mailbox.client.authenticator is credentials.authenticator.return_value
+        assert mailbox.budget is mailbox.client.executor.budget
+        assert mailbox.budget.rate + mailbox.budget.capacity == pytest.approx(100)
+        with pytest.raises(ValueError):
+            scheduler.add_account("work")
+        with pytest.raises(ValueError):
+            MailboxScheduler(clock=clock).add_account("other")
+
+    @pytest.mark.unit
+    def test_run_in_background(self):
+        """Test the background thread with a real clock."""
+        backend = FakeGmailBackend()
+        with MailboxScheduler(jitter=0) as scheduler:
+            scheduler.add_account("a", make_client(backend), interval=0.01)
+            for _ in range(200):
+                if scheduler.stats.polls >= 3:
+                    break
+                time.sleep(0.01)
+
+        assert scheduler.stats.polls >= 3
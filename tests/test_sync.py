@@ -0,0 +1,136 @@
+# tests/test_sync.py
+import pytest
+
+from gmail_reader.client import GmailClient, HistoryExpiredError
+from gmail_reader.query import UnsupportedQueryError
+from gmail_reader.sync import HistoryCheckpoint, IncrementalSync
+
+@pytest.fixture
+def client(fake_gmail):
+    client = GmailClient()
+    client.service = fake_gmail.build_service()
+    return client
+
+class TestHistoryCheckpoint:
+    
+    @pytest.mark.unit
+    def test_persists_to_file(self, tmp_path):
+        """Test that the history ID survives a new checkpoint instance."""
+        path = tmp_path / "history.json"
+        HistoryCheckpoint(path).save("1234")
+        
+        assert HistoryCheckpoint(path).load() == "1234"
+    
+    @pytest.mark.unit
+    def test_in_memory_and_clear(self):
+        """Test an in-memory checkpoint and clearing it."""
+        checkpoint = HistoryCheckpoint(path=None)
+        assert checkpoint.load() is None
+        
+        checkpoint.save("42")
+        assert checkpoint.load() == "42"
+        
+        checkpoint.clear()
+        assert checkpoint.load() is None
+
+class TestIncrementalSync:
+    
+    @pytest.mark.unit
+    def test_first_poll_runs_full_resync(self, client, fake_gmail):
+        """Test that the first poll searches and stores a checkpoint."""
+        fake_gmail.add_message(subject="Old")
+        checkpoint = HistoryCheckpoint(path=None)
+        
+        messages = IncrementalSync(client, checkpoint).poll()
+        
+        assert [msg["subject"] for msg in messages] == ["Old"]
+        assert checkpoint.load() == str(fake_gmail.history_id)
+    
+    @pytest.mark.unit
+    def test_later_polls_only_fetch_new_messages(self, client, fake_gmail):
+        """Test that polls after the first return only added messages."""
+        fake_gmail.add_message(subject="Old")
+        sync = IncrementalSync(client, HistoryCheckpoint(path=None))
+        sync.poll()
+        
+        fake_gmail.api_calls.clear()
+        assert sync.poll() == []
+        assert fake_gmail.api_calls == [("GET", "history")]
+        
+        fake_gmail.add_message(subject="New 1")
+        fake_gmail.add_message(subject="New 2")
+        messages = sync.poll()
+        
+        assert [msg["subject"] for msg in messages] == ["New 1", "New 2"]
+        assert ("GET", "messages") not in fake_gmail.api_calls
+    
+    @pytest.mark.unit
+    def test_label_filter(self, client, fake_gmail):
+        """Test that messages without the watched label are skipped."""
+        sync = IncrementalSync(client, HistoryCheckpoint(path=None), label_id="INBOX")
+        sync.poll()
+        
+        fake_gmail.add_message(subject="Sent", label_ids=["SENT"])
+        fake_gmail.add_message(subject="Inbox")
+        
+        assert [msg["subject"] for msg in sync.poll()] == ["Inbox"]
+    
+    @pytest.mark.unit
+    def test_expired_checkpoint_falls_back_to_resync(self, client, fake_gmail):
+        """Test the full resync when the checkpoint is too old."""
+        checkpoint = HistoryCheckpoint(path=None)
+        sync = IncrementalSync(client, checkpoint, full=True)
+        sync.poll()
+        
+        fake_gmail.add_message(subject="Missed", body="Body")
+        fake_gmail.expire_history()
+        
+        with pytest.raises(HistoryExpiredError):
+            client.list_history(checkpoint.load())
+        
+        messages = sync.poll()
+        assert [msg["body"] for msg in messages] == ["Body"]
+        assert checkpoint.load() == str(fake_gmail.history_id)
+    
+    @pytest.mark.unit
+    def test_query_filters_added_messages(self, client, fake_gmail):
+        """Test that incremental polls only report added messages matching the query."""
+        sync = IncrementalSync(client, HistoryCheckpoint(path=None), query="subject:code")
+        sync.poll()
+        
+        fake_gmail.add_message(subject="Your code", body="1234")
+        fake_gmail.add_message(subject="Newsletter")
+        
+        messages = sync.poll()
+        assert [msg["subject"] for msg in messages] == ["Your code"]
+        assert "body" not in messages[0]
+    
+    @pytest.mark.unit
+    def test_unsupported_query_is_rejected(self, client):
+        """Test that a query that cannot be checked locally is refused up front."""
+        with pytest.raises(UnsupportedQueryError):
+            IncrementalSync(client, HistoryCheckpoint(path=None), query="has:attachment")
+    
+    @pytest.mark.unit
+    def test_failed_history_page_is_retried(self, client, fake_gmail, monkeypatch):
+        """Test that a poll whose history listing fails partway reports nothing and keeps its checkpoint."""
+        checkpoint = HistoryCheckpoint(path=None)
+        sync = IncrementalSync(client, checkpoint)
+        sync.poll()
+        start = checkpoint.load()
+        fake_gmail.add_message(subject="New 1")
+        fake_gmail.add_message(subject="New 2")
+        
+        list_history = fake_gmail._list_history
+        
+        def fail_second_page(params):
+            if "pageToken" in params:
+                return 400, {"error": {"code": 400, "message": "Bad request"}}
+            return list_history(dict(params, maxResults=["1"]))
+        
+        monkeypatch.setattr(fake_gmail, "_list_history", fail_second_page)
+        assert sync.poll() == []
+        assert checkpoint.load() == start
+        
+        monkeypatch.setattr(fake_gmail, "_list_history", list_history)
+        assert [msg["subject"] for msg in sync.poll()] == ["New 1", "New 2"]
@@ -0,0 +1,145 @@
+# tests/test_waiter.py
+import pytest
+from unittest.mock import patch
+
+from gmail_reader.client import GmailClient
+from gmail_reader.extractor.patterns import RegexPatterns
+from gmail_reader.waiter import CodeWaiter, PollStrategy
+
+class FakeClock:
+    """Virtual clock that delivers scheduled messages as time advances."""
+    
+    def __init__(self, backend, start=1_700_000_000.0):
+        self.backend = backend
+        self.now = start
+        self.deliveries = []
+    
+    def deliver_at(self, at, **message):
+        self.deliveries.append((at, message))
+    
+    def time(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+        for at, message in [d for d in self.deliveries if d[0] <= self.now]:
+            self.deliveries.remove((at, message))
+            self.backend.add_message(internal_date=int(at * 1000), **message)
+
+@pytest.fixture
+def client(fake_gmail):
+    client = GmailClient()
+    client.service = fake_gmail.build_service()
+    return client
+
+@pytest.fixture
+def clock(fake_gmail):
+    return FakeClock(fake_gmail)
+
+@pytest.fixture
+def waiter(client, clock):
+    return CodeWaiter(client, extractor=RegexPatterns(), clock=clock.time, sleep=clock.sleep)
+
+class TestPollStrategy:
+    
+    @pytest.mark.unit
+    def test_intervals_back_off_to_max(self):
+        """Test that intervals grow geometrically and are capped."""
+        intervals = PollStrategy(initial=1.0, backoff=2.0, max_interval=5.0).intervals()
+        assert [next(intervals) for _ in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+class TestCodeWaiter:
+    
+    @pytest.mark.unit
+    def test_returns_code_when_email_arrives(self, waiter, clock):
+        """Test that the code is returned on the first poll after delivery."""
+        clock.deliver_at(clock.now + 3.5, subject="Your code", sender="noreply@site.com",
+                         body="Your verification code is: 482913")
+        start = clock.now
+        
+        code = waiter.wait_for_code(query="from:site.com", timeout=60,
+                                    poll_strategy=PollStrategy(initial=1.0, backoff=1.0))
+        
+        assert code == "482913"
+        assert clock.now - start == pytest.approx(4.0)
+    
+    @pytest.mark.unit
+    def test_ignores_mail_before_since(self, waiter, clock, fake_gmail):
+        """Test that older codes are not returned."""
+        fake_gmail.add_message(subject="Old", sender="noreply@site.com",
+                               body="Your code is 111111", internal_date=int((clock.now - 600) * 1000))
+        clock.deliver_at(clock.now + 1, subject="New", sender="noreply@site.com", body="Your code is 222222")
+        
+        assert waiter.wait_for_code(query="from:site.com", timeout=10) == "222222"
+    
+    @pytest.mark.unit
+    def test_timeout_returns_none(self, waiter, clock):
+        """Test that None is returned once the timeout passes."""
+        start = clock.now
+        
+        assert waiter.wait_for_code(query="from:site.com", timeout=30) is None
+        assert clock.now - start == pytest.approx(30)
+    
+    @pytest.mark.unit
+    def test_searches_only_when_history_changes(self, waiter, clock, fake_gmail):
+        """Test that idle polls cost one history call, and new mail is fetched from history without a search."""
+        clock.deliver_at(clock.now + 20, subject="Code", sender="noreply@site.com", body="PIN: 7788")
+        
+        code = waiter.wait_for_code(query="from:site.com", timeout=60,
+                                    poll_strategy=PollStrategy(initial=1.0, backoff=1.0))
+        
+        assert code == "7788"
+        assert fake_gmail.api_calls.count(("GET", "history")) == 20
+        assert fake_gmail.api_calls.count(("GET", "messages")) == 1
+    
+    @pytest.mark.unit
+    def test_unrelated_mail_is_fetched_once(self, waiter, clock, fake_gmail):
+        """Test that each delivered message is fetched once, whether or not it matches."""
+        clock.deliver_at(clock.now + 1, subject="Hi", sender="noreply@site.com", body="No code in here")
+        clock.deliver_at(clock.now + 2, subject="Other", sender="someone@else.com", body="unrelated")
+        clock.deliver_at(clock.now + 3, subject="Code", sender="noreply@site.com", body="Your code is 555666")
+        
+        code = waiter.wait_for_code(query="from:site.com", timeout=60,
+                                    poll_strategy=PollStrategy(initial=1.0, backoff=1.0))
+        
+        assert code == "555666"
+        message_gets = [call for call in fake_gmail.api_calls if call[1].startswith("messages/")]
+        assert len(message_gets) == len(set(message_gets)) == 3
+    
+    @pytest.mark.unit
+    def test_found_while_search_lags(self, waiter, client, clock):
+        """Test that a message reported by history is found although search does not return it yet."""
+        clock.deliver_at(clock.now + 1.5, subject="Code", sender="noreply@site.com", body="Your code is 246810")
+        
+        with patch.object(client, "list_message_ids", return_value=[]):
+            code = waiter.wait_for_code(query="from:site.com", timeout=60,
+                                        poll_strategy=PollStrategy(initial=1.0, backoff=1.0))
+        
+        assert code == "246810"
+    
+    @pytest.mark.unit
+    def test_unsupported_query_searches_until_seen(self, waiter, client, clock):
+        """Test that a query only Gmail can evaluate is searched again until lagging mail shows up."""
+        clock.deliver_at(clock.now + 1.5, subject="Code", sender="noreply@site.com",
+                         body="Your code is 135791", label_ids=["INBOX", "WORK"])
+        search = client.list_message_ids
+        searches = []
+        
+        def lagging_search(query, max_results):
+            searches.append(query)
+            # The index only catches up on the fourth search
+            return search(query, max_results) if len(searches) >= 4 else []
+        
+        with patch.object(client, "list_message_ids", side_effect=lagging_search):
+            code = waiter.wait_for_code(query="label:work", timeout=60,
+                                        poll_strategy=PollStrategy(initial=1.0, backoff=1.0))
+        
+        assert code == "135791"
+        assert len(searches) == 4
+    
+    @pytest.mark.unit
+    def test_client_wait_for_code_delegates(self, client):
+        """Test the GmailClient convenience method."""
+        with patch('gmail_reader.waiter.CodeWaiter.wait_for_code', return_value="123456") as mock_wait:
+            assert client.wait_for_code(query="from:x", timeout=5) == "123456"
+            mock_wait.assert_called_once_with(query="from:x", since=None, timeout=5, poll_strategy=None)